@@ -0,0 +1,200 @@
+"""
+结构化日志
+
+- 日志按JSON行输出：ts/level/logger/msg/request_id，extra中的字段和异常堆栈(exc)一并输出
+- 调用方只把日志记录放入有界队列：格式化(包括异常堆栈)和写stdout/文件都在后台线程执行，
+  队列满时直接丢弃并计数，请求路径不会阻塞在输出上
+- RequestIdMiddleware 为每个请求分配request_id(优先使用请求头X-Request-ID)，写入响应头和该请求的所有日志
+- 同一位置的同一条错误在 CES_LOG_RATE_INTERVAL 秒内最多输出 CES_LOG_RATE_LIMIT 条，之后只计数，
+  下一个时间窗口的第一条日志带上被抑制的条数(suppressed)
+- INFO及以下级别按 CES_LOG_SAMPLE_RATE 采样，WARNING及以上不采样
+
+setup() 在服务启动时调用，只配置 ces.* 日志，不影响uvicorn自身的日志。
+"""
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from starlette.datastructures import MutableHeaders
+
+import config
+
+request_id_var = contextvars.ContextVar("ces_request_id", default=None)
+
+# LogRecord自带的属性，其余属性视为extra字段输出
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class ContextFilter(logging.Filter):
+    """在调用线程上记录当前请求的request_id"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+class RateLimitFilter(logging.Filter):
+    """同一logger、调用位置、消息模板和异常类型的日志，每个时间窗口内最多通过limit条"""
+
+    def __init__(self, limit, interval, max_keys=10000):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.max_keys = max_keys
+        self._windows = {}  # key -> [窗口开始时间, 已通过条数, 已抑制条数]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.limit <= 0:
+            return True
+        exc_type = record.exc_info[0].__name__ if record.exc_info and record.exc_info[0] else None
+        key = (record.name, record.pathname, record.lineno, str(record.msg), exc_type)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._windows.clear()
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                self._windows[key] = [now, 1, 0]
+                return True
+            if window[1] < self.limit:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    非阻塞的QueueHandler
+
+    默认的prepare会在调用线程上格式化整条日志(包括traceback)，这里只合并消息参数，
+    异常堆栈保留为exc_info，由后台线程的JsonFormatter格式化。
+    """
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.dropped = 0
+        self._reported_dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if self.dropped != self._reported_dropped:
+            record.dropped = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_handler = None
+_listener = None
+
+def setup():
+    """配置 ces.* 日志：过滤/入队在调用线程，格式化和输出在后台线程"""
+    global _handler, _listener
+    if _listener is not None:
+        return
+    if config.LOG_FILE:
+        output = logging.handlers.RotatingFileHandler(
+            config.LOG_FILE,
+            maxBytes=config.LOG_FILE_MAX_BYTES,
+            backupCount=config.LOG_FILE_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+    else:
+        output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    _handler = BackgroundQueueHandler(queue.Queue(config.LOG_QUEUE_SIZE))
+    _handler.addFilter(SamplingFilter(config.LOG_SAMPLE_RATE))
+    _handler.addFilter(RateLimitFilter(config.LOG_RATE_LIMIT, config.LOG_RATE_INTERVAL))
+    _handler.addFilter(ContextFilter())
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _listener.start()
+
+    logger = logging.getLogger("ces")
+    logger.addHandler(_handler)
+    logger.setLevel(config.LOG_LEVEL)
+    # 不传递给root logger，避免被其他handler同步输出
+    logger.propagate = False
+
+def stop():
+    """停止后台线程，等待队列中的日志输出完"""
+    global _handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger("ces").removeHandler(_handler)
+    _listener.stop()
+    _handler = None
+    _listener = None
+
+_REQUEST_ID = re.compile(r"^[\w.:-]{1,64}$")
+
+class RequestIdMiddleware:
+    """ASGI中间件：为每个请求设置request_id，并通过响应头X-Request-ID返回"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        # 只接受长度和字符集合法的外部request_id，避免日志注入
+        if not request_id or not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
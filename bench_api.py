@@ -0,0 +1,473 @@
+"""
+接口基准测试：在进程内通过ASGI transport驱动FastAPI应用，覆盖全部 /ces/* 接口
+
+用法:
+    python bench_api.py                                   # 默认 small,medium 两种数据规模, 并发 1,8,32
+    python bench_api.py --sizes small --concurrency 1,16 --requests 200
+    python bench_api.py --endpoints list/page --output bench_results.json
+    python bench_api.py --baseline bench_results_old.json  # 与上一版本的结果对比
+
+- 每种数据规模的数据集由 generate_dataset.py 生成并缓存在 --data-dir 中，--regenerate 重新生成
+- 每次测试使用缓存数据集的副本，新增/修改/删除接口不会影响缓存的数据集
+- 删除接口使用测试前直接插入的数据，每个请求删除一条真实存在的记录
+- 每种数据规模在单独的子进程中测试(models在导入时按CES_DB_URL创建引擎)
+- 结果按 数据规模 / 接口 / 并发数 输出吞吐量和 p50/p95/p99 延迟，并写入JSON文件
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 各数据规模传给 generate_dataset.py 的参数
+SIZES = {
+    "small": [
+        "--tenants", "5", "--companies", "50", "--grids-per-company", "5", "--communities", "5000",
+        "--labels", "100", "--accounts", "2000", "--users", "1000"
+    ],
+    "medium": [
+        "--companies", "1000", "--communities", "100000", "--labels", "1000",
+        "--accounts", "50000", "--users", "20000"
+    ],
+    "large": [],  # generate_dataset.py 默认规模
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="接口基准测试")
+    parser.add_argument("--sizes", default="small,medium", help=f"数据规模，可选: {','.join(SIZES)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="并发数列表")
+    parser.add_argument("--requests", type=int, default=100, help="每个接口每个并发数的请求数")
+    parser.add_argument("--warmup", type=int, default=10, help="每个接口正式测试前的预热请求数")
+    parser.add_argument("--endpoints", default="", help="只测试名称中包含该字符串的接口")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "bench_data"), help="数据集缓存目录")
+    parser.add_argument("--regenerate", action="store_true", help="重新生成数据集")
+    parser.add_argument("--output", default="bench_results.json", help="结果JSON文件")
+    parser.add_argument("--baseline", help="对比的历史结果JSON文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95或吞吐量变化超过该比例时标记为退化")
+    parser.add_argument("--seed", type=int, default=42)
+    # 内部参数：子进程中测试单个数据规模，结果写入该文件
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    parser.add_argument("--size-name", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def parse_levels(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+def percentile(sorted_values, q):
+    """线性插值百分位数，sorted_values已升序排列"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class BenchContext:
+    """测试数据集中的id样本，以及生成唯一名称、待删除记录的辅助方法"""
+
+    def __init__(self, engine, seed, sample_size=2000):
+        import models
+        from sqlalchemy import select, func
+
+        self.models = models
+        self.engine = engine
+        self.random = random.Random(seed)
+        self.sequence = itertools.count(1)
+        self.delete_ids = {}
+        # 每张表随机抽样，保存id及后续请求需要的外键
+        samples = {
+            "tenants": select(models.Tenant.id),
+            "companies": select(models.Company.id, models.Company.tenant_id),
+            "grids": select(models.Grid.id, models.Grid.company_id),
+            "communities": select(models.Community.id, models.Community.grid_id),
+            "groups": select(models.Group.id, models.Group.company_id),
+            "roles": select(models.Role.id),
+            "labels": select(models.Label.id, models.Label.type),
+            "accounts": select(models.UserAccount.id),
+            "users": select(models.User.id),
+        }
+        self.rows = {}
+        with engine.connect() as conn:
+            for name, statement in samples.items():
+                rows = conn.execute(statement.order_by(func.random()).limit(sample_size)).all()
+                if not rows:
+                    raise RuntimeError(f"数据集中 {name} 为空，请使用 generate_dataset.py 生成数据")
+                self.rows[name] = [tuple(row) for row in rows]
+
+    def pick(self, name):
+        return self.random.choice(self.rows[name])
+
+    def pick_id(self, name):
+        return self.pick(name)[0]
+
+    def unique(self, prefix):
+        return f"{prefix}{next(self.sequence)}"
+
+    def prepare_deletes(self, kind, count):
+        """直接插入count条待删除的记录，删除接口的每个请求使用其中一条"""
+        from sqlalchemy import insert
+
+        models = self.models
+        builders = {
+            "company": (models.Company, lambda: {
+                "name": self.unique("压测删除局点"), "tenant_id": self.pick_id("tenants")
+            }),
+            "grid": (models.Grid, lambda: {
+                "name": self.unique("压测删除网格"), "company_id": self.pick_id("companies")
+            }),
+            "community": (models.Community, lambda: {
+                "name": self.unique("压测删除小区"), "grid_id": self.pick_id("grids")
+            }),
+            "group": (models.Group, lambda: {
+                "name": self.unique("压测删除营销组"), "company_id": self.pick_id("companies")
+            }),
+            "role": (models.Role, lambda: {"name": self.unique("压测删除角色"), "description": ""}),
+            "label": (models.Label, lambda: {"name": self.unique("压测删除标签"), "type": 1}),
+            "account": (models.UserAccount, lambda: {
+                "account": self.unique("bench_delete_"), "name": "压测删除账号",
+                "tenant_id": self.pick_id("tenants"), "company_id": self.pick_id("companies"),
+                "role_id": self.pick_id("roles"), "is_enabled": 1
+            }),
+        }
+        model, build = builders[kind]
+        with self.engine.begin() as conn:
+            result = conn.execute(insert(model).returning(model.id), [build() for _ in range(count)])
+            self.delete_ids[kind] = [row[0] for row in result]
+
+    def pop_delete(self, kind):
+        return self.delete_ids[kind].pop()
+
+def endpoint_requests(ctx):
+    """
+    接口名称 -> (HTTP方法, 路径, 请求构造函数, 删除接口使用的记录类型)
+
+    请求构造函数每次调用返回一组httpx请求参数，新增/修改接口使用唯一名称避免重名校验失败
+    """
+    now = datetime.now()
+    expire_date = (now + timedelta(days=180)).strftime("%Y-%m-%d %H:%M:%S")
+    effective_day = (now + timedelta(days=180)).strftime("%Y-%m-%d")
+
+    def page(**filters):
+        return lambda: {"json": {"pageNo": ctx.random.randint(1, 20), "pageSize": 10, **filters}}
+
+    def account_add():
+        company_id, tenant_id = ctx.pick("companies")
+        return {"json": {
+            "tenantId": tenant_id, "companyId": company_id, "username": ctx.unique("bench_account_"),
+            "realName": "压测账号", "roleId": ctx.pick_id("roles"), "marketingGroups": [ctx.pick_id("groups")],
+            "enabled": 1, "expireDate": expire_date
+        }}
+
+    def grid_modify():
+        grid_id, company_id = ctx.pick("grids")
+        return {"json": {"id": grid_id, "companyId": company_id, "name": ctx.unique("压测网格")}}
+
+    def community_modify():
+        community_id, grid_id = ctx.pick("communities")
+        return {"json": {"id": community_id, "gridId": grid_id, "name": ctx.unique("压测小区")}}
+
+    def group_modify():
+        group_id, company_id = ctx.pick("groups")
+        return {"json": {"id": group_id, "companyId": company_id, "name": ctx.unique("压测营销组"), "description": ""}}
+
+    def company_modify():
+        company_id, tenant_id = ctx.pick("companies")
+        return {"json": {"id": company_id, "tenantId": tenant_id, "name": ctx.unique("压测局点")}}
+
+    def label_modify():
+        label_id, label_type = ctx.pick("labels")
+        return {"json": {"id": label_id, "name": ctx.unique("压测标签"), "type": label_type}}
+
+    def delete(kind):
+        return lambda: {"params": {"id": ctx.pop_delete(kind)}}
+
+    return {
+        "POST /ces/sys/account/login": ("POST", "/ces/sys/account/login",
+                                        lambda: {"json": {"username": "zxjy", "password": "zxjy"}}, None),
+        "POST /ces/tenant/list": ("POST", "/ces/tenant/list", lambda: {}, None),
+        "POST /ces/company/list": ("POST", "/ces/company/list",
+                                   lambda: {"json": {"tenantId": ctx.pick_id("tenants")}}, None),
+        "GET /ces/company/list/{tenant_id}": ("GET", "/ces/company/list/{tenant_id}", None, None),
+        "GET /ces/company/list": ("GET", "/ces/company/list",
+                                  lambda: {"params": {"tenant_id": ctx.pick_id("tenants")}}, None),
+        "POST /ces/company/list/page": ("POST", "/ces/company/list/page", page(), None),
+        "POST /ces/company/list/page (tenant)": ("POST", "/ces/company/list/page",
+                                                 lambda: page(tenantId=ctx.pick_id("tenants"))(), None),
+        "POST /ces/company/add": ("POST", "/ces/company/add", lambda: {"json": {
+            "name": ctx.unique("压测局点"), "tenantId": ctx.pick_id("tenants")}}, None),
+        "POST /ces/company/modify": ("POST", "/ces/company/modify", company_modify, None),
+        "DELETE /ces/company/delete": ("DELETE", "/ces/company/delete", delete("company"), "company"),
+        "POST /ces/grid/list": ("POST", "/ces/grid/list",
+                                lambda: {"json": {"companyId": ctx.pick_id("companies")}}, None),
+        "POST /ces/grid/list/page": ("POST", "/ces/grid/list/page", page(), None),
+        "POST /ces/grid/list/page (company)": ("POST", "/ces/grid/list/page",
+                                               lambda: page(companyId=ctx.pick_id("companies"))(), None),
+        "POST /ces/grid/add": ("POST", "/ces/grid/add", lambda: {"json": {
+            "companyId": ctx.pick_id("companies"), "name": ctx.unique("压测网格")}}, None),
+        "POST /ces/grid/modify": ("POST", "/ces/grid/modify", grid_modify, None),
+        "DELETE /ces/grid/delete": ("DELETE", "/ces/grid/delete", delete("grid"), "grid"),
+        "POST /ces/community/list/page": ("POST", "/ces/community/list/page", page(), None),
+        "POST /ces/community/list/page (tenant)": ("POST", "/ces/community/list/page",
+                                                   lambda: page(tenantId=ctx.pick_id("tenants"))(), None),
+        "POST /ces/community/list/page (name)": ("POST", "/ces/community/list/page",
+                                                 lambda: page(name="幸福家园")(), None),
+        "POST /ces/community/add": ("POST", "/ces/community/add", lambda: {"json": {
+            "gridId": ctx.pick_id("grids"), "name": ctx.unique("压测小区")}}, None),
+        "POST /ces/community/modify": ("POST", "/ces/community/modify", community_modify, None),
+        "DELETE /ces/community/delete": ("DELETE", "/ces/community/delete", delete("community"), "community"),
+        "POST /ces/group/list/page": ("POST", "/ces/group/list/page", page(), None),
+        "POST /ces/group/list/page (company)": ("POST", "/ces/group/list/page",
+                                                lambda: page(companyId=ctx.pick_id("companies"))(), None),
+        "POST /ces/group/add": ("POST", "/ces/group/add", lambda: {"json": {
+            "companyId": ctx.pick_id("companies"), "name": ctx.unique("压测营销组"), "description": ""}}, None),
+        "POST /ces/group/modify": ("POST", "/ces/group/modify", group_modify, None),
+        "DELETE /ces/group/delete": ("DELETE", "/ces/group/delete", delete("group"), "group"),
+        "GET /ces/group/company_group/tree": ("GET", "/ces/group/company_group/tree",
+                                              lambda: {"params": {"companyId": ctx.pick_id("companies")}}, None),
+        "POST /ces/role/list/page": ("POST", "/ces/role/list/page", page(), None),
+        "GET /ces/role/list": ("GET", "/ces/role/list", lambda: {}, None),
+        "POST /ces/role/add": ("POST", "/ces/role/add", lambda: {"json": {
+            "name": ctx.unique("压测角色"), "description": ""}}, None),
+        "POST /ces/role/modify": ("POST", "/ces/role/modify", lambda: {"json": {
+            "id": ctx.pick_id("roles"), "name": ctx.unique("压测角色"), "description": ""}}, None),
+        "DELETE /ces/role/delete": ("DELETE", "/ces/role/delete", delete("role"), "role"),
+        "POST /ces/label/list/page": ("POST", "/ces/label/list/page", page(), None),
+        "POST /ces/label/list/page (company)": ("POST", "/ces/label/list/page",
+                                                lambda: page(companyId=ctx.pick_id("companies"))(), None),
+        "POST /ces/label/add": ("POST", "/ces/label/add", lambda: {"json": {
+            "name": ctx.unique("压测标签"), "type": ctx.random.choice([1, 2])}}, None),
+        "POST /ces/label/modify": ("POST", "/ces/label/modify", label_modify, None),
+        "DELETE /ces/label/delete": ("DELETE", "/ces/label/delete", delete("label"), "label"),
+        "POST /ces/label/configure/label_company": ("POST", "/ces/label/configure/label_company", lambda: {"json": {
+            "id": ctx.pick_id("labels"), "companyList": [ctx.pick_id("companies") for _ in range(3)]}}, None),
+        "POST /ces/account/list/page": ("POST", "/ces/account/list/page", page(), None),
+        "POST /ces/account/list/page (tenant+enabled)": ("POST", "/ces/account/list/page",
+                                                         lambda: page(tenantId=ctx.pick_id("tenants"), enabled=1)(),
+                                                         None),
+        "POST /ces/account/list/page (group)": ("POST", "/ces/account/list/page",
+                                                lambda: page(marketingGroups=[ctx.pick_id("groups")])(), None),
+        "POST /ces/account/add": ("POST", "/ces/account/add", account_add, None),
+        "POST /ces/account/modify": ("POST", "/ces/account/modify", lambda: {"json": {
+            "id": ctx.pick_id("accounts"), "realName": ctx.unique("压测账号")}}, None),
+        "DELETE /ces/account/delete": ("DELETE", "/ces/account/delete", delete("account"), "account"),
+        "POST /ces/user/list/page": ("POST", "/ces/user/list/page", page(), None),
+        "POST /ces/user/list/page (company)": ("POST", "/ces/user/list/page",
+                                               lambda: page(companyId=ctx.pick_id("companies"))(), None),
+        "POST /ces/user/add": ("POST", "/ces/user/add", lambda: {"json": {
+            "companyId": ctx.pick_id("companies"), "effectiveDay": effective_day,
+            "name": "压测用户", "username": ctx.unique("bench_user_")}}, None),
+        "POST /ces/user/modify": ("POST", "/ces/user/modify", lambda: {"json": {
+            "id": ctx.pick_id("users"), "name": ctx.unique("压测用户"), "effectiveDay": effective_day}}, None),
+        "POST /ces/user/modify/status": ("POST", "/ces/user/modify/status", lambda: {"json": {
+            "id": ctx.pick_id("users"), "status": ctx.random.choice([0, 1])}}, None),
+        "GET /ces/user/query/detail": ("GET", "/ces/user/query/detail",
+                                       lambda: {"params": {"userId": ctx.pick_id("users")}}, None),
+        "POST /ces/user/configure/user_effectiveDay": ("POST", "/ces/user/configure/user_effectiveDay",
+                                                       lambda: {"json": {"id": ctx.pick_id("users"),
+                                                                         "effectiveDay": effective_day}}, None),
+        "POST /ces/user/configure/user_group": ("POST", "/ces/user/configure/user_group", lambda: {"json": {
+            "id": ctx.pick_id("users"), "groupIds": [ctx.pick_id("groups")]}}, None),
+        "POST /ces/user/configure/user_role": ("POST", "/ces/user/configure/user_role", lambda: {"json": {
+            "id": ctx.pick_id("users"), "roleIds": [ctx.pick_id("roles")]}}, None),
+    }
+
+def build_request(ctx, path, build):
+    # 路径参数形式的接口在这里填充
+    if build is None:
+        return path.format(tenant_id=ctx.pick_id("tenants")), {}
+    return path, build()
+
+# 营销组树接口成功时返回 "0"
+SUCCESS_CODES = {"00000", "0"}
+
+def is_success(response):
+    if response.status_code != 200:
+        return False
+    try:
+        return response.json().get("code") in SUCCESS_CODES
+    except ValueError:
+        return False
+
+async def measure(client, ctx, method, path, build, total, concurrency):
+    """concurrency个协程共同发送total个请求，返回每个请求的耗时(秒)、失败数和总耗时"""
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(counter) < total:
+            url, kwargs = build_request(ctx, path, build)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if not is_success(response):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+async def run_size(args):
+    """子进程中执行：CES_DB_URL已指向当前数据规模的数据集副本"""
+    import httpx
+    import main
+    import models
+    import migrations
+
+    migrations.upgrade()
+    levels = parse_levels(args.concurrency)
+    ctx = BenchContext(models.engine, args.seed)
+    endpoints = {
+        name: spec for name, spec in endpoint_requests(ctx).items()
+        if args.endpoints in name
+    }
+    results = []
+    await main.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, (method, path, build, delete_kind) in endpoints.items():
+                if delete_kind:
+                    ctx.prepare_deletes(delete_kind, args.warmup + args.requests * len(levels))
+                await measure(client, ctx, method, path, build, args.warmup, 1)
+                for concurrency in levels:
+                    latencies, errors, elapsed = await measure(
+                        client, ctx, method, path, build, args.requests, concurrency
+                    )
+                    latencies.sort()
+                    result = {
+                        "dataset": args.size_name,
+                        "endpoint": name,
+                        "concurrency": concurrency,
+                        "requests": len(latencies),
+                        "errors": errors,
+                        "throughput": round(len(latencies) / elapsed, 1),
+                        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+                        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+                        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+                        "max_ms": round(latencies[-1] * 1000, 2),
+                    }
+                    results.append(result)
+                    print(
+                        f"{name:<52} c={concurrency:<3} {result['throughput']:>8.1f} req/s  "
+                        f"p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+                        f"p99 {result['p99_ms']:>8.2f} ms  失败 {errors}",
+                        flush=True
+                    )
+    finally:
+        await main.app.router.shutdown()
+    with open(args.worker_output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False)
+
+def prepare_dataset(size, args):
+    """返回缓存的数据集文件路径，不存在或--regenerate时通过generate_dataset.py生成"""
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f"{size}.db")
+    if os.path.exists(path) and not args.regenerate:
+        return path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    print(f"正在生成数据集 {size}...", flush=True)
+    env = {**os.environ, "CES_DB_URL": f"sqlite:///{path}"}
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "generate_dataset.py"), *SIZES[size], "--seed", str(args.seed)],
+        env=env, cwd=ROOT, check=True
+    )
+    return path
+
+def benchmark_size(size, args):
+    dataset = prepare_dataset(size, args)
+    work_dir = tempfile.mkdtemp(prefix=f"bench_api_{size}_")
+    try:
+        database = os.path.join(work_dir, "bench.db")
+        shutil.copy(dataset, database)
+        worker_output = os.path.join(work_dir, "results.json")
+        print(f"\n===== 数据规模 {size} =====", flush=True)
+        argv = [
+            sys.executable, os.path.abspath(__file__),
+            "--size-name", size, "--worker-output", worker_output,
+            "--concurrency", args.concurrency, "--requests", str(args.requests),
+            "--warmup", str(args.warmup), "--endpoints", args.endpoints, "--seed", str(args.seed)
+        ]
+        env = {**os.environ, "CES_DB_URL": f"sqlite:///{database}"}
+        subprocess.run(argv, env=env, cwd=ROOT, check=True)
+        with open(worker_output, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, threshold):
+    """按 数据规模/接口/并发数 与历史结果对比，打印p95和吞吐量的变化，返回退化的条目数"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["dataset"], r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\n===== 与 {baseline_path} (版本 {baseline.get('revision')}) 对比 =====")
+    regressions = 0
+    for result in results:
+        old = previous.get((result["dataset"], result["endpoint"], result["concurrency"]))
+        if not old or not old["p95_ms"] or not old["throughput"]:
+            continue
+        p95_change = result["p95_ms"] / old["p95_ms"] - 1
+        throughput_change = result["throughput"] / old["throughput"] - 1
+        regressed = p95_change > threshold or throughput_change < -threshold
+        regressions += regressed
+        print(
+            f"{'退化' if regressed else '    '} {result['dataset']:<7} {result['endpoint']:<52} "
+            f"c={result['concurrency']:<3} p95 {p95_change:+7.1%}  吞吐量 {throughput_change:+7.1%}"
+        )
+    print(f"退化条目: {regressions}")
+    return regressions
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker_output:
+        asyncio.run(run_size(args))
+        return
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        raise SystemExit(f"未知的数据规模: {', '.join(unknown)}，可选: {', '.join(SIZES)}")
+
+    results = []
+    for size in sizes:
+        results.extend(benchmark_size(size, args))
+
+    report = {
+        "revision": git_revision(),
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "concurrency": parse_levels(args.concurrency),
+        "requests": args.requests,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline, args.threshold)
+
+if __name__ == "__main__":
+    main()
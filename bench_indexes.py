@@ -0,0 +1,132 @@
+"""
+索引基准测试：对比补建索引前后，分页接口典型查询的执行计划和耗时
+
+用法: python bench_indexes.py [账号数量]
+
+在临时数据库中生成数据，先删除models中声明的组合/外键索引，
+执行查询并打印EXPLAIN QUERY PLAN，然后通过migrations补建索引后再执行一次。
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+# 使用临时数据库，必须在导入models之前设置
+os.environ["CES_DB_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_indexes.db"
+
+from sqlalchemy import select, func, insert
+import models
+import migrations
+
+ACCOUNT_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+TENANT_COUNT = 20
+COMPANIES_PER_TENANT = 10
+GRIDS_PER_COMPANY = 20
+COMMUNITIES_PER_GRID = 20
+GROUP_COUNT = 500
+
+def generate_data(conn):
+    """使用Core批量插入生成测试数据"""
+    random.seed(42)
+    conn.execute(insert(models.Tenant), [
+        {"id": i, "name": f"运营商{i}"} for i in range(1, TENANT_COUNT + 1)
+    ])
+    company_count = TENANT_COUNT * COMPANIES_PER_TENANT
+    conn.execute(insert(models.Company), [
+        {"id": i, "name": f"局点{i}", "tenant_id": (i - 1) // COMPANIES_PER_TENANT + 1}
+        for i in range(1, company_count + 1)
+    ])
+    grid_count = company_count * GRIDS_PER_COMPANY
+    conn.execute(insert(models.Grid), [
+        {"id": i, "name": f"网格{i}", "company_id": (i - 1) // GRIDS_PER_COMPANY + 1}
+        for i in range(1, grid_count + 1)
+    ])
+    conn.execute(insert(models.Community), [
+        {"name": f"小区{i}", "grid_id": (i - 1) // COMMUNITIES_PER_GRID + 1}
+        for i in range(1, grid_count * COMMUNITIES_PER_GRID + 1)
+    ])
+    conn.execute(insert(models.Group), [
+        {"id": i, "name": f"营销组{i}", "company_id": random.randint(1, company_count)}
+        for i in range(1, GROUP_COUNT + 1)
+    ])
+    now = datetime.now()
+    accounts = []
+    for i in range(1, ACCOUNT_COUNT + 1):
+        company_id = random.randint(1, company_count)
+        accounts.append({
+            "id": i,
+            "account": f"account_{i}",
+            "name": f"账号{i}",
+            "tenant_id": (company_id - 1) // COMPANIES_PER_TENANT + 1,
+            "company_id": company_id,
+            "role_id": random.randint(1, 10),
+            "is_enabled": random.randint(0, 1),
+            "expire_date": now + timedelta(days=random.randint(-365, 365)),
+        })
+    conn.execute(insert(models.UserAccount), accounts)
+    conn.execute(insert(models.AccountGroup), [
+        {"account_id": i, "group_id": random.randint(1, GROUP_COUNT)} for i in range(1, ACCOUNT_COUNT + 1)
+    ])
+
+def benchmark_queries():
+    """分页接口使用的过滤/关联查询，与offset_page一样按主键排序"""
+    now = datetime.now()
+    return {
+        "小区分页(按运营商)": select(models.Community.id, func.count().over()).join(
+            models.Grid, models.Community.grid_id == models.Grid.id
+        ).join(
+            models.Company, models.Grid.company_id == models.Company.id
+        ).where(models.Company.tenant_id == 3).order_by(models.Community.id).limit(10),
+        "网格分页(按局点)": select(models.Grid.id, models.Grid.name).where(models.Grid.company_id == 57),
+        "账号分页(运营商+局点+启用+未过期)": select(models.UserAccount.id, func.count().over()).where(
+            models.UserAccount.tenant_id == 5,
+            models.UserAccount.company_id == 45,
+            models.UserAccount.is_enabled == 1,
+            models.UserAccount.expire_date >= now
+        ).order_by(models.UserAccount.id).limit(10),
+        "账号分页(按局点)": select(models.UserAccount.id, func.count().over()).where(
+            models.UserAccount.company_id == 88
+        ).order_by(models.UserAccount.id).limit(10),
+        "账号分页(按营销组)": select(models.AccountGroup.account_id).where(
+            models.AccountGroup.group_id.in_([1, 2, 3])
+        ).distinct(),
+        "账号营销组(按账号批量加载)": select(models.AccountGroup.account_id, models.AccountGroup.group_id).where(
+            models.AccountGroup.account_id.in_(list(range(1000, 1010)))
+        ),
+    }
+
+def run(conn, label, repeat=20):
+    print(f"\n===== {label} =====")
+    for name, statement in benchmark_queries().items():
+        sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.exec_driver_sql(sql).fetchall()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name}: {elapsed:.2f} ms")
+        for step in plan:
+            print(f"    {step}")
+
+def main():
+    declared = [index for table in models.Base.metadata.sorted_tables for index in table.indexes]
+    migrations.upgrade()
+    with models.engine.begin() as conn:
+        print(f"正在生成测试数据: {ACCOUNT_COUNT} 个账号...")
+        generate_data(conn)
+        # 模拟升级前的数据库：只保留主键和名称列上的索引
+        for index in declared:
+            if len(index.columns) > 1 or not any(column.index for column in index.columns):
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+    with models.engine.connect() as conn:
+        run(conn, "补建索引前")
+    with models.engine.connect() as conn:
+        created = migrations.create_missing_indexes(conn)
+    print(f"\n已补建索引 {len(created)} 个: {', '.join(created)}")
+    with models.engine.connect() as conn:
+        run(conn, "补建索引后")
+
+if __name__ == "__main__":
+    main()
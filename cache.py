@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+
+from sqlalchemy import select
+
+import config
+import models
+
+class DimensionCache:
+    """
+    维度表(运营商/局点/角色/营销组)按id的进程内只读缓存
+
+    - 读穿透：未命中时从数据库按id加载，缓存的是只读快照(namedtuple)，与Session无关
+    - 写失效：对应的新增/修改/删除接口提交后调用invalidate
+    - TTL：其他worker进程的写入最多延迟ttl秒可见
+    """
+
+    def __init__(self, model, fields, ttl=None):
+        self.model = model
+        self.fields = fields
+        self.ttl = config.DIMENSION_CACHE_TTL if ttl is None else ttl
+        self.record_class = namedtuple(f"{model.__name__}Record", fields)
+        self._records = {}
+        # 失效计数，防止失效前发起的加载把旧数据写回缓存
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, record_id):
+        entry = self._records.get(record_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return None
+
+    def _store(self, row, generation):
+        record = self.record_class(*(getattr(row, field) for field in self.fields))
+        if self.ttl > 0 and generation == self._generation:
+            self._records[record.id] = (record, time.monotonic() + self.ttl)
+        return record
+
+    @staticmethod
+    def _normalize_id(record_id):
+        # 请求体中的id可能是字符串
+        try:
+            return int(record_id)
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, db, record_id):
+        """按id获取记录，db为同步Session，不存在时返回None"""
+        record_id = self._normalize_id(record_id)
+        if record_id is None:
+            return None
+        record = self._lookup(record_id)
+        if record is not None:
+            return record
+        generation = self._generation
+        row = db.query(self.model).filter(self.model.id == record_id).first()
+        return self._store(row, generation) if row else None
+
+    async def aget(self, db, record_id):
+        """按id获取记录，db为AsyncSession，不存在时返回None"""
+        record_id = self._normalize_id(record_id)
+        if record_id is None:
+            return None
+        record = self._lookup(record_id)
+        if record is not None:
+            return record
+        generation = self._generation
+        row = (await db.execute(select(self.model).where(self.model.id == record_id))).scalars().first()
+        return self._store(row, generation) if row else None
+
+    def get_many(self, db, record_ids):
+        """批量获取，返回 {id: record}，未命中的id合并为一次IN查询"""
+        result = {}
+        missing = set()
+        for record_id in set(record_ids):
+            if record_id is None:
+                continue
+            record = self._lookup(record_id)
+            if record is not None:
+                result[record_id] = record
+            else:
+                missing.add(record_id)
+        if missing:
+            generation = self._generation
+            for row in db.query(self.model).filter(self.model.id.in_(missing)).all():
+                result[row.id] = self._store(row, generation)
+        return result
+
+    def name_of(self, db, record_id, default=""):
+        record = self.get(db, record_id)
+        return record.name if record else default
+
+    def invalidate(self, record_id=None):
+        """写接口提交后调用，不传id时清空整个缓存"""
+        self._generation += 1
+        if record_id is None:
+            self._records.clear()
+        else:
+            self._records.pop(self._normalize_id(record_id), None)
+
+    def stats(self):
+        return {"size": len(self._records), "hits": self.hits, "misses": self.misses}
+
+tenants = DimensionCache(models.Tenant, ("id", "name"))
+companies = DimensionCache(models.Company, ("id", "name", "tenant_id"))
+roles = DimensionCache(models.Role, ("id", "name"))
+groups = DimensionCache(models.Group, ("id", "name", "company_id"))
+
+class CountCache:
+    """
+    列表接口总数缓存
+
+    key由 接口名 + 规范化后的过滤条件 + 依赖表当前写版本 组成，
+    写接口调用bump_version后旧key自然不再命中，由LRU淘汰。
+    TTL限制其他worker写入以及按当前时间过滤(如是否过期)带来的数据延迟。
+    分页接口在线程池中查询，读写都加锁。
+    """
+
+    def __init__(self, ttl=None, max_entries=1024):
+        self.ttl = config.COUNT_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries
+        self._totals = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(value):
+        if isinstance(value, (list, tuple, set)):
+            return tuple(sorted(value, key=repr))
+        return value
+
+    def key(self, endpoint, tables, filters):
+        """生成缓存key，需在执行查询之前调用，保证记录的是查询前的表版本"""
+        normalized = tuple(sorted(
+            (name, self._normalize(value)) for name, value in filters.items() if value is not None
+        ))
+        versions = tuple(_table_versions[table] for table in tables)
+        return (endpoint, normalized, versions)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._totals.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._totals.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def set(self, key, total):
+        if total is None or self.ttl <= 0:
+            return
+        with self._lock:
+            self._totals[key] = (total, time.monotonic() + self.ttl)
+            self._totals.move_to_end(key)
+            while len(self._totals) > self.max_entries:
+                self._totals.popitem(last=False)
+
+    def stats(self):
+        return {"size": len(self._totals), "hits": self.hits, "misses": self.misses}
+
+# 表写版本：写接口提交后调用bump_version递增，依赖该表的总数缓存随之失效
+_table_versions = defaultdict(int)
+
+def bump_version(*tables):
+    for table in tables:
+        _table_versions[table] += 1
+
+DIMENSION_CACHES = {
+    "tenants": tenants,
+    "companies": companies,
+    "roles": roles,
+    "groups": groups,
+}
+
+counts = CountCache()
+
+def stats():
+    result = {name: dimension.stats() for name, dimension in DIMENSION_CACHES.items()}
+    result["counts"] = counts.stats()
+    return result
@@ -0,0 +1,158 @@
+import os
+
+# 数据库引擎配置 - 通过环境变量覆盖，未设置时使用所选profile的默认值
+#
+# CES_DB_PROFILE            default | high_throughput
+# CES_DB_URL                数据库地址，默认 sqlite:///./sql_app.db
+# CES_SQLITE_JOURNAL_MODE   DELETE | WAL | ...
+# CES_SQLITE_SYNCHRONOUS    OFF | NORMAL | FULL | EXTRA
+# CES_SQLITE_MMAP_SIZE      内存映射大小(字节)
+# CES_SQLITE_CACHE_SIZE     页缓存，负数表示KiB
+# CES_SQLITE_BUSY_TIMEOUT   锁等待时间(毫秒)
+# CES_SQLITE_TEMP_STORE     DEFAULT | FILE | MEMORY
+# CES_DB_POOL_CLASS         queue | null | static
+# CES_DB_POOL_SIZE          连接池大小 (仅queue)
+# CES_DB_MAX_OVERFLOW       连接池溢出上限 (仅queue)
+# CES_DIMENSION_CACHE_TTL   运营商/局点/角色/营销组缓存有效期(秒)，0表示不缓存
+# CES_COUNT_CACHE_TTL       列表接口总数缓存有效期(秒)，0表示不缓存
+# CES_SQL_REPEAT_THRESHOLD  同一SQL在一个请求中执行超过该次数时记录N+1警告
+# CES_SLOW_QUERY_MS         慢查询阈值(毫秒)，0表示不记录
+# CES_SLOW_QUERY_LOG        慢查询日志文件，按 CES_SLOW_QUERY_LOG_MAX_BYTES 滚动，保留 CES_SLOW_QUERY_LOG_BACKUPS 个
+#
+# 日志配置 (applog.py)
+# CES_LOG_LEVEL             ces.* 日志级别，默认 INFO
+# CES_LOG_FILE              日志文件，为空时输出到stdout；按 CES_LOG_FILE_MAX_BYTES 滚动，保留 CES_LOG_FILE_BACKUPS 个
+# CES_LOG_QUEUE_SIZE        待输出日志队列长度，队列满时丢弃
+# CES_LOG_SAMPLE_RATE       INFO及以下级别日志的采样比例，0-1
+# CES_LOG_RATE_LIMIT        同一条日志每个时间窗口内最多输出的条数，0表示不限制
+# CES_LOG_RATE_INTERVAL     限流时间窗口(秒)
+#
+# 事件循环监控 (loopmonitor.py)
+# CES_LOOP_MONITOR_INTERVAL    调度延迟的测量间隔(秒)，0表示不监控
+# CES_LOOP_BLOCK_THRESHOLD_MS  事件循环阻塞超过该时间时记录调用栈(毫秒)，0表示只测量延迟
+#
+# 管理接口
+# CES_ADMIN_TOKEN           管理接口(/admin/*)的令牌，通过请求头X-Admin-Token传入；为空时管理接口不可用
+# CES_PROFILE_MAX_SECONDS   /admin/profile 单次采样的最长时间(秒)
+#
+# 服务启动配置 (serve.py)
+# CES_HOST / CES_PORT       监听地址和端口，默认 0.0.0.0:8080
+# CES_WORKERS               worker进程数
+# CES_LOOP                  事件循环：auto | uvloop | asyncio
+# CES_HTTP                  HTTP协议实现：auto | httptools | h11
+# CES_BACKLOG               监听队列长度
+# CES_KEEP_ALIVE            keep-alive连接空闲超时(秒)
+# CES_ACCESS_LOG            是否输出访问日志：1 | 0
+
+DB_PROFILES = {
+    # 与之前行为一致：不修改journal模式，只设置锁等待，避免 "database is locked"
+    "default": {
+        "journal_mode": None,
+        "synchronous": None,
+        "mmap_size": None,
+        "cache_size": None,
+        "busy_timeout": 5000,
+        "temp_store": None,
+        "pool_class": None,
+        "pool_size": None,
+        "max_overflow": None,
+    },
+    # 高吞吐：WAL下读写互不阻塞，NORMAL同步在WAL下仍保证一致性，
+    # 256MB内存映射 + 64MB页缓存减少系统调用，临时表放内存
+    "high_throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+        "pool_class": "queue",
+        "pool_size": 20,
+        "max_overflow": 10,
+    },
+}
+
+DB_PROFILE = os.environ.get("CES_DB_PROFILE", "default")
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"未知的数据库配置 CES_DB_PROFILE={DB_PROFILE}，可选: {', '.join(DB_PROFILES)}")
+
+_profile = DB_PROFILES[DB_PROFILE]
+
+def _env(name, key, cast=str):
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return _profile[key]
+    return cast(value)
+
+SQLALCHEMY_DATABASE_URL = os.environ.get("CES_DB_URL", "sqlite:///./sql_app.db")
+
+SQLITE_JOURNAL_MODE = _env("CES_SQLITE_JOURNAL_MODE", "journal_mode")
+SQLITE_SYNCHRONOUS = _env("CES_SQLITE_SYNCHRONOUS", "synchronous")
+SQLITE_MMAP_SIZE = _env("CES_SQLITE_MMAP_SIZE", "mmap_size", int)
+SQLITE_CACHE_SIZE = _env("CES_SQLITE_CACHE_SIZE", "cache_size", int)
+SQLITE_BUSY_TIMEOUT = _env("CES_SQLITE_BUSY_TIMEOUT", "busy_timeout", int)
+SQLITE_TEMP_STORE = _env("CES_SQLITE_TEMP_STORE", "temp_store")
+
+DB_POOL_CLASS = _env("CES_DB_POOL_CLASS", "pool_class")
+DB_POOL_SIZE = _env("CES_DB_POOL_SIZE", "pool_size", int)
+DB_MAX_OVERFLOW = _env("CES_DB_MAX_OVERFLOW", "max_overflow", int)
+
+# 维度表缓存：本进程的写接口会主动失效，TTL用于限制多worker间的数据延迟
+DIMENSION_CACHE_TTL = float(os.environ.get("CES_DIMENSION_CACHE_TTL", "300"))
+# 列表总数缓存：本进程写入通过表版本失效，TTL用于多worker以及按时间过滤的场景
+COUNT_CACHE_TTL = float(os.environ.get("CES_COUNT_CACHE_TTL", "30"))
+
+# 请求级SQL统计：同一条归一化后的SQL执行超过该次数视为N+1查询
+SQL_REPEAT_THRESHOLD = int(os.environ.get("CES_SQL_REPEAT_THRESHOLD", "10"))
+
+# 慢查询日志
+SLOW_QUERY_SECONDS = float(os.environ.get("CES_SLOW_QUERY_MS", "200")) / 1000
+SLOW_QUERY_LOG = os.environ.get("CES_SLOW_QUERY_LOG", "slow_query.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get("CES_SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUP_COUNT = int(os.environ.get("CES_SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# 结构化日志
+LOG_LEVEL = os.environ.get("CES_LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.environ.get("CES_LOG_FILE", "")
+LOG_FILE_MAX_BYTES = int(os.environ.get("CES_LOG_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_FILE_BACKUP_COUNT = int(os.environ.get("CES_LOG_FILE_BACKUPS", "5"))
+LOG_QUEUE_SIZE = int(os.environ.get("CES_LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATE = float(os.environ.get("CES_LOG_SAMPLE_RATE", "1"))
+LOG_RATE_LIMIT = int(os.environ.get("CES_LOG_RATE_LIMIT", "10"))
+LOG_RATE_INTERVAL = float(os.environ.get("CES_LOG_RATE_INTERVAL", "60"))
+
+# 事件循环监控
+LOOP_MONITOR_INTERVAL = float(os.environ.get("CES_LOOP_MONITOR_INTERVAL", "0.5"))
+LOOP_BLOCK_THRESHOLD = float(os.environ.get("CES_LOOP_BLOCK_THRESHOLD_MS", "500")) / 1000
+
+# 管理接口：默认不启用
+ADMIN_TOKEN = os.environ.get("CES_ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.environ.get("CES_PROFILE_MAX_SECONDS", "60"))
+
+# 服务启动配置：auto时uvicorn在已安装uvloop/httptools的情况下自动使用
+SERVER_HOST = os.environ.get("CES_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("CES_PORT", "8080"))
+SERVER_WORKERS = int(os.environ.get("CES_WORKERS", "1"))
+SERVER_LOOP = os.environ.get("CES_LOOP", "auto")
+SERVER_HTTP = os.environ.get("CES_HTTP", "auto")
+SERVER_BACKLOG = int(os.environ.get("CES_BACKLOG", "2048"))
+SERVER_KEEP_ALIVE = int(os.environ.get("CES_KEEP_ALIVE", "5"))
+SERVER_ACCESS_LOG = os.environ.get("CES_ACCESS_LOG", "1") not in ("0", "false")
+
+def sqlite_pragmas():
+    """按顺序返回每个新连接需要执行的PRAGMA语句"""
+    pragmas = []
+    # busy_timeout放在最前，后续切换journal模式时也能等待锁
+    if SQLITE_BUSY_TIMEOUT is not None:
+        pragmas.append(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT)}")
+    if SQLITE_JOURNAL_MODE:
+        pragmas.append(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    if SQLITE_SYNCHRONOUS:
+        pragmas.append(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    if SQLITE_MMAP_SIZE is not None:
+        pragmas.append(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+    if SQLITE_CACHE_SIZE is not None:
+        pragmas.append(f"PRAGMA cache_size={int(SQLITE_CACHE_SIZE)}")
+    if SQLITE_TEMP_STORE:
+        pragmas.append(f"PRAGMA temp_store={SQLITE_TEMP_STORE}")
+    return pragmas
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# 所有测试模块共用一个临时数据库：必须在测试模块导入models之前设置，
+# models只导入一次，不能由各测试模块分别设置；也不使用开发环境中的CES_DB_URL
+os.environ["CES_DB_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
@@ -1,6 +1,7 @@
 import sqlite3
 import datetime
 import random
+import migrations
 from models import engine, SessionLocal, UserAccount, Tenant, Company, Role, Group
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -150,5 +151,7 @@ def create_test_accounts():
         db.close()
 
 if __name__ == "__main__":
+    # 先确保数据库结构为最新版本
+    migrations.upgrade()
     # 初始化测试账号数据
     create_test_accounts() 
\ No newline at end of file
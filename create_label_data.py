@@ -1,12 +1,10 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import models
+import migrations
 import random
 import datetime
 
-# 连接数据库
-engine = create_engine("sqlite:///./sql_app.db", connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 使用models中的数据库连接，数据库地址由CES_DB_URL配置
+SessionLocal = models.SessionLocal
 db = SessionLocal()
 
 # 基础标签列表 (25条)
@@ -164,4 +162,6 @@ def create_labels():
     print(f"成功插入 {inserted_count} 条标签数据")
 
 if __name__ == "__main__":
-    create_labels() 
\ No newline at end of file
+    # 先确保数据库结构为最新版本
+    migrations.upgrade()
+    create_labels()
@@ -1,16 +1,10 @@
 import models
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import migrations
 from datetime import datetime, timedelta
 import random
 
-# 创建数据库连接
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# 创建数据库表
-models.Base.metadata.create_all(bind=engine)
+# 使用models中的数据库连接，数据库地址由CES_DB_URL配置
+SessionLocal = models.SessionLocal
 
 def create_test_data():
     db = SessionLocal()
@@ -87,4 +81,6 @@ def create_test_data():
         db.close()
 
 if __name__ == "__main__":
+    # 先确保数据库结构为最新版本
+    migrations.upgrade()
     create_test_data() 
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+JSON序列化
+
+所有响应统一使用orjson序列化：
+- JSONResponse 替代starlette的JSONResponse(标准库json)，同时作为FastAPI的default_response_class，
+  接口直接返回dict时也经过同一个序列化路径
+- 输出与 json.dumps(ensure_ascii=False, separators=(",", ":")) 一致：UTF-8、紧凑格式；
+  浮点数的指数写法略有差异(1e16 / 1e+16)，对JSON解析没有影响
+- 非字符串的dict key按字符串输出，与标准库行为一致
+"""
+import orjson
+from starlette.responses import JSONResponse as _JSONResponse
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def dumps(content):
+    """序列化为UTF-8编码的bytes"""
+    return orjson.dumps(content, option=OPTIONS)
+
+class JSONResponse(_JSONResponse):
+    def render(self, content):
+        return orjson.dumps(content, option=OPTIONS)
@@ -0,0 +1,304 @@
+"""
+容量测试数据生成器
+
+按 运营商 → 局点 → 网格 → 小区 的层级生成大规模模拟数据，
+同时生成营销组、标签(关联局点)、账号及账号-营销组关联、用户及用户-班组/角色关联。
+
+用法:
+    python generate_dataset.py                                   # 默认规模: 1万局点/100万小区/50万账号
+    python generate_dataset.py --companies 100 --communities 10000 --accounts 5000
+    CES_DB_URL=sqlite:///./capacity.db python generate_dataset.py
+
+- 数据追加到现有数据库，主键从各表当前最大id之后开始分配
+- 使用Core批量insert (executemany)，每张表一个事务
+- 导入期间暂停全文索引触发器，导入完成后整体重建，最后执行ANALYZE
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.pool import NullPool
+
+import config
+import models
+import migrations
+import search
+
+OPERATORS = ["联通", "电信", "移动", "广电"]
+CITIES = [
+    "北京", "上海", "广州", "深圳", "天津", "重庆", "成都", "杭州", "武汉", "西安",
+    "南京", "苏州", "郑州", "长沙", "沈阳", "青岛", "济南", "合肥", "福州", "厦门",
+    "昆明", "南宁", "贵阳", "南昌", "太原", "石家庄", "哈尔滨", "长春", "兰州", "乌鲁木齐"
+]
+DISTRICTS = ["朝阳区", "海淀区", "东城区", "西城区", "新城区", "高新区", "开发区", "经济区", "江北区", "城南区"]
+COMMUNITY_NAMES = [
+    "和平小区", "幸福家园", "阳光花园", "翠竹苑", "金色家园", "未来城", "绿洲花园", "碧水云天",
+    "紫荆苑", "蓝山小区", "梦想家园", "康乐居", "汇景苑", "华府名邸", "锦绣园", "御景华庭",
+    "丽景花园", "凤凰城", "水岸新都", "江南新苑", "星河湾", "帝景豪园", "珠江花园", "山水名苑"
+]
+LABEL_NAMES = [
+    "忠诚客户", "高价值客户", "流失风险客户", "新注册客户", "5G套餐客户", "商务客户",
+    "家庭宽带客户", "校园客户", "老年客户", "政企客户", "小微企业客户", "预付费客户"
+]
+ACCOUNT_PREFIXES = [("admin", "管理员"), ("operator", "运营"), ("sales", "销售"), ("service", "客服"), ("tech", "技术")]
+OPERATOR_NAMES = ["管理员", "操作员", "超级管理员", "系统"]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="生成容量测试数据")
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--companies", type=int, default=10000)
+    parser.add_argument("--grids-per-company", type=int, default=10)
+    parser.add_argument("--communities", type=int, default=1000000)
+    parser.add_argument("--groups-per-company", type=int, default=2)
+    parser.add_argument("--labels", type=int, default=2000)
+    parser.add_argument("--roles", type=int, default=10, help="角色表为空时创建的角色数")
+    parser.add_argument("--accounts", type=int, default=500000)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=50000, help="每次executemany的行数")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+def next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+def bulk_insert(conn, model, rows, batch_size):
+    """按批次executemany插入，rows可以是生成器，避免一次性在内存中构造全部数据"""
+    statement = insert(model)
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.execute(statement, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(statement, batch)
+        count += len(batch)
+    return count
+
+def random_time(now, max_days):
+    return now - timedelta(days=random.randint(0, max_days), seconds=random.randint(0, 86399))
+
+class DatasetGenerator:
+    def __init__(self, args):
+        self.args = args
+        self.now = datetime.now()
+        # 生成过程中记录的层级关系，后续的表按id直接引用，不再回查数据库
+        self.tenant_ids = []
+        self.company_tenants = {}
+        self.grid_ids = []
+        self.company_groups = {}
+        self.role_ids = []
+        self.account_companies = []
+        self.user_companies = []
+
+    def run_step(self, conn, name, model, rows):
+        start = time.perf_counter()
+        count = bulk_insert(conn, model, rows, self.args.batch_size)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {count} 条, 耗时 {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} 条/秒)")
+
+    def tenant_rows(self, first_id):
+        for tenant_id in range(first_id, first_id + self.args.tenants):
+            self.tenant_ids.append(tenant_id)
+            yield {"id": tenant_id, "name": f"{OPERATORS[tenant_id % len(OPERATORS)]}{tenant_id}"}
+
+    def company_rows(self, first_id):
+        for company_id in range(first_id, first_id + self.args.companies):
+            tenant_id = random.choice(self.tenant_ids)
+            self.company_tenants[company_id] = tenant_id
+            city = CITIES[company_id % len(CITIES)]
+            yield {"id": company_id, "name": f"{city}第{company_id}分公司", "tenant_id": tenant_id}
+
+    def grid_rows(self, first_id):
+        grid_id = first_id
+        for company_id in self.company_tenants:
+            for index in range(self.args.grids_per_company):
+                self.grid_ids.append(grid_id)
+                yield {
+                    "id": grid_id,
+                    "name": f"{DISTRICTS[index % len(DISTRICTS)]}{company_id}-{index + 1}网格",
+                    "company_id": company_id
+                }
+                grid_id += 1
+
+    def community_rows(self, first_id):
+        for community_id in range(first_id, first_id + self.args.communities):
+            create_time = random_time(self.now, 730)
+            yield {
+                "id": community_id,
+                "name": f"{random.choice(COMMUNITY_NAMES)}{community_id}",
+                "grid_id": random.choice(self.grid_ids),
+                "create_time": create_time,
+                "update_time": create_time + timedelta(days=random.randint(0, 30)),
+                "operator_name": random.choice(OPERATOR_NAMES)
+            }
+
+    def group_rows(self, first_id):
+        group_id = first_id
+        for company_id in self.company_tenants:
+            groups = self.company_groups.setdefault(company_id, [])
+            for index in range(self.args.groups_per_company):
+                groups.append(group_id)
+                create_time = random_time(self.now, 365)
+                yield {
+                    "id": group_id,
+                    "name": f"营销{company_id}-{index + 1}组",
+                    "description": "容量测试数据",
+                    "company_id": company_id,
+                    "create_time": create_time,
+                    "update_time": create_time,
+                    "operator_name": random.choice(OPERATOR_NAMES)
+                }
+                group_id += 1
+
+    def role_rows(self, first_id):
+        for role_id in range(first_id, first_id + self.args.roles):
+            self.role_ids.append(role_id)
+            yield {"id": role_id, "name": f"角色{role_id}", "description": "容量测试数据"}
+
+    def label_rows(self, first_id):
+        for label_id in range(first_id, first_id + self.args.labels):
+            yield {
+                "id": label_id,
+                "name": f"{random.choice(LABEL_NAMES)}{label_id}",
+                "type": random.choice([1, 2]),
+                "create_time": random_time(self.now, 365),
+                "operator_name": random.choice(OPERATOR_NAMES)
+            }
+
+    def label_company_rows(self, first_label_id):
+        company_ids = list(self.company_tenants)
+        for label_id in range(first_label_id, first_label_id + self.args.labels):
+            for company_id in random.sample(company_ids, min(len(company_ids), random.randint(1, 5))):
+                yield {"label_id": label_id, "company_id": company_id}
+
+    def account_rows(self, first_id):
+        company_ids = list(self.company_tenants)
+        for account_id in range(first_id, first_id + self.args.accounts):
+            company_id = random.choice(company_ids)
+            self.account_companies.append(company_id)
+            groups = self.company_groups.get(company_id) or [None]
+            prefix, name_prefix = random.choice(ACCOUNT_PREFIXES)
+            expire_date = None
+            if random.random() < 0.8:
+                expire_date = self.now + timedelta(days=random.randint(-90, 365))
+            create_time = random_time(self.now, 365)
+            yield {
+                "id": account_id,
+                "account": f"{prefix}_{account_id}",
+                "name": f"{name_prefix}{account_id}",
+                "password": "123456",
+                "tenant_id": self.company_tenants[company_id],
+                "company_id": company_id,
+                "group_id": groups[0],
+                "role_id": random.choice(self.role_ids),
+                "is_enabled": 1 if random.random() < 0.8 else 0,
+                "expire_date": expire_date,
+                "create_time": create_time,
+                "update_time": create_time + timedelta(days=random.randint(0, 30)),
+                "creator": random.choice(["system", "admin", "supervisor"])
+            }
+
+    def account_group_rows(self, first_account_id):
+        # 每个账号加入所属局点下的1-N个营销组
+        for offset, company_id in enumerate(self.account_companies):
+            groups = self.company_groups.get(company_id)
+            if not groups:
+                continue
+            for group_id in random.sample(groups, random.randint(1, len(groups))):
+                yield {"account_id": first_account_id + offset, "group_id": group_id}
+
+    def user_rows(self, first_id):
+        company_ids = list(self.company_tenants)
+        for user_id in range(first_id, first_id + self.args.users):
+            company_id = random.choice(company_ids)
+            self.user_companies.append(company_id)
+            create_time = random_time(self.now, 365)
+            yield {
+                "id": user_id,
+                "username": f"user_{user_id}",
+                "name": f"用户{user_id}",
+                "status": 1 if random.random() < 0.8 else 0,
+                "effective_day": (self.now + timedelta(days=random.randint(-90, 365))).strftime("%Y-%m-%d"),
+                "expire": random.choice([1, 2]),
+                "tenant_id": self.company_tenants[company_id],
+                "company_id": company_id,
+                "create_time": create_time,
+                "update_time": create_time,
+                "operator_name": random.choice(OPERATOR_NAMES)
+            }
+
+    def user_group_rows(self, first_user_id):
+        for offset, company_id in enumerate(self.user_companies):
+            for group_id in self.company_groups.get(company_id, [])[:random.randint(0, 2)]:
+                yield {"user_id": first_user_id + offset, "group_id": group_id}
+
+    def user_role_rows(self, first_user_id):
+        for offset in range(len(self.user_companies)):
+            yield {"user_id": first_user_id + offset, "role_id": random.choice(self.role_ids)}
+
+    def generate(self, engine):
+        random.seed(self.args.seed)
+        start = time.perf_counter()
+        # 使用不复用连接的engine：下面的PRAGMA只对这个连接生效，连接关闭后失效，不会带回应用的连接池
+        engine = create_engine(engine.url, poolclass=NullPool)
+        try:
+            with engine.connect() as conn:
+                for pragma in config.sqlite_pragmas():
+                    conn.exec_driver_sql(pragma)
+                # 导入期间不等待fsync，加大页缓存
+                conn.exec_driver_sql("PRAGMA synchronous=OFF")
+                conn.exec_driver_sql("PRAGMA cache_size=-262144")
+                conn.exec_driver_sql("PRAGMA temp_store=MEMORY")
+
+                fulltext_tables = search.drop_fulltext_triggers(conn)
+                conn.commit()
+
+                try:
+                    self.run_step(conn, "运营商", models.Tenant, self.tenant_rows(next_id(conn, models.Tenant)))
+                    self.run_step(conn, "局点", models.Company, self.company_rows(next_id(conn, models.Company)))
+                    self.run_step(conn, "网格", models.Grid, self.grid_rows(next_id(conn, models.Grid)))
+                    self.run_step(conn, "小区", models.Community, self.community_rows(next_id(conn, models.Community)))
+                    self.run_step(conn, "营销组", models.Group, self.group_rows(next_id(conn, models.Group)))
+
+                    self.role_ids = list(conn.execute(select(models.Role.id)).scalars())
+                    if not self.role_ids:
+                        self.run_step(conn, "角色", models.Role, self.role_rows(next_id(conn, models.Role)))
+
+                    first_label_id = next_id(conn, models.Label)
+                    self.run_step(conn, "标签", models.Label, self.label_rows(first_label_id))
+                    self.run_step(conn, "标签-局点关联", models.LabelCompany, self.label_company_rows(first_label_id))
+
+                    first_account_id = next_id(conn, models.UserAccount)
+                    self.run_step(conn, "账号", models.UserAccount, self.account_rows(first_account_id))
+                    self.run_step(conn, "账号-营销组关联", models.AccountGroup, self.account_group_rows(first_account_id))
+
+                    first_user_id = next_id(conn, models.User)
+                    self.run_step(conn, "用户", models.User, self.user_rows(first_user_id))
+                    self.run_step(conn, "用户-班组关联", models.user_groups, self.user_group_rows(first_user_id))
+                    self.run_step(conn, "用户-角色关联", models.user_roles, self.user_role_rows(first_user_id))
+                finally:
+                    # 导入失败或中断时也要重建全文索引并恢复同步触发器，否则之后的写入不再同步全文索引
+                    conn.rollback()
+                    index_start = time.perf_counter()
+                    search.rebuild_fulltext_indexes(conn, fulltext_tables)
+                    conn.commit()
+                conn.exec_driver_sql("ANALYZE")
+                conn.commit()
+                print(f"重建全文索引并ANALYZE: 耗时 {time.perf_counter() - index_start:.1f}s")
+        finally:
+            engine.dispose()
+        print(f"数据生成完成，总耗时 {time.perf_counter() - start:.1f}s")
+
+def main(argv=None):
+    args = parse_args(argv)
+    migrations.upgrade()
+    DatasetGenerator(args).generate(models.engine)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+事件循环延迟监控
+
+- 事件循环中的测量协程每 CES_LOOP_MONITOR_INTERVAL 秒sleep一次，实际唤醒时间比预期晚的部分即调度延迟，
+  记录到 /metrics 的 ces_event_loop_lag_seconds
+- 独立的看门狗线程检查测量协程的心跳，事件循环被阻塞超过 CES_LOOP_BLOCK_THRESHOLD_MS 时，
+  在阻塞期间抓取事件循环线程的调用栈，连同正在处理的路由记录到 ces.loop 日志，
+  并按路由计入 ces_event_loop_blocked_total；同一次阻塞只记录一次
+- 路由取自事件循环当前运行的任务在 metrics.active_scopes 中登记的scope，看门狗线程只读字典，
+  不读取事件循环线程的栈帧局部变量；路由尚未匹配时为 unmatched，不在请求中时为 unknown
+
+async def 接口中的同步数据库操作会阻塞事件循环，日志中的调用栈指向具体的阻塞位置。
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+import config
+import metrics
+
+logger = logging.getLogger("ces.loop")
+
+_task = None
+_watchdog = None
+_stop = threading.Event()
+_heartbeat = 0.0
+
+def _current_route(loop):
+    """事件循环当前运行的任务所处理的路由，使用固定标签避免按原始路径产生无限多的取值"""
+    scope = metrics.active_scopes.get(asyncio.current_task(loop))
+    if scope is None:
+        return "unknown"
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return f"{scope['method']} {route.path}"
+
+async def _measure(interval):
+    global _heartbeat
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        _heartbeat = time.monotonic()
+        metrics.observe_loop_lag(max(loop.time() - start - interval, 0.0))
+
+def _watch(loop, loop_thread_id, interval, threshold):
+    reported = None
+    while not _stop.wait(min(threshold / 2, 0.1)):
+        heartbeat = _heartbeat
+        blocked = time.monotonic() - heartbeat - interval
+        if blocked < threshold or heartbeat == reported:
+            continue
+        reported = heartbeat
+        frame = sys._current_frames().get(loop_thread_id)
+        if frame is None:
+            continue
+        route = _current_route(loop)
+        stack = "".join(traceback.format_stack(frame))
+        del frame
+        metrics.loop_blocked[route] += 1
+        logger.warning(
+            "事件循环已阻塞 %.0fms，route=%s", blocked * 1000, route,
+            extra={"blocked_ms": round(blocked * 1000), "route": route, "stack": stack}
+        )
+
+def start():
+    """在事件循环中调用：启动测量协程和看门狗线程"""
+    global _task, _watchdog, _heartbeat
+    if _task is not None or config.LOOP_MONITOR_INTERVAL <= 0:
+        return
+    interval = config.LOOP_MONITOR_INTERVAL
+    _heartbeat = time.monotonic()
+    _stop.clear()
+    loop = asyncio.get_running_loop()
+    _task = loop.create_task(_measure(interval))
+    if config.LOOP_BLOCK_THRESHOLD > 0:
+        _watchdog = threading.Thread(
+            target=_watch,
+            args=(loop, threading.get_ident(), interval, config.LOOP_BLOCK_THRESHOLD),
+            name="ces-loop-watchdog",
+            daemon=True
+        )
+        _watchdog.start()
+
+def stop():
+    global _task, _watchdog
+    _stop.set()
+    if _task is not None:
+        _task.cancel()
+        _task = None
+    if _watchdog is not None:
+        _watchdog.join()
+        _watchdog = None
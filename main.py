@@ -1,19 +1,40 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.responses import PlainTextResponse, JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 import models
 import utils
+import pagination
+import cache
+import search
+import migrations
+import sqlstats
+import metrics
+import slowlog
+import applog
+import profiler
+import loopmonitor
+import fastjson
+import requestbody
+from requestbody import RequestBody, PageRequest, IdFilter, IdList, RefId, RefIdList, Text, WithTotal
+from fastjson import JSONResponse
+import config
 from pydantic import BaseModel, Field
 import jwt
 from typing import Optional, List, Union, Any, Dict
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import or_
-import math
-import random
+from sqlalchemy import or_, select, delete
+import hmac
+import logging
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 
-app = FastAPI()
+logger = logging.getLogger("ces.api")
+
+# 所有响应(包括直接返回dict的接口)都使用orjson序列化
+app = FastAPI(default_response_class=JSONResponse)
 
 # 添加CORS中间件
 app.add_middleware(
@@ -24,18 +45,146 @@ app.add_middleware(
     allow_headers=["*"],  # 允许所有头
 )
 
+# 每个请求的SQL条数和数据库耗时，通过 X-SQL-Count / X-SQL-Time-Ms 响应头返回
+app.add_middleware(sqlstats.SQLStatsMiddleware)
+sqlstats.install(models.engine, models.async_engine.sync_engine)
+# 请求数/延迟/业务码等指标，通过 /metrics 以Prometheus文本格式暴露
+app.add_middleware(metrics.MetricsMiddleware)
+# 最外层：为每个请求分配request_id，内层中间件和接口的日志都带上该id
+app.add_middleware(applog.RequestIdMiddleware)
+
+@app.on_event("startup")
+def setup_logging():
+    applog.setup()
+
+@app.on_event("startup")
+def check_database():
+    # 数据库结构通过 python migrations.py 单独升级，启动时只检查版本
+    migrations.check_version()
+    search.load_fulltext_indexes(models.engine)
+
+@app.on_event("startup")
+def install_pool_metrics():
+    # 监听器注册在engine上，engine.dispose()重建连接池后仍然有效，重复启动时不重复注册
+    metrics.install_pool_events("sync", models.engine)
+    metrics.install_pool_events("async", models.async_engine.sync_engine)
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    # 需要在事件循环中启动，记录事件循环所在的线程
+    loopmonitor.start()
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    loopmonitor.stop()
+    # 关闭连接池，aiosqlite的连接线程不关闭会阻止进程退出
+    await models.async_engine.dispose()
+    models.engine.dispose()
+    # 等待慢查询日志和结构化日志写完
+    slowlog.stop()
+    applog.stop()
+
 @app.get("/")
 async def root():
     return PlainTextResponse("Server is Running")
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+def check_admin_token(request: Request):
+    """管理接口鉴权，通过时返回None，否则返回错误响应；未配置CES_ADMIN_TOKEN时管理接口不可用"""
+    if not config.ADMIN_TOKEN:
+        return JSONResponse(content={"code": "A0001", "msg": "管理接口未启用，请配置CES_ADMIN_TOKEN", "data": {}})
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        return JSONResponse(content={"code": "A0001", "msg": "管理令牌错误", "data": {}})
+    return None
+
+# 采样性能分析：返回collapsed stack文本，可直接生成火焰图
+@app.get("/admin/profile", include_in_schema=False)
+async def admin_profile(request: Request, seconds: float = 10, interval: float = 0.005, idle: bool = False):
+    error = check_admin_token(request)
+    if error is not None:
+        return error
+    if not 0 < seconds <= config.PROFILE_MAX_SECONDS or not 0.001 <= interval <= 1:
+        return JSONResponse(content={
+            "code": "A0001",
+            "msg": f"参数错误: seconds取值(0, {config.PROFILE_MAX_SECONDS}]，interval取值[0.001, 1]",
+            "data": {}
+        })
+    try:
+        # 采样线程占用线程池中的一个线程，事件循环继续处理请求(也就是被分析的负载)
+        stacks, samples = await run_in_threadpool(profiler.sample, seconds, interval, idle)
+    except profiler.ProfilerBusy:
+        return JSONResponse(content={"code": "A0001", "msg": "已有性能分析任务在运行", "data": {}})
+    return PlainTextResponse(profiler.collapsed(stacks), headers={"X-Profile-Samples": str(samples)})
+
 # 依赖项
 def get_db():
     db = models.SessionLocal()
     try:
+        metrics.checkout("sync", db)
         yield db
     finally:
         db.close()
 
+# 异步依赖项 - 数据库IO不阻塞事件循环
+async def get_async_db():
+    async with models.AsyncSessionLocal() as db:
+        await metrics.checkout_async("async", db)
+        yield db
+
+def _encode_next_batch(batches, to_record):
+    """读取并序列化下一批记录，返回 (JSON片段, 条数)，没有更多记录时条数为0"""
+    batch = next(batches, None)
+    if batch is None:
+        return b"", 0
+    return b",".join(fastjson.dumps(to_record(row)) for row in batch), len(batch)
+
+def stream_all_records(query, key_column, to_record, count_key):
+    """
+    不分页(pageNo和pageSize都为0)时流式返回全部记录，在线程池中调用
+
+    响应格式与分页时相同，记录按批读取、序列化后立即输出，total/size在全部记录之后输出，
+    内存占用与总条数无关。之后各批的读取和序列化同样在线程池中执行，不阻塞事件循环。
+    使用独立的Session，生命周期跟随响应输出，而不是请求依赖：由响应的后台任务关闭，
+    响应体输出完成、客户端断开或响应体没有被读取时都会执行。
+    第一批在返回响应之前读取，查询出错时接口仍返回A0500；开始输出之后出错只能中断响应。
+    """
+    db = models.SessionLocal()
+    try:
+        batches = pagination.iter_all(query.with_session(db), key_column)
+        chunk, count = _encode_next_batch(batches, to_record)
+    except Exception:
+        db.close()
+        raise
+
+    async def body():
+        nonlocal chunk, count
+        total = 0
+        try:
+            yield '{"code":"00000","msg":"成功","data":{"records":['.encode()
+            while count:
+                yield (b"," if total else b"") + chunk
+                total += count
+                chunk, count = await run_in_threadpool(_encode_next_batch, batches, to_record)
+        except Exception:
+            logger.exception("不分页查询输出中断")
+            raise
+        cache.counts.set(count_key, total)
+        yield f'],"total":{total},"size":{total},"current":1,"pages":1,"nextCursor":null}}}}'.encode()
+
+    return StreamingResponse(body(), media_type="application/json", background=BackgroundTask(db.close))
+
+def body_error_response(error, data=None):
+    """请求体解析失败(requestbody.BodyError)时的响应"""
+    return JSONResponse(content={
+        "code": "A0001",
+        "msg": str(error),
+        "data": {} if data is None else data
+    })
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Pydantic模型
@@ -76,12 +225,14 @@ class CompanyListResponse(BaseModel):
     msg: str
     data: List[CompanyItem]
 
+# 局点列表请求模型
+class CompanyListRequest(RequestBody):
+    tenantId: IdFilter = None
+
 # 定义分页查询请求模型
-class CompanyPageRequest(BaseModel):
-    companyName: Optional[str] = ""
-    pageNo: Optional[int] = 0  
-    pageSize: Optional[int] = 0  
-    tenantId: Optional[int] = None
+class CompanyPageRequest(PageRequest):
+    companyName: Text = ""
+    tenantId: IdFilter = None
 
 # 定义分页查询结果项模型
 class CompanyDetailItem(BaseModel):
@@ -109,10 +260,11 @@ class CompanyPageResponse(BaseModel):
     data: PageData
 
 # 定义新增局点请求模型
-class CompanyAddRequest(BaseModel):
-    name: str
-    description: Optional[str] = ""
-    tenantId: int
+class CompanyAddRequest(RequestBody):
+    name: Text = None
+    # 不存储，原样返回
+    description: Any = ""
+    tenantId: RefId = None
 
 # 定义新增局点响应模型
 class CompanyAddResponse(BaseModel):
@@ -121,11 +273,12 @@ class CompanyAddResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义修改局点请求模型
-class CompanyModifyRequest(BaseModel):
-    id: int
-    name: Optional[str] = None
-    description: Optional[str] = None
-    tenantId: Optional[int] = None
+class CompanyModifyRequest(RequestBody):
+    id: RefId = None
+    name: Text = None
+    # 不存储，原样返回
+    description: Any = None
+    tenantId: RefId = None
 
 # 定义修改局点响应模型
 class CompanyModifyResponse(BaseModel):
@@ -144,12 +297,22 @@ class GridItem(BaseModel):
     id: int
     name: str
 
+# 网格列表请求模型
+class GridListRequest(RequestBody):
+    companyId: IdFilter = None
+
 # 网格列表响应模型
 class GridListResponse(BaseModel):
     code: str
     msg: str
     data: List[GridItem]
 
+# 定义网格分页查询请求模型
+class GridPageRequest(PageRequest):
+    companyId: IdFilter = None
+    name: Text = ""
+    tenantId: IdFilter = None
+
 # 定义网格分页查询结果项模型
 class GridDetailItem(BaseModel):
     id: int
@@ -176,6 +339,13 @@ class GridPageResponse(BaseModel):
     msg: str
     data: GridPageData
 
+# 定义小区分页查询请求模型
+class CommunityPageRequest(PageRequest):
+    companyId: IdFilter = None
+    gridId: IdFilter = None
+    name: Text = ""
+    tenantId: IdFilter = None
+
 # 定义小区详情项模型
 class CommunityDetailItem(BaseModel):
     id: int
@@ -205,9 +375,9 @@ class CommunityPageResponse(BaseModel):
     data: CommunityPageData
 
 # 定义新增小区请求模型
-class CommunityAddRequest(BaseModel):
-    gridId: int
-    name: str
+class CommunityAddRequest(RequestBody):
+    gridId: RefId = None
+    name: Text = None
 
 # 定义新增小区响应模型
 class CommunityAddResponse(BaseModel):
@@ -216,10 +386,10 @@ class CommunityAddResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义修改小区请求模型
-class CommunityModifyRequest(BaseModel):
-    id: int
-    gridId: Optional[int] = None
-    name: Optional[str] = None
+class CommunityModifyRequest(RequestBody):
+    id: RefId = None
+    gridId: RefId = None
+    name: Text = None
 
 # 定义修改小区响应模型
 class CommunityModifyResponse(BaseModel):
@@ -234,9 +404,9 @@ class CommunityDeleteResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义新增网格请求模型
-class GridAddRequest(BaseModel):
-    companyId: int
-    name: str
+class GridAddRequest(RequestBody):
+    companyId: RefId = None
+    name: Text = None
 
 # 定义新增网格响应模型
 class GridAddResponse(BaseModel):
@@ -245,10 +415,10 @@ class GridAddResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义修改网格请求模型
-class GridModifyRequest(BaseModel):
-    id: int
-    companyId: Optional[int] = None
-    name: Optional[str] = None
+class GridModifyRequest(RequestBody):
+    id: RefId = None
+    companyId: RefId = None
+    name: Text = None
 
 # 定义修改网格响应模型
 class GridModifyResponse(BaseModel):
@@ -262,6 +432,12 @@ class GridDeleteResponse(BaseModel):
     msg: str
     data: Optional[Dict] = {}
 
+# 定义营销组分页查询请求模型
+class GroupPageRequest(PageRequest):
+    companyId: IdFilter = None
+    name: Text = ""
+    tenantId: IdFilter = None
+
 # 定义营销组详情项模型
 class GroupDetailItem(BaseModel):
     id: int
@@ -290,10 +466,10 @@ class GroupPageResponse(BaseModel):
     data: GroupPageData
 
 # 定义新增营销组请求模型
-class GroupAddRequest(BaseModel):
-    companyId: int
-    name: str
-    description: Optional[str] = ""
+class GroupAddRequest(RequestBody):
+    companyId: RefId = None
+    name: Text = None
+    description: Text = ""
 
 # 定义新增营销组响应模型
 class GroupAddResponse(BaseModel):
@@ -302,11 +478,11 @@ class GroupAddResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义修改营销组请求模型
-class GroupModifyRequest(BaseModel):
-    id: int
-    companyId: Optional[int] = None
-    name: Optional[str] = None
-    description: Optional[str] = None
+class GroupModifyRequest(RequestBody):
+    id: RefId = None
+    companyId: RefId = None
+    name: Text = None
+    description: Text = None
 
 # 定义修改营销组响应模型
 class GroupModifyResponse(BaseModel):
@@ -366,15 +542,13 @@ class RolePageResponse(BaseModel):
     data: RolePageData
 
 # 定义角色分页查询请求模型
-class RolePageRequest(BaseModel):
-    name: Optional[str] = ""
-    pageNo: Optional[int] = 0  
-    pageSize: Optional[int] = 0  
+class RolePageRequest(PageRequest):
+    name: Text = ""
 
 # 定义新增角色请求模型
-class RoleAddRequest(BaseModel):
-    name: str
-    description: Optional[str] = ""
+class RoleAddRequest(RequestBody):
+    name: Text = ""
+    description: Text = ""
 
 # 定义新增角色响应模型
 class RoleAddResponse(BaseModel):
@@ -383,10 +557,10 @@ class RoleAddResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义修改角色请求模型
-class RoleModifyRequest(BaseModel):
-    id: int
-    name: Optional[str] = None
-    description: Optional[str] = None
+class RoleModifyRequest(RequestBody):
+    id: RefId = None
+    name: Text = None
+    description: Text = None
 
 # 定义修改角色响应模型
 class RoleModifyResponse(BaseModel):
@@ -430,17 +604,16 @@ class LabelPageResponse(BaseModel):
     data: LabelPageData
 
 # 定义标签分页查询请求模型
-class LabelPageRequest(BaseModel):
-    companyId: Optional[int] = 0
-    name: Optional[str] = ""
-    pageNo: Optional[int] = 0  
-    pageSize: Optional[int] = 0  
-    type: Optional[int] = 0
+class LabelPageRequest(PageRequest):
+    companyId: IdFilter = None
+    name: Text = ""
+    type: IdFilter = None
 
 # 定义新增标签请求模型
-class LabelAddRequest(BaseModel):
-    name: str
-    type: int
+class LabelAddRequest(RequestBody):
+    name: Text = ""
+    # 由接口按LABEL_TYPE校验
+    type: Any = 0
 
 # 定义新增标签响应模型
 class LabelAddResponse(BaseModel):
@@ -449,10 +622,11 @@ class LabelAddResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义修改标签请求模型
-class LabelModifyRequest(BaseModel):
-    id: int
-    name: Optional[str] = None
-    type: Optional[int] = None
+class LabelModifyRequest(RequestBody):
+    id: RefId = None
+    name: Text = None
+    # 由接口按LABEL_TYPE校验，无效时不修改
+    type: Any = None
 
 # 定义修改标签响应模型
 class LabelModifyResponse(BaseModel):
@@ -467,9 +641,9 @@ class LabelDeleteResponse(BaseModel):
     data: Optional[Dict] = {}
 
 # 定义配置标签局点请求模型
-class LabelConfigureRequest(BaseModel):
-    id: int
-    companyList: List[int]
+class LabelConfigureRequest(RequestBody):
+    id: RefId = None
+    companyList: RefIdList = Field(default_factory=list)
 
 # 定义配置标签局点响应模型
 class LabelConfigureResponse(BaseModel):
@@ -493,6 +667,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db_user = models.User(username=user.username, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
+    cache.bump_version("users")
     db.refresh(db_user)
 
     # 创建访问令牌
@@ -528,7 +703,7 @@ async def login(request: LoginRequest):
 
 # 运营商列表查询接口
 @app.post("/ces/tenant/list", response_model=TenantListResponse)
-async def tenant_list(db: Session = Depends(get_db)):
+async def tenant_list(db: AsyncSession = Depends(get_async_db)):
     """
     查询运营商列表
     
@@ -536,7 +711,7 @@ async def tenant_list(db: Session = Depends(get_db)):
     """
     try:
         # 从数据库查询租户信息
-        tenants = db.query(models.Tenant).all()
+        tenants = (await db.execute(select(models.Tenant))).scalars().all()
         
         # 构建响应数据
         result = [{"id": tenant.id, "name": tenant.name} for tenant in tenants]
@@ -548,13 +723,8 @@ async def tenant_list(db: Session = Depends(get_db)):
         )
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("tenant_list 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in tenant_list: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return TenantListResponse(
@@ -565,7 +735,7 @@ async def tenant_list(db: Session = Depends(get_db)):
 
 # 公司/局点列表查询接口 - POST方法，直接处理原始请求
 @app.post("/ces/company/list")
-async def company_list(request: Request, db: Session = Depends(get_db)):
+async def company_list(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     获取局点列表，支持按租户ID筛选
     - 如果不传递租户ID或传空字符串，则返回所有局点
@@ -576,43 +746,21 @@ async def company_list(request: Request, db: Session = Depends(get_db)):
         "tenantId": "" 或 "0" 或 1 或 "1"
     }
     """
-    # 手动解析请求体，避免FastAPI的验证
+    # 没有请求体或请求体格式错误时不筛选
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 如果存在请求体，则解析JSON
-        if body_bytes:
-            import json
-            try:
-                body = json.loads(body_bytes)
-                tenant_id_raw = body.get("tenantId", None)
-            except json.JSONDecodeError:
-                # JSON解析失败
-                tenant_id_raw = None
-        else:
-            # 没有请求体
-            tenant_id_raw = None
-    except Exception:
-        # 任何错误都默认为不筛选
-        tenant_id_raw = None
+        body = await requestbody.parse(request, CompanyListRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e, [])
     
     # 构建查询
-    query = db.query(models.Company)
+    query = select(models.Company).order_by(models.Company.id)
     
-    # 根据tenantId筛选
-    # 只有当tenantId不为None、空字符串、"0"或0时才筛选
-    if tenant_id_raw not in [None, "", "0", 0]:
-        try:
-            # 尝试转换为整数
-            tenant_id = int(tenant_id_raw)
-            query = query.filter(models.Company.tenant_id == tenant_id)
-        except (ValueError, TypeError):
-            # 转换失败，返回所有局点
-            pass
+    # 根据tenantId筛选：None、空字符串、"0"、0时不筛选
+    if body.tenantId is not None:
+        query = query.where(models.Company.tenant_id == body.tenantId)
     
     # 执行查询
-    companies = query.all()
+    companies = (await db.execute(query)).scalars().all()
     
     # 构建响应
     result = [{"id": company.id, "name": company.name} for company in companies]
@@ -626,26 +774,26 @@ async def company_list(request: Request, db: Session = Depends(get_db)):
 
 # 公司/局点列表查询接口 - GET方法，支持路径参数
 @app.get("/ces/company/list/{tenant_id}", response_model=CompanyListResponse)
-async def company_list_by_path(tenant_id: str = "0", db: Session = Depends(get_db)):
+async def company_list_by_path(tenant_id: str = "0", db: AsyncSession = Depends(get_async_db)):
     """
     通过路径参数获取局点列表
     例如：/ces/company/list/1 获取租户ID为1的局点
          /ces/company/list/0 获取所有局点
     """
     # 构建查询
-    query = db.query(models.Company)
+    query = select(models.Company).order_by(models.Company.id)
     
     # 根据tenant_id筛选
     if tenant_id not in ["0", ""]:
         try:
             tid = int(tenant_id)
-            query = query.filter(models.Company.tenant_id == tid)
+            query = query.where(models.Company.tenant_id == tid)
         except (ValueError, TypeError):
             # 无效的ID，返回所有结果
             pass
     
     # 执行查询
-    companies = query.all()
+    companies = (await db.execute(query)).scalars().all()
     
     # 构建响应
     result = [{"id": company.id, "name": company.name} for company in companies]
@@ -658,26 +806,26 @@ async def company_list_by_path(tenant_id: str = "0", db: Session = Depends(get_d
 
 # 公司/局点列表查询接口 - GET方法，支持查询参数
 @app.get("/ces/company/list", response_model=CompanyListResponse)
-async def company_list_by_query(tenant_id: Optional[str] = None, db: Session = Depends(get_db)):
+async def company_list_by_query(tenant_id: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     """
     通过查询参数获取局点列表
     例如：/ces/company/list?tenant_id=1 获取租户ID为1的局点
          /ces/company/list 获取所有局点
     """
     # 构建查询
-    query = db.query(models.Company)
+    query = select(models.Company).order_by(models.Company.id)
     
     # 根据tenant_id筛选
     if tenant_id not in [None, "", "0"]:
         try:
             tid = int(tenant_id)
-            query = query.filter(models.Company.tenant_id == tid)
+            query = query.where(models.Company.tenant_id == tid)
         except (ValueError, TypeError):
             # 无效的ID，返回所有结果
             pass
     
     # 执行查询
-    companies = query.all()
+    companies = (await db.execute(query)).scalars().all()
     
     # 构建响应
     result = [{"id": company.id, "name": company.name} for company in companies]
@@ -702,92 +850,88 @@ async def company_list_page(request: Request, db: Session = Depends(get_db)):
         "tenantId": 0
     }
     
-    - 如果pageNo和pageSize都为0，返回所有结果
+    - 如果pageNo和pageSize都为0，流式返回所有结果
     - 支持按公司名称模糊查询
     - 支持按租户ID筛选
+    - 传入cursor(首页传"")时使用游标分页，响应中返回nextCursor
     """
-    # 手动解析请求体，避免FastAPI的验证
+    # 没有请求体或请求体格式错误时使用默认值
     try:
-        body_bytes = await request.body()
-        
-        if body_bytes:
-            import json
-            try:
-                body = json.loads(body_bytes)
-                company_name = body.get("companyName", "")
-                page_no = body.get("pageNo", 1)
-                page_size = body.get("pageSize", 10)
-                tenant_id = body.get("tenantId", None)
-            except json.JSONDecodeError:
-                company_name = ""
-                page_no = 1
-                page_size = 10
-                tenant_id = None
-        else:
-            company_name = ""
-            page_no = 1
-            page_size = 10
-            tenant_id = None
-    except Exception:
-        company_name = ""
-        page_no = 1
-        page_size = 10
-        tenant_id = None
+        body = await requestbody.parse(request, CompanyPageRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e)
+    return await run_in_threadpool(_query_company_list_page, db, body)
+
+def _query_company_list_page(db, body):
+    """局点分页查询，在线程池中执行"""
+    company_name = body.companyName
+    page_no = body.pageNo
+    page_size = body.pageSize
+    cursor = body.cursor
+    with_total = body.withTotal
+    tenant_id = body.tenantId
     
     try:
-        # 只查询已知存在的列: id, name, tenant_id
-        query = db.query(models.Company.id, models.Company.name, models.Company.tenant_id)
+        # 只查询已知存在的列: id, name, tenant_id，租户名称通过JOIN一并查出
+        # 使用外连接，租户不存在的局点仍然返回(显示"未知租户")
+        query = db.query(
+            models.Company.id,
+            models.Company.name,
+            models.Company.tenant_id,
+            models.Tenant.name.label("tenant_name")
+        ).outerjoin(
+            models.Tenant, models.Company.tenant_id == models.Tenant.id
+        )
         
         # 应用过滤条件：公司名称模糊查询
         if company_name:
-            query = query.filter(models.Company.name.like(f'%{company_name}%'))
+            query = query.filter(search.contains(models.Company.name, company_name))
         
         # 应用过滤条件：租户ID
-        if tenant_id and tenant_id not in [0]:
+        if tenant_id is not None:
             query = query.filter(models.Company.tenant_id == tenant_id)
         
-        # 获取总记录数，只计算id列
-        total_query = db.query(models.Company.id)
-        if company_name:
-            total_query = total_query.filter(models.Company.name.like(f'%{company_name}%'))
-        if tenant_id and tenant_id not in [0]:
-            total_query = total_query.filter(models.Company.tenant_id == tenant_id)
-        
-        total_records = total_query.count()
-        
-        # 分页处理
-        if page_no > 0 and page_size > 0:
-            query = query.offset((page_no - 1) * page_size).limit(page_size)
-            current_page = page_no
-            page_size = page_size
-            total_pages = math.ceil(total_records / page_size) if page_size > 0 else 1
-        else:
-            # 不分页，返回所有记录
-            current_page = 1
-            page_size = total_records
-            total_pages = 1
-        
-        # 执行查询
-        companies = query.all()
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("company", ("companies",), {
+            "companyName": company_name,
+            "tenantId": tenant_id
+        })
+        total_records = cache.counts.get(count_key)
         
         # 构建响应数据，使用硬编码值替代不存在的列
-        records = []
-        for company in companies:
-            # 查询租户名称
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
-            tenant_name = tenant.name if tenant else "未知租户"
-            
-            records.append({
+        def to_record(company):
+            return {
                 "id": company.id,
                 "tenantId": company.tenant_id,
-                "tenantName": tenant_name,
+                "tenantName": company.tenant_name if company.tenant_name is not None else "未知租户",
                 "name": company.name,
                 # 以下使用硬编码值代替数据库中不存在的列
                 "description": f"这是{company.name}的描述",
                 "createTime": "2023-03-20 10:00:00",
                 "updateTime": "2023-03-22 14:30:00" if company.id % 2 == 0 else None,
                 "operatorName": "管理员" if company.id % 2 == 0 else "test3" if company.id % 3 == 0 else None
-            })
+            }
+        
+        # 分页处理，总记录数：OFFSET分页随本页一起查询，不分页时流式输出全部记录
+        next_cursor = None
+        if cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET
+            if total_records is None and with_total:
+                total_records = query.count()
+            page_size = pagination.cursor_page_size(page_size)
+            companies = pagination.apply_cursor(query, models.Company.id, cursor, page_size).all()
+            companies, next_cursor = pagination.split_page(companies, page_size)
+            current_page = 0
+            total_pages = pagination.page_count(total_records, page_size)
+        elif page_no > 0 and page_size > 0:
+            companies, total_records = pagination.offset_page(query, models.Company.id, page_no, page_size, total_records, with_total)
+            current_page = page_no
+            total_pages = pagination.page_count(total_records, page_size)
+        else:
+            # 不分页，流式返回所有记录
+            return stream_all_records(query, models.Company.id, to_record, count_key)
+        cache.counts.set(count_key, total_records)
+        records = [to_record(company) for company in companies]
         
         # 返回成功响应
         return JSONResponse(content={
@@ -798,14 +942,13 @@ async def company_list_page(request: Request, db: Session = Depends(get_db)):
                 "total": total_records,
                 "size": page_size,
                 "current": current_page,
-                "pages": total_pages
+                "pages": total_pages,
+                "nextCursor": next_cursor
             }
         })
     except Exception as e:
         # 捕获所有异常并返回友好的错误信息
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in company_list_page: {str(e)}\n{error_detail}")
+        logger.exception("company_list_page 处理失败")
         
         return JSONResponse(
             status_code=200,  # 使用200而不是500，客户端更友好
@@ -824,7 +967,7 @@ async def company_list_page(request: Request, db: Session = Depends(get_db)):
 
 # 新增局点接口
 @app.post("/ces/company/add", response_model=CompanyAddResponse)
-async def company_add(request: Request, db: Session = Depends(get_db)):
+async def company_add(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     新增局点接口
     
@@ -836,33 +979,14 @@ async def company_add(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            name = body.get("name")
-            description = body.get("description", "")  # 仍然接收description，但不会存储到数据库
-            tenant_id = body.get("tenantId")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, CompanyAddRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        name = body.name
+        description = body.description  # 仍然接收description，但不会存储到数据库
+        tenant_id = body.tenantId
         
         # 验证必填字段
         if not name:
@@ -884,7 +1008,7 @@ async def company_add(request: Request, db: Session = Depends(get_db)):
             )
         
         # 验证租户是否存在
-        tenant = db.query(models.Tenant).filter(models.Tenant.id == tenant_id).first()
+        tenant = await cache.tenants.aget(db, tenant_id)
         if not tenant:
             return JSONResponse(
                 content={
@@ -903,8 +1027,10 @@ async def company_add(request: Request, db: Session = Depends(get_db)):
         
         # 保存到数据库
         db.add(new_company)
-        db.commit()
-        db.refresh(new_company)
+        await db.commit()
+        cache.bump_version("companies")
+        await db.refresh(new_company)
+        cache.companies.invalidate(new_company.id)
         
         # 返回成功响应 - 返回数据中仍然包含前端期望的字段
         return JSONResponse(
@@ -923,13 +1049,8 @@ async def company_add(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("company_add 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志（实际应用中应该使用日志模块）
-        print(f"Error: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -942,7 +1063,7 @@ async def company_add(request: Request, db: Session = Depends(get_db)):
 
 # 修改局点接口
 @app.post("/ces/company/modify", response_model=CompanyModifyResponse)
-async def company_modify(request: Request, db: Session = Depends(get_db)):
+async def company_modify(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     修改局点接口
     
@@ -955,34 +1076,15 @@ async def company_modify(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            company_id = body.get("id")
-            name = body.get("name")
-            description = body.get("description")  # 仍然接收description，但不会存储到数据库
-            tenant_id = body.get("tenantId")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, CompanyModifyRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        company_id = body.id
+        name = body.name
+        description = body.description  # 仍然接收description，但不会存储到数据库
+        tenant_id = body.tenantId
         
         # 验证必填字段
         if company_id is None:
@@ -995,7 +1097,7 @@ async def company_modify(request: Request, db: Session = Depends(get_db)):
             )
         
         # 查询要修改的局点
-        company = db.query(models.Company).filter(models.Company.id == company_id).first()
+        company = (await db.execute(select(models.Company).where(models.Company.id == company_id))).scalars().first()
         if not company:
             return JSONResponse(
                 content={
@@ -1007,7 +1109,7 @@ async def company_modify(request: Request, db: Session = Depends(get_db)):
         
         # 如果提供了新的租户ID，验证租户是否存在
         if tenant_id is not None:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == tenant_id).first()
+            tenant = await cache.tenants.aget(db, tenant_id)
             if not tenant:
                 return JSONResponse(
                     content={
@@ -1034,11 +1136,13 @@ async def company_modify(request: Request, db: Session = Depends(get_db)):
         # 不设置update_time和operator_name，因为数据库中不存在这些列
         
         # 保存到数据库
-        db.commit()
-        db.refresh(company)
+        await db.commit()
+        cache.bump_version("companies")
+        await db.refresh(company)
+        cache.companies.invalidate(company.id)
         
         # 获取租户名称
-        tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+        tenant = await cache.tenants.aget(db, company.tenant_id)
         tenant_name = tenant.name if tenant else "未知租户"
         
         # 返回成功响应 - 返回数据中仍然包含前端期望的字段
@@ -1061,13 +1165,8 @@ async def company_modify(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("company_modify 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志（实际应用中应该使用日志模块）
-        print(f"Error: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -1080,7 +1179,7 @@ async def company_modify(request: Request, db: Session = Depends(get_db)):
 
 # 删除局点接口
 @app.delete("/ces/company/delete", response_model=CompanyDeleteResponse)
-async def company_delete(id: int, db: Session = Depends(get_db)):
+async def company_delete(id: int, db: AsyncSession = Depends(get_async_db)):
     """
     删除局点接口
     
@@ -1088,7 +1187,7 @@ async def company_delete(id: int, db: Session = Depends(get_db)):
     """
     try:
         # 查询要删除的局点
-        company = db.query(models.Company).filter(models.Company.id == id).first()
+        company = (await db.execute(select(models.Company).where(models.Company.id == id))).scalars().first()
         
         # 如果局点不存在，返回错误
         if not company:
@@ -1108,8 +1207,10 @@ async def company_delete(id: int, db: Session = Depends(get_db)):
         }
         
         # 删除局点
-        db.delete(company)
-        db.commit()
+        await db.delete(company)
+        await db.commit()
+        cache.bump_version("companies")
+        cache.companies.invalidate(id)
         
         # 返回成功响应
         return JSONResponse(
@@ -1122,13 +1223,8 @@ async def company_delete(id: int, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("company_delete 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -1141,7 +1237,7 @@ async def company_delete(id: int, db: Session = Depends(get_db)):
 
 # 网格列表查询接口
 @app.post("/ces/grid/list", response_model=GridListResponse)
-async def grid_list(request: Request, db: Session = Depends(get_db)):
+async def grid_list(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     获取网格列表，支持按局点ID筛选
     - 如果不传递局点ID或传0，则返回所有网格
@@ -1153,47 +1249,33 @@ async def grid_list(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            company_id = 0  # 默认查询所有
-        else:
-            import json
-            try:
-                body = json.loads(body_bytes)
-                company_id = body.get("companyId", 0)
-            except json.JSONDecodeError:
-                company_id = 0  # JSON解析失败，默认查询所有
+        # 没有请求体或请求体格式错误时查询所有
+        try:
+            body = await requestbody.parse(request, GridListRequest, lenient=True)
+        except requestbody.BodyError as e:
+            return body_error_response(e, [])
+        company_id = body.companyId
         
         # 构建查询
-        query = db.query(models.Grid)
+        query = select(models.Grid).order_by(models.Grid.id)
         
-        # 根据companyId筛选
-        # 只有当companyId不为0时才筛选
-        if company_id != 0:
-            try:
-                # 尝试转换为整数
-                company_id = int(company_id)
-                # 先检查公司是否存在
-                company = db.query(models.Company).filter(models.Company.id == company_id).first()
-                if not company:
-                    return JSONResponse(
-                        content={
-                            "code": "A0001", 
-                            "msg": f"局点ID {company_id} 不存在",
-                            "data": []
-                        }
-                    )
-                # 筛选指定局点的网格
-                query = query.filter(models.Grid.company_id == company_id)
-            except (ValueError, TypeError):
-                # 转换失败，返回所有网格
-                pass
+        # 根据companyId筛选：None、空字符串、"0"、0时不筛选
+        if company_id is not None:
+            # 先检查公司是否存在
+            company = await cache.companies.aget(db, company_id)
+            if not company:
+                return JSONResponse(
+                    content={
+                        "code": "A0001", 
+                        "msg": f"局点ID {company_id} 不存在",
+                        "data": []
+                    }
+                )
+            # 筛选指定局点的网格
+            query = query.where(models.Grid.company_id == company_id)
         
         # 执行查询
-        grids = query.all()
+        grids = (await db.execute(query)).scalars().all()
         
         # 构建响应
         result = [{"id": grid.id, "name": grid.name} for grid in grids]
@@ -1209,13 +1291,8 @@ async def grid_list(request: Request, db: Session = Depends(get_db)):
     
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("grid_list 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -1245,33 +1322,25 @@ async def grid_list_page(request: Request, db: Session = Depends(get_db)):
     - 如果tenantId为0，查询所有租户的网格
     - 支持按网格名称模糊查询
     - 支持分页功能
+    - 传入cursor(首页传"")时使用游标分页，响应中返回nextCursor
     """
+    # 没有请求体或请求体格式错误时使用默认值
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON请求
-        if not body_bytes:
-            company_id = 0
-            grid_name = ""
-            page_no = 1
-            page_size = 10
-            tenant_id = 0
-        else:
-            import json
-            try:
-                body = json.loads(body_bytes)
-                company_id = body.get("companyId", 0)
-                grid_name = body.get("name", "")
-                page_no = body.get("pageNo", 1)
-                page_size = body.get("pageSize", 10)
-                tenant_id = body.get("tenantId", 0)
-            except json.JSONDecodeError:
-                company_id = 0
-                grid_name = ""
-                page_no = 1
-                page_size = 10
-                tenant_id = 0
+        body = await requestbody.parse(request, GridPageRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e)
+    return await run_in_threadpool(_query_grid_list_page, db, body)
+
+def _query_grid_list_page(db, body):
+    """网格分页查询，在线程池中执行"""
+    try:
+        company_id = body.companyId
+        grid_name = body.name
+        page_no = body.pageNo
+        page_size = body.pageSize
+        cursor = body.cursor
+        with_total = body.withTotal
+        tenant_id = body.tenantId
         
         # 创建基础查询，包含网格和关联的公司信息
         query = db.query(
@@ -1289,7 +1358,7 @@ async def grid_list_page(request: Request, db: Session = Depends(get_db)):
         
         # 应用过滤条件：网格名称模糊查询
         if grid_name:
-            query = query.filter(models.Grid.name.like(f'%{grid_name}%'))
+            query = query.filter(search.contains(models.Grid.name, grid_name))
         
         # 应用过滤条件：公司ID
         if company_id and company_id != 0:
@@ -1299,31 +1368,19 @@ async def grid_list_page(request: Request, db: Session = Depends(get_db)):
         if tenant_id and tenant_id != 0:
             query = query.filter(models.Company.tenant_id == tenant_id)
         
-        # 获取总记录数，创建一个复制的查询以计算总数
-        total_query = query
-        total_records = total_query.count()
-        
-        # 分页处理
-        if page_no > 0 and page_size > 0:
-            query = query.offset((page_no - 1) * page_size).limit(page_size)
-            current_page = page_no
-            page_size = page_size
-            total_pages = math.ceil(total_records / page_size) if page_size > 0 else 1
-        else:
-            # 不分页，返回所有记录
-            current_page = 1
-            page_size = total_records
-            total_pages = 1
-        
-        # 执行查询
-        grid_results = query.all()
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("grid", ("grids", "companies", "tenants"), {
+            "companyId": company_id,
+            "name": grid_name,
+            "tenantId": tenant_id
+        })
+        total_records = cache.counts.get(count_key)
         
         # 构建响应数据，添加前端期望的其他字段
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        records = []
         
-        for grid in grid_results:
-            records.append({
+        def to_record(grid):
+            return {
                 "id": grid.id,
                 "gridName": grid.grid_name,
                 "companyId": grid.company_id,
@@ -1334,7 +1391,28 @@ async def grid_list_page(request: Request, db: Session = Depends(get_db)):
                 "createTime": current_time,
                 "updateTime": current_time if grid.id % 2 == 0 else None,
                 "operatorName": "管理员" if grid.id % 2 == 0 else "操作员" if grid.id % 3 == 0 else None
-            })
+            }
+        
+        # 分页处理，总记录数：OFFSET分页随本页一起查询，不分页时流式输出全部记录
+        next_cursor = None
+        if cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET
+            if total_records is None and with_total:
+                total_records = query.count()
+            page_size = pagination.cursor_page_size(page_size)
+            grid_results = pagination.apply_cursor(query, models.Grid.id, cursor, page_size).all()
+            grid_results, next_cursor = pagination.split_page(grid_results, page_size)
+            current_page = 0
+            total_pages = pagination.page_count(total_records, page_size)
+        elif page_no > 0 and page_size > 0:
+            grid_results, total_records = pagination.offset_page(query, models.Grid.id, page_no, page_size, total_records, with_total)
+            current_page = page_no
+            total_pages = pagination.page_count(total_records, page_size)
+        else:
+            # 不分页，流式返回所有记录
+            return stream_all_records(query, models.Grid.id, to_record, count_key)
+        cache.counts.set(count_key, total_records)
+        records = [to_record(grid) for grid in grid_results]
         
         # 返回成功响应
         return JSONResponse(
@@ -1346,16 +1424,15 @@ async def grid_list_page(request: Request, db: Session = Depends(get_db)):
                     "total": total_records,
                     "size": page_size,
                     "current": current_page,
-                    "pages": total_pages
+                    "pages": total_pages,
+                    "nextCursor": next_cursor
                 }
             }
         )
         
     except Exception as e:
         # 捕获所有异常并返回友好的错误信息
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in grid_list_page: {str(e)}\n{error_detail}")
+        logger.exception("grid_list_page 处理失败")
         
         return JSONResponse(
             status_code=200,  # 使用200而不是500，客户端更友好
@@ -1374,7 +1451,7 @@ async def grid_list_page(request: Request, db: Session = Depends(get_db)):
 
 # 新增网格接口
 @app.post("/ces/grid/add", response_model=GridAddResponse)
-async def grid_add(request: Request, db: Session = Depends(get_db)):
+async def grid_add(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     新增网格接口
     
@@ -1385,32 +1462,13 @@ async def grid_add(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            company_id = body.get("companyId")
-            name = body.get("name")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, GridAddRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        company_id = body.companyId
+        name = body.name
         
         # 验证必填字段
         if company_id is None:
@@ -1432,7 +1490,7 @@ async def grid_add(request: Request, db: Session = Depends(get_db)):
             )
         
         # 验证局点是否存在
-        company = db.query(models.Company).filter(models.Company.id == company_id).first()
+        company = await cache.companies.aget(db, company_id)
         if not company:
             return JSONResponse(
                 content={
@@ -1443,7 +1501,7 @@ async def grid_add(request: Request, db: Session = Depends(get_db)):
             )
         
         # 查询关联的租户信息
-        tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+        tenant = await cache.tenants.aget(db, company.tenant_id)
         
         # 创建新网格
         new_grid = models.Grid(
@@ -1453,8 +1511,9 @@ async def grid_add(request: Request, db: Session = Depends(get_db)):
         
         # 保存到数据库
         db.add(new_grid)
-        db.commit()
-        db.refresh(new_grid)
+        await db.commit()
+        cache.bump_version("grids")
+        await db.refresh(new_grid)
         
         # 返回成功响应
         return JSONResponse(
@@ -1475,13 +1534,8 @@ async def grid_add(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("grid_add 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in grid_add: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -1494,7 +1548,7 @@ async def grid_add(request: Request, db: Session = Depends(get_db)):
 
 # 修改网格接口
 @app.post("/ces/grid/modify", response_model=GridModifyResponse)
-async def grid_modify(request: Request, db: Session = Depends(get_db)):
+async def grid_modify(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     修改网格接口
     
@@ -1506,33 +1560,14 @@ async def grid_modify(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            grid_id = body.get("id")
-            company_id = body.get("companyId")
-            name = body.get("name")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, GridModifyRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        grid_id = body.id
+        company_id = body.companyId
+        name = body.name
         
         # 验证必填字段
         if grid_id is None:
@@ -1545,7 +1580,7 @@ async def grid_modify(request: Request, db: Session = Depends(get_db)):
             )
         
         # 查询要修改的网格
-        grid = db.query(models.Grid).filter(models.Grid.id == grid_id).first()
+        grid = (await db.execute(select(models.Grid).where(models.Grid.id == grid_id))).scalars().first()
         if not grid:
             return JSONResponse(
                 content={
@@ -1561,7 +1596,7 @@ async def grid_modify(request: Request, db: Session = Depends(get_db)):
         
         # 如果提供了新的公司ID，验证公司是否存在并更新
         if company_id is not None:
-            company = db.query(models.Company).filter(models.Company.id == company_id).first()
+            company = await cache.companies.aget(db, company_id)
             if not company:
                 return JSONResponse(
                     content={
@@ -1589,14 +1624,15 @@ async def grid_modify(request: Request, db: Session = Depends(get_db)):
         grid.name = updated_name
         
         # 保存到数据库
-        db.commit()
-        db.refresh(grid)
+        await db.commit()
+        cache.bump_version("grids")
+        await db.refresh(grid)
         
         # 获取更新后的关联信息
-        company = db.query(models.Company).filter(models.Company.id == grid.company_id).first()
+        company = await cache.companies.aget(db, grid.company_id)
         tenant = None
         if company:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+            tenant = await cache.tenants.aget(db, company.tenant_id)
         
         # 返回成功响应
         return JSONResponse(
@@ -1617,13 +1653,8 @@ async def grid_modify(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("grid_modify 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in grid_modify: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -1636,7 +1667,7 @@ async def grid_modify(request: Request, db: Session = Depends(get_db)):
 
 # 删除网格接口
 @app.delete("/ces/grid/delete", response_model=GridDeleteResponse)
-async def grid_delete(id: int, db: Session = Depends(get_db)):
+async def grid_delete(id: int, db: AsyncSession = Depends(get_async_db)):
     """
     删除网格接口
     
@@ -1644,7 +1675,7 @@ async def grid_delete(id: int, db: Session = Depends(get_db)):
     """
     try:
         # 查询要删除的网格
-        grid = db.query(models.Grid).filter(models.Grid.id == id).first()
+        grid = (await db.execute(select(models.Grid).where(models.Grid.id == id))).scalars().first()
         
         # 如果网格不存在，返回错误
         if not grid:
@@ -1657,10 +1688,10 @@ async def grid_delete(id: int, db: Session = Depends(get_db)):
             )
         
         # 获取公司和租户信息，用于返回
-        company = db.query(models.Company).filter(models.Company.id == grid.company_id).first()
+        company = await cache.companies.aget(db, grid.company_id)
         tenant = None
         if company:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+            tenant = await cache.tenants.aget(db, company.tenant_id)
             
         # 保存网格信息用于返回
         grid_info = {
@@ -1673,8 +1704,9 @@ async def grid_delete(id: int, db: Session = Depends(get_db)):
         }
         
         # 删除网格
-        db.delete(grid)
-        db.commit()
+        await db.delete(grid)
+        await db.commit()
+        cache.bump_version("grids")
         
         # 返回成功响应
         return JSONResponse(
@@ -1687,13 +1719,8 @@ async def grid_delete(id: int, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("grid_delete 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in grid_delete: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -1725,36 +1752,26 @@ async def community_list_page(request: Request, db: Session = Depends(get_db)):
     - 如果tenantId为0，查询所有租户的小区
     - 支持按小区名称模糊查询
     - 支持分页功能
+    - 传入cursor(首页传"")时使用游标分页，响应中返回nextCursor
     """
+    # 没有请求体或请求体格式错误时使用默认值
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON请求
-        if not body_bytes:
-            company_id = 0
-            grid_id = 0
-            community_name = ""
-            page_no = 1
-            page_size = 10
-            tenant_id = 0
-        else:
-            import json
-            try:
-                body = json.loads(body_bytes)
-                company_id = body.get("companyId", 0)
-                grid_id = body.get("gridId", 0)
-                community_name = body.get("name", "")
-                page_no = body.get("pageNo", 1)
-                page_size = body.get("pageSize", 10)
-                tenant_id = body.get("tenantId", 0)
-            except json.JSONDecodeError:
-                company_id = 0
-                grid_id = 0
-                community_name = ""
-                page_no = 1
-                page_size = 10
-                tenant_id = 0
+        body = await requestbody.parse(request, CommunityPageRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e)
+    return await run_in_threadpool(_query_community_list_page, db, body)
+
+def _query_community_list_page(db, body):
+    """小区分页查询，在线程池中执行"""
+    try:
+        company_id = body.companyId
+        grid_id = body.gridId
+        community_name = body.name
+        page_no = body.pageNo
+        page_size = body.pageSize
+        cursor = body.cursor
+        with_total = body.withTotal
+        tenant_id = body.tenantId
         
         # 创建基础查询，包含小区和关联的网格、公司、租户信息
         query = db.query(
@@ -1779,7 +1796,7 @@ async def community_list_page(request: Request, db: Session = Depends(get_db)):
         
         # 应用过滤条件：小区名称模糊查询
         if community_name:
-            query = query.filter(models.Community.name.like(f'%{community_name}%'))
+            query = query.filter(search.contains(models.Community.name, community_name))
         
         # 应用过滤条件：网格ID
         if grid_id and grid_id != 0:
@@ -1793,34 +1810,22 @@ async def community_list_page(request: Request, db: Session = Depends(get_db)):
         if tenant_id and tenant_id != 0:
             query = query.filter(models.Company.tenant_id == tenant_id)
         
-        # 获取总记录数，创建一个复制的查询以计算总数
-        total_query = query
-        total_records = total_query.count()
-        
-        # 分页处理
-        if page_no > 0 and page_size > 0:
-            query = query.offset((page_no - 1) * page_size).limit(page_size)
-            current_page = page_no
-            page_size = page_size
-            total_pages = math.ceil(total_records / page_size) if page_size > 0 else 1
-        else:
-            # 不分页，返回所有记录
-            current_page = 1
-            page_size = total_records
-            total_pages = 1
-        
-        # 执行查询
-        community_results = query.all()
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("community", ("communities", "grids", "companies", "tenants"), {
+            "companyId": company_id,
+            "gridId": grid_id,
+            "name": community_name,
+            "tenantId": tenant_id
+        })
+        total_records = cache.counts.get(count_key)
         
         # 构建响应数据
-        records = []
-        
-        for community in community_results:
+        def to_record(community):
             # 格式化日期时间
             create_time = community.create_time.strftime("%Y-%m-%d %H:%M:%S") if community.create_time else None
             update_time = community.update_time.strftime("%Y-%m-%d %H:%M:%S") if community.update_time else None
             
-            records.append({
+            return {
                 "id": community.id,
                 "name": community.name,
                 "gridId": community.grid_id,
@@ -1832,7 +1837,28 @@ async def community_list_page(request: Request, db: Session = Depends(get_db)):
                 "createTime": create_time,
                 "updateTime": update_time,
                 "operatorName": community.operator_name
-            })
+            }
+        
+        # 分页处理，总记录数：OFFSET分页随本页一起查询，不分页时流式输出全部记录
+        next_cursor = None
+        if cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET
+            if total_records is None and with_total:
+                total_records = query.count()
+            page_size = pagination.cursor_page_size(page_size)
+            community_results = pagination.apply_cursor(query, models.Community.id, cursor, page_size).all()
+            community_results, next_cursor = pagination.split_page(community_results, page_size)
+            current_page = 0
+            total_pages = pagination.page_count(total_records, page_size)
+        elif page_no > 0 and page_size > 0:
+            community_results, total_records = pagination.offset_page(query, models.Community.id, page_no, page_size, total_records, with_total)
+            current_page = page_no
+            total_pages = pagination.page_count(total_records, page_size)
+        else:
+            # 不分页，流式返回所有记录
+            return stream_all_records(query, models.Community.id, to_record, count_key)
+        cache.counts.set(count_key, total_records)
+        records = [to_record(community) for community in community_results]
         
         # 返回成功响应
         return JSONResponse(
@@ -1844,16 +1870,15 @@ async def community_list_page(request: Request, db: Session = Depends(get_db)):
                     "total": total_records,
                     "size": page_size,
                     "current": current_page,
-                    "pages": total_pages
+                    "pages": total_pages,
+                    "nextCursor": next_cursor
                 }
             }
         )
         
     except Exception as e:
         # 捕获所有异常并返回友好的错误信息
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in community_list_page: {str(e)}\n{error_detail}")
+        logger.exception("community_list_page 处理失败")
         
         return JSONResponse(
             status_code=200,  # 使用200而不是500，客户端更友好
@@ -1872,7 +1897,7 @@ async def community_list_page(request: Request, db: Session = Depends(get_db)):
 
 # 新增小区接口
 @app.post("/ces/community/add", response_model=CommunityAddResponse)
-async def community_add(request: Request, db: Session = Depends(get_db)):
+async def community_add(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     新增小区接口
     
@@ -1883,32 +1908,13 @@ async def community_add(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            grid_id = body.get("gridId")
-            name = body.get("name")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, CommunityAddRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        grid_id = body.gridId
+        name = body.name
         
         # 验证必填字段
         if grid_id is None:
@@ -1930,7 +1936,7 @@ async def community_add(request: Request, db: Session = Depends(get_db)):
             )
         
         # 验证网格是否存在
-        grid = db.query(models.Grid).filter(models.Grid.id == grid_id).first()
+        grid = (await db.execute(select(models.Grid).where(models.Grid.id == grid_id))).scalars().first()
         if not grid:
             return JSONResponse(
                 content={
@@ -1941,10 +1947,10 @@ async def community_add(request: Request, db: Session = Depends(get_db)):
             )
         
         # 查询关联的公司和租户信息
-        company = db.query(models.Company).filter(models.Company.id == grid.company_id).first()
+        company = await cache.companies.aget(db, grid.company_id)
         tenant = None
         if company:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+            tenant = await cache.tenants.aget(db, company.tenant_id)
         
         # 创建新小区
         current_time = datetime.now()
@@ -1958,8 +1964,9 @@ async def community_add(request: Request, db: Session = Depends(get_db)):
         
         # 保存到数据库
         db.add(new_community)
-        db.commit()
-        db.refresh(new_community)
+        await db.commit()
+        cache.bump_version("communities")
+        await db.refresh(new_community)
         
         # 返回成功响应
         return JSONResponse(
@@ -1984,13 +1991,8 @@ async def community_add(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("community_add 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in community_add: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -2003,7 +2005,7 @@ async def community_add(request: Request, db: Session = Depends(get_db)):
 
 # 修改小区接口
 @app.post("/ces/community/modify", response_model=CommunityModifyResponse)
-async def community_modify(request: Request, db: Session = Depends(get_db)):
+async def community_modify(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     修改小区接口
     
@@ -2015,33 +2017,14 @@ async def community_modify(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            community_id = body.get("id")
-            grid_id = body.get("gridId")
-            name = body.get("name")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, CommunityModifyRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        community_id = body.id
+        grid_id = body.gridId
+        name = body.name
         
         # 验证小区ID
         if community_id is None:
@@ -2054,7 +2037,7 @@ async def community_modify(request: Request, db: Session = Depends(get_db)):
             )
         
         # 查询要修改的小区
-        community = db.query(models.Community).filter(models.Community.id == community_id).first()
+        community = (await db.execute(select(models.Community).where(models.Community.id == community_id))).scalars().first()
         if not community:
             return JSONResponse(
                 content={
@@ -2067,12 +2050,12 @@ async def community_modify(request: Request, db: Session = Depends(get_db)):
         # 原始网格ID
         original_grid_id = community.grid_id
         updated_grid_id = original_grid_id
-        grid = db.query(models.Grid).filter(models.Grid.id == original_grid_id).first()
+        grid = (await db.execute(select(models.Grid).where(models.Grid.id == original_grid_id))).scalars().first()
         
         # 如果提供了新的网格ID，验证网格是否存在
         if grid_id is not None:
             if grid_id != original_grid_id:
-                new_grid = db.query(models.Grid).filter(models.Grid.id == grid_id).first()
+                new_grid = (await db.execute(select(models.Grid).where(models.Grid.id == grid_id))).scalars().first()
                 if not new_grid:
                     return JSONResponse(
                         content={
@@ -2103,14 +2086,15 @@ async def community_modify(request: Request, db: Session = Depends(get_db)):
         community.update_time = datetime.now()
         
         # 保存到数据库
-        db.commit()
-        db.refresh(community)
+        await db.commit()
+        cache.bump_version("communities")
+        await db.refresh(community)
         
         # 获取相关实体信息
-        company = db.query(models.Company).filter(models.Company.id == grid.company_id).first()
+        company = await cache.companies.aget(db, grid.company_id)
         tenant = None
         if company:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+            tenant = await cache.tenants.aget(db, company.tenant_id)
             
         # 返回成功响应
         return JSONResponse(
@@ -2135,13 +2119,8 @@ async def community_modify(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("community_modify 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in community_modify: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -2154,7 +2133,7 @@ async def community_modify(request: Request, db: Session = Depends(get_db)):
 
 # 删除小区接口
 @app.delete("/ces/community/delete", response_model=CommunityDeleteResponse)
-async def community_delete(id: int, db: Session = Depends(get_db)):
+async def community_delete(id: int, db: AsyncSession = Depends(get_async_db)):
     """
     删除小区接口
     
@@ -2162,7 +2141,7 @@ async def community_delete(id: int, db: Session = Depends(get_db)):
     """
     try:
         # 查询要删除的小区
-        community = db.query(models.Community).filter(models.Community.id == id).first()
+        community = (await db.execute(select(models.Community).where(models.Community.id == id))).scalars().first()
         
         # 如果小区不存在，返回错误
         if not community:
@@ -2175,14 +2154,14 @@ async def community_delete(id: int, db: Session = Depends(get_db)):
             )
         
         # 获取关联的网格信息
-        grid = db.query(models.Grid).filter(models.Grid.id == community.grid_id).first()
+        grid = (await db.execute(select(models.Grid).where(models.Grid.id == community.grid_id))).scalars().first()
         company = None
         tenant = None
         
         if grid:
-            company = db.query(models.Company).filter(models.Company.id == grid.company_id).first()
+            company = await cache.companies.aget(db, grid.company_id)
             if company:
-                tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+                tenant = await cache.tenants.aget(db, company.tenant_id)
         
         # 保存小区信息用于返回
         community_info = {
@@ -2200,8 +2179,9 @@ async def community_delete(id: int, db: Session = Depends(get_db)):
         }
         
         # 删除小区
-        db.delete(community)
-        db.commit()
+        await db.delete(community)
+        await db.commit()
+        cache.bump_version("communities")
         
         # 返回成功响应
         return JSONResponse(
@@ -2214,13 +2194,8 @@ async def community_delete(id: int, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("community_delete 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in community_delete: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -2250,33 +2225,25 @@ async def group_list_page(request: Request, db: Session = Depends(get_db)):
     - 如果tenantId为0，查询所有租户的营销组
     - 支持按营销组名称模糊查询
     - 支持分页功能
+    - 传入cursor(首页传"")时使用游标分页，响应中返回nextCursor
     """
+    # 没有请求体或请求体格式错误时使用默认值
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON请求
-        if not body_bytes:
-            company_id = 0
-            group_name = ""
-            page_no = 1
-            page_size = 10
-            tenant_id = 0
-        else:
-            import json
-            try:
-                body = json.loads(body_bytes)
-                company_id = body.get("companyId", 0)
-                group_name = body.get("name", "")
-                page_no = body.get("pageNo", 1)
-                page_size = body.get("pageSize", 10)
-                tenant_id = body.get("tenantId", 0)
-            except json.JSONDecodeError:
-                company_id = 0
-                group_name = ""
-                page_no = 1
-                page_size = 10
-                tenant_id = 0
+        body = await requestbody.parse(request, GroupPageRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e)
+    return await run_in_threadpool(_query_group_list_page, db, body)
+
+def _query_group_list_page(db, body):
+    """营销组分页查询，在线程池中执行"""
+    try:
+        company_id = body.companyId
+        group_name = body.name
+        page_no = body.pageNo
+        page_size = body.pageSize
+        cursor = body.cursor
+        with_total = body.withTotal
+        tenant_id = body.tenantId
         
         # 创建基础查询，包含营销组和关联的公司、租户信息
         query = db.query(
@@ -2298,7 +2265,7 @@ async def group_list_page(request: Request, db: Session = Depends(get_db)):
         
         # 应用过滤条件：营销组名称模糊查询
         if group_name:
-            query = query.filter(models.Group.name.like(f'%{group_name}%'))
+            query = query.filter(search.contains(models.Group.name, group_name))
         
         # 应用过滤条件：公司ID
         if company_id and company_id != 0:
@@ -2308,34 +2275,21 @@ async def group_list_page(request: Request, db: Session = Depends(get_db)):
         if tenant_id and tenant_id != 0:
             query = query.filter(models.Company.tenant_id == tenant_id)
         
-        # 获取总记录数，创建一个复制的查询以计算总数
-        total_query = query
-        total_records = total_query.count()
-        
-        # 分页处理
-        if page_no > 0 and page_size > 0:
-            query = query.offset((page_no - 1) * page_size).limit(page_size)
-            current_page = page_no
-            page_size = page_size
-            total_pages = math.ceil(total_records / page_size) if page_size > 0 else 1
-        else:
-            # 不分页，返回所有记录
-            current_page = 1
-            page_size = total_records
-            total_pages = 1
-        
-        # 执行查询
-        group_results = query.all()
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("group", ("groups", "companies", "tenants"), {
+            "companyId": company_id,
+            "name": group_name,
+            "tenantId": tenant_id
+        })
+        total_records = cache.counts.get(count_key)
         
         # 构建响应数据
-        records = []
-        
-        for group in group_results:
+        def to_record(group):
             # 格式化日期时间
             create_time = group.create_time.strftime("%Y-%m-%d %H:%M:%S") if group.create_time else None
             update_time = group.update_time.strftime("%Y-%m-%d %H:%M:%S") if group.update_time else None
             
-            records.append({
+            return {
                 "id": group.id,
                 "groupName": group.group_name,
                 "description": group.description,
@@ -2346,7 +2300,28 @@ async def group_list_page(request: Request, db: Session = Depends(get_db)):
                 "createTime": create_time,
                 "updateTime": update_time,
                 "operatorName": group.operator_name
-            })
+            }
+        
+        # 分页处理，总记录数：OFFSET分页随本页一起查询，不分页时流式输出全部记录
+        next_cursor = None
+        if cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET
+            if total_records is None and with_total:
+                total_records = query.count()
+            page_size = pagination.cursor_page_size(page_size)
+            group_results = pagination.apply_cursor(query, models.Group.id, cursor, page_size).all()
+            group_results, next_cursor = pagination.split_page(group_results, page_size)
+            current_page = 0
+            total_pages = pagination.page_count(total_records, page_size)
+        elif page_no > 0 and page_size > 0:
+            group_results, total_records = pagination.offset_page(query, models.Group.id, page_no, page_size, total_records, with_total)
+            current_page = page_no
+            total_pages = pagination.page_count(total_records, page_size)
+        else:
+            # 不分页，流式返回所有记录
+            return stream_all_records(query, models.Group.id, to_record, count_key)
+        cache.counts.set(count_key, total_records)
+        records = [to_record(group) for group in group_results]
         
         # 返回成功响应
         return JSONResponse(
@@ -2358,16 +2333,15 @@ async def group_list_page(request: Request, db: Session = Depends(get_db)):
                     "total": total_records,
                     "size": page_size,
                     "current": current_page,
-                    "pages": total_pages
+                    "pages": total_pages,
+                    "nextCursor": next_cursor
                 }
             }
         )
         
     except Exception as e:
         # 捕获所有异常并返回友好的错误信息
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in group_list_page: {str(e)}\n{error_detail}")
+        logger.exception("group_list_page 处理失败")
         
         return JSONResponse(
             status_code=200,  # 使用200而不是500，客户端更友好
@@ -2386,7 +2360,7 @@ async def group_list_page(request: Request, db: Session = Depends(get_db)):
 
 # 新增营销组接口
 @app.post("/ces/group/add", response_model=GroupAddResponse)
-async def group_add(request: Request, db: Session = Depends(get_db)):
+async def group_add(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     新增营销组接口
     
@@ -2398,33 +2372,14 @@ async def group_add(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            company_id = body.get("companyId")
-            name = body.get("name")
-            description = body.get("description", "")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, GroupAddRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        company_id = body.companyId
+        name = body.name
+        description = body.description
         
         # 验证必填字段
         if company_id is None:
@@ -2446,7 +2401,7 @@ async def group_add(request: Request, db: Session = Depends(get_db)):
             )
         
         # 验证局点是否存在
-        company = db.query(models.Company).filter(models.Company.id == company_id).first()
+        company = await cache.companies.aget(db, company_id)
         if not company:
             return JSONResponse(
                 content={
@@ -2457,7 +2412,7 @@ async def group_add(request: Request, db: Session = Depends(get_db)):
             )
         
         # 查询关联的租户信息
-        tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+        tenant = await cache.tenants.aget(db, company.tenant_id)
         
         # 创建新营销组
         current_time = datetime.now()
@@ -2472,8 +2427,10 @@ async def group_add(request: Request, db: Session = Depends(get_db)):
         
         # 保存到数据库
         db.add(new_group)
-        db.commit()
-        db.refresh(new_group)
+        await db.commit()
+        cache.bump_version("groups")
+        await db.refresh(new_group)
+        cache.groups.invalidate(new_group.id)
         
         # 返回成功响应
         return JSONResponse(
@@ -2497,13 +2454,8 @@ async def group_add(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("group_add 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in group_add: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -2516,7 +2468,7 @@ async def group_add(request: Request, db: Session = Depends(get_db)):
 
 # 修改营销组接口
 @app.post("/ces/group/modify", response_model=GroupModifyResponse)
-async def group_modify(request: Request, db: Session = Depends(get_db)):
+async def group_modify(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     修改营销组接口
     
@@ -2529,34 +2481,15 @@ async def group_modify(request: Request, db: Session = Depends(get_db)):
     }
     """
     try:
-        # 读取请求体
-        body_bytes = await request.body()
-        
-        # 解析JSON
-        if not body_bytes:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体不能为空",
-                    "data": {}
-                }
-            )
-            
-        import json
+        # 读取并解析请求体
         try:
-            body = json.loads(body_bytes)
-            group_id = body.get("id")
-            company_id = body.get("companyId")
-            name = body.get("name")
-            description = body.get("description")
-        except json.JSONDecodeError:
-            return JSONResponse(
-                content={
-                    "code": "A0001", 
-                    "msg": "请求体格式错误",
-                    "data": {}
-                }
-            )
+            body = await requestbody.parse(request, GroupModifyRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        group_id = body.id
+        company_id = body.companyId
+        name = body.name
+        description = body.description
         
         # 验证必填字段
         if group_id is None:
@@ -2569,7 +2502,7 @@ async def group_modify(request: Request, db: Session = Depends(get_db)):
             )
         
         # 查询要修改的营销组
-        group = db.query(models.Group).filter(models.Group.id == group_id).first()
+        group = (await db.execute(select(models.Group).where(models.Group.id == group_id))).scalars().first()
         if not group:
             return JSONResponse(
                 content={
@@ -2586,7 +2519,7 @@ async def group_modify(request: Request, db: Session = Depends(get_db)):
         
         # 如果提供了新的公司ID，验证公司是否存在并更新
         if company_id is not None:
-            company = db.query(models.Company).filter(models.Company.id == company_id).first()
+            company = await cache.companies.aget(db, company_id)
             if not company:
                 return JSONResponse(
                     content={
@@ -2620,14 +2553,16 @@ async def group_modify(request: Request, db: Session = Depends(get_db)):
         group.update_time = datetime.now()  # 更新修改时间
         
         # 保存到数据库
-        db.commit()
-        db.refresh(group)
+        await db.commit()
+        cache.bump_version("groups")
+        await db.refresh(group)
+        cache.groups.invalidate(group.id)
         
         # 获取更新后的关联信息
-        company = db.query(models.Company).filter(models.Company.id == group.company_id).first()
+        company = await cache.companies.aget(db, group.company_id)
         tenant = None
         if company:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+            tenant = await cache.tenants.aget(db, company.tenant_id)
         
         # 返回成功响应
         return JSONResponse(
@@ -2650,13 +2585,8 @@ async def group_modify(request: Request, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("group_modify 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in group_modify: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -2669,7 +2599,7 @@ async def group_modify(request: Request, db: Session = Depends(get_db)):
 
 # 删除营销组接口
 @app.delete("/ces/group/delete", response_model=GroupDeleteResponse)
-async def group_delete(id: int, db: Session = Depends(get_db)):
+async def group_delete(id: int, db: AsyncSession = Depends(get_async_db)):
     """
     删除营销组接口
     
@@ -2677,7 +2607,7 @@ async def group_delete(id: int, db: Session = Depends(get_db)):
     """
     try:
         # 查询要删除的营销组
-        group = db.query(models.Group).filter(models.Group.id == id).first()
+        group = (await db.execute(select(models.Group).where(models.Group.id == id))).scalars().first()
         
         # 如果营销组不存在，返回错误
         if not group:
@@ -2690,10 +2620,10 @@ async def group_delete(id: int, db: Session = Depends(get_db)):
             )
         
         # 获取公司和租户信息，用于返回
-        company = db.query(models.Company).filter(models.Company.id == group.company_id).first()
+        company = await cache.companies.aget(db, group.company_id)
         tenant = None
         if company:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == company.tenant_id).first()
+            tenant = await cache.tenants.aget(db, company.tenant_id)
             
         # 保存营销组信息用于返回
         group_info = {
@@ -2707,8 +2637,10 @@ async def group_delete(id: int, db: Session = Depends(get_db)):
         }
         
         # 删除营销组
-        db.delete(group)
-        db.commit()
+        await db.delete(group)
+        await db.commit()
+        cache.bump_version("groups")
+        cache.groups.invalidate(group.id)
         
         # 返回成功响应
         return JSONResponse(
@@ -2721,13 +2653,8 @@ async def group_delete(id: int, db: Session = Depends(get_db)):
         
     except Exception as e:
         # 处理异常
-        import traceback
+        logger.exception("group_delete 处理失败")
         error_msg = str(e)
-        error_trace = traceback.format_exc()
-        
-        # 记录错误日志
-        print(f"Error in group_delete: {error_msg}")
-        print(f"Trace: {error_trace}")
         
         # 返回错误响应
         return JSONResponse(
@@ -2740,9 +2667,9 @@ async def group_delete(id: int, db: Session = Depends(get_db)):
 
 # 查询局点和营销组的树形结构接口
 @app.get("/ces/group/company_group/tree", response_model=GroupTreeResponse)
-async def company_group_tree(companyId: int, db: Session = Depends(get_db)):
+def company_group_tree(companyId: int, db: Session = Depends(get_db)):
     # 获取公司信息
-    company = db.query(models.Company).filter(models.Company.id == companyId).first()
+    company = cache.companies.get(db, companyId)
     
     if not company:
         return {
@@ -2752,7 +2679,7 @@ async def company_group_tree(companyId: int, db: Session = Depends(get_db)):
         }
     
     # 获取所有营销组
-    groups = db.query(models.Group).filter(models.Group.company_id == companyId).all()
+    groups = db.query(models.Group).filter(models.Group.company_id == companyId).order_by(models.Group.id).all()
     
     group_list = []
     for group in groups:
@@ -2776,12 +2703,21 @@ async def company_group_tree(companyId: int, db: Session = Depends(get_db)):
 # 角色相关接口
 @app.post("/ces/role/list/page")
 async def role_list_page(request: Request, db: Session = Depends(get_db)):
+    # 获取请求参数，没有请求体或请求体格式错误时使用默认值
     try:
-        # 获取请求参数
-        request_data = await request.json()
-        name = request_data.get("name", "")
-        page_no = request_data.get("pageNo", 1)
-        page_size = request_data.get("pageSize", 10)
+        body = await requestbody.parse(request, RolePageRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e)
+    return await run_in_threadpool(_query_role_list_page, db, body)
+
+def _query_role_list_page(db, body):
+    """角色分页查询，在线程池中执行"""
+    try:
+        name = body.name
+        page_no = body.pageNo
+        page_size = body.pageSize
+        cursor = body.cursor
+        with_total = body.withTotal
         
         # 查询条件
         query = db.query(models.Role)
@@ -2790,11 +2726,25 @@ async def role_list_page(request: Request, db: Session = Depends(get_db)):
         if name:
             query = query.filter(models.Role.name.like(f"%{name}%"))
         
-        # 计算总数
-        total = query.count()
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("role", ("roles",), {
+            "name": name
+        })
+        total = cache.counts.get(count_key)
         
         # 分页
-        roles = query.offset((page_no - 1) * page_size).limit(page_size).all()
+        next_cursor = None
+        if cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET
+            page_size = pagination.cursor_page_size(page_size)
+            if total is None and with_total:
+                total = query.count()
+            roles = pagination.apply_cursor(query, models.Role.id, cursor, page_size).all()
+            roles, next_cursor = pagination.split_page(roles, page_size)
+            page_no = 0
+        else:
+            roles, total = pagination.offset_page(query, models.Role.id, page_no, page_size, total, with_total)
+        cache.counts.set(count_key, total)
         
         # 构建结果
         records = []
@@ -2812,23 +2762,25 @@ async def role_list_page(request: Request, db: Session = Depends(get_db)):
             })
         
         # 计算总页数
-        pages = math.ceil(total / page_size) if page_size > 0 else 0
+        pages = pagination.page_count(total, page_size)
         
         response_data = {
             "records": records,
             "total": total,
             "size": page_size,
             "current": page_no,
-            "pages": pages
+            "pages": pages,
+            "nextCursor": next_cursor
         }
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "成功",
             "data": response_data
-        }
+        })
     except Exception as e:
-        return {
+        logger.exception("role_list_page 处理失败")
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"查询失败: {str(e)}",
             "data": {
@@ -2838,13 +2790,13 @@ async def role_list_page(request: Request, db: Session = Depends(get_db)):
                 "current": 0,
                 "pages": 0
             }
-        }
+        })
 
 @app.get("/ces/role/list")
-async def role_list(db: Session = Depends(get_db)):
+async def role_list(db: AsyncSession = Depends(get_async_db)):
     try:
         # 查询所有角色
-        roles = db.query(models.Role).all()
+        roles = (await db.execute(select(models.Role))).scalars().all()
         
         # 构建结果
         role_list = []
@@ -2854,41 +2806,45 @@ async def role_list(db: Session = Depends(get_db)):
                 "name": role.name
             })
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "成功",
             "data": role_list
-        }
+        })
     except Exception as e:
-        return {
+        logger.exception("role_list 处理失败")
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"查询失败: {str(e)}",
             "data": []
-        }
+        })
 
 @app.post("/ces/role/add")
-async def role_add(request: Request, db: Session = Depends(get_db)):
+async def role_add(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 获取请求参数
-        request_data = await request.json()
-        name = request_data.get("name", "")
-        description = request_data.get("description", "")
+        try:
+            body = await requestbody.parse(request, RoleAddRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        name = body.name
+        description = body.description
         
         if not name:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "角色名称不能为空",
                 "data": {}
-            }
+            })
         
         # 检查角色名称是否已存在
-        existing_role = db.query(models.Role).filter(models.Role.name == name).first()
+        existing_role = (await db.execute(select(models.Role).where(models.Role.name == name))).scalars().first()
         if existing_role:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"角色名称 '{name}' 已存在",
                 "data": {}
-            }
+            })
         
         # 创建新角色
         new_role = models.Role(
@@ -2897,59 +2853,65 @@ async def role_add(request: Request, db: Session = Depends(get_db)):
         )
         
         db.add(new_role)
-        db.commit()
+        await db.commit()
+        cache.bump_version("roles")
+        cache.roles.invalidate(new_role.id)
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "添加成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("role_add 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"添加失败: {str(e)}",
             "data": {}
-        }
+        })
 
 @app.post("/ces/role/modify")
-async def role_modify(request: Request, db: Session = Depends(get_db)):
+async def role_modify(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 获取请求参数
-        request_data = await request.json()
-        role_id = request_data.get("id")
-        name = request_data.get("name")
-        description = request_data.get("description")
+        try:
+            body = await requestbody.parse(request, RoleModifyRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        role_id = body.id
+        name = body.name
+        description = body.description
         
         if not role_id:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "角色ID不能为空",
                 "data": {}
-            }
+            })
         
         # 查询角色是否存在
-        role = db.query(models.Role).filter(models.Role.id == role_id).first()
+        role = (await db.execute(select(models.Role).where(models.Role.id == role_id))).scalars().first()
         if not role:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"角色ID {role_id} 不存在",
                 "data": {}
-            }
+            })
         
         # 如果提供了新的名称，检查是否与其他角色重名
         if name and name != role.name:
-            existing_role = db.query(models.Role).filter(
+            existing_role = (await db.execute(select(models.Role).where(
                 models.Role.name == name,
                 models.Role.id != role_id
-            ).first()
+            ))).scalars().first()
             
             if existing_role:
-                return {
+                return JSONResponse(content={
                     "code": "A0001",
                     "msg": f"角色名称 '{name}' 已存在",
                     "data": {}
-                }
+                })
             
             role.name = name
         
@@ -2960,69 +2922,84 @@ async def role_modify(request: Request, db: Session = Depends(get_db)):
         # 更新修改时间
         role.update_time = datetime.now()
         
-        db.commit()
+        await db.commit()
+        cache.bump_version("roles")
+        cache.roles.invalidate(role.id)
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "修改成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("role_modify 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"修改失败: {str(e)}",
             "data": {}
-        }
+        })
 
 @app.delete("/ces/role/delete")
-async def role_delete(id: int, db: Session = Depends(get_db)):
+async def role_delete(id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         # 查询角色是否存在
-        role = db.query(models.Role).filter(models.Role.id == id).first()
+        role = (await db.execute(select(models.Role).where(models.Role.id == id))).scalars().first()
         
         if not role:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"角色ID {id} 不存在",
                 "data": {}
-            }
+            })
         
         # 删除角色
-        db.delete(role)
-        db.commit()
+        await db.delete(role)
+        await db.commit()
+        cache.bump_version("roles")
+        cache.roles.invalidate(id)
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "删除成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("role_delete 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"删除失败: {str(e)}",
             "data": {}
-        }
+        })
 
 # 标签相关接口
 @app.post("/ces/label/list/page")
 async def label_list_page(request: Request, db: Session = Depends(get_db)):
+    # 获取请求参数，没有请求体或请求体格式错误时使用默认值
     try:
-        # 获取请求参数
-        request_data = await request.json()
-        company_id = request_data.get("companyId", 0)
-        name = request_data.get("name", "")
-        page_no = request_data.get("pageNo", 1)
-        page_size = request_data.get("pageSize", 10)
-        label_type = request_data.get("type", 0)
+        body = await requestbody.parse(request, LabelPageRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e)
+    return await run_in_threadpool(_query_label_list_page, db, body)
+
+def _query_label_list_page(db, body):
+    """标签分页查询，在线程池中执行"""
+    try:
+        company_id = body.companyId
+        name = body.name
+        page_no = body.pageNo
+        page_size = body.pageSize
+        cursor = body.cursor
+        with_total = body.withTotal
+        label_type = body.type
         
         # 查询条件
         query = db.query(models.Label)
         
         # 如果提供了name参数，添加过滤条件
         if name:
-            query = query.filter(models.Label.name.like(f"%{name}%"))
+            query = query.filter(search.contains(models.Label.name, name))
         
         # 如果提供了type参数，添加过滤条件
         if label_type and label_type > 0:
@@ -3041,7 +3018,7 @@ async def label_list_page(request: Request, db: Session = Depends(get_db)):
                 query = query.filter(models.Label.id.in_(label_ids))
             else:
                 # 如果没有与该局点关联的标签，返回空结果
-                return {
+                return JSONResponse(content={
                     "code": "00000",
                     "msg": "成功",
                     "data": {
@@ -3049,35 +3026,54 @@ async def label_list_page(request: Request, db: Session = Depends(get_db)):
                         "total": 0,
                         "size": page_size,
                         "current": page_no,
-                        "pages": 0
+                        "pages": 0,
+                        "nextCursor": None
                     }
-                }
+                })
         
-        # 计算总数
-        total = query.count()
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("label", ("labels", "label_companies"), {
+            "companyId": company_id,
+            "name": name,
+            "type": label_type
+        })
+        total = cache.counts.get(count_key)
         
         # 分页
-        labels = query.offset((page_no - 1) * page_size).limit(page_size).all()
+        next_cursor = None
+        if cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET
+            page_size = pagination.cursor_page_size(page_size)
+            if total is None and with_total:
+                total = query.count()
+            labels = pagination.apply_cursor(query, models.Label.id, cursor, page_size).all()
+            labels, next_cursor = pagination.split_page(labels, page_size)
+            page_no = 0
+        else:
+            labels, total = pagination.offset_page(query, models.Label.id, page_no, page_size, total, with_total)
+        cache.counts.set(count_key, total)
+        
+        # 一次性查询本页所有标签关联的局点 (按关联表顺序)
+        label_company_map = {label.id: ([], []) for label in labels}
+        if labels:
+            label_company_rows = db.query(
+                models.LabelCompany.label_id,
+                models.Company.id,
+                models.Company.name
+            ).join(
+                models.Company, models.LabelCompany.company_id == models.Company.id
+            ).filter(
+                models.LabelCompany.label_id.in_(list(label_company_map))
+            ).order_by(models.LabelCompany.id).all()
+            
+            for label_id, company_id, company_name in label_company_rows:
+                label_company_map[label_id][0].append(str(company_id))
+                label_company_map[label_id][1].append(company_name)
         
         # 构建结果
         records = []
         for label in labels:
-            # 查询标签关联的局点
-            label_companies = db.query(models.LabelCompany).filter(
-                models.LabelCompany.label_id == label.id
-            ).all()
-            
-            company_ids = []
-            company_names = []
-            
-            for lc in label_companies:
-                company = db.query(models.Company).filter(
-                    models.Company.id == lc.company_id
-                ).first()
-                
-                if company:
-                    company_ids.append(str(company.id))
-                    company_names.append(company.name)
+            company_ids, company_names = label_company_map[label.id]
             
             # 类型名称
             type_value = LABEL_TYPE.get(label.type, "")
@@ -3092,23 +3088,25 @@ async def label_list_page(request: Request, db: Session = Depends(get_db)):
             })
         
         # 计算总页数
-        pages = math.ceil(total / page_size) if page_size > 0 else 0
+        pages = pagination.page_count(total, page_size)
         
         response_data = {
             "records": records,
             "total": total,
             "size": page_size,
             "current": page_no,
-            "pages": pages
+            "pages": pages,
+            "nextCursor": next_cursor
         }
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "成功",
             "data": response_data
-        }
+        })
     except Exception as e:
-        return {
+        logger.exception("label_list_page 处理失败")
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"查询失败: {str(e)}",
             "data": {
@@ -3118,42 +3116,45 @@ async def label_list_page(request: Request, db: Session = Depends(get_db)):
                 "current": 0,
                 "pages": 0
             }
-        }
+        })
 
 @app.post("/ces/label/add")
-async def label_add(request: Request, db: Session = Depends(get_db)):
+async def label_add(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 获取请求参数
-        request_data = await request.json()
-        name = request_data.get("name", "")
-        label_type = request_data.get("type", 0)
+        try:
+            body = await requestbody.parse(request, LabelAddRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        name = body.name
+        label_type = body.type
         
         if not name:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "标签名称不能为空",
                 "data": {}
-            }
+            })
         
         if not label_type or label_type not in LABEL_TYPE:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "标签类别无效",
                 "data": {}
-            }
+            })
         
         # 检查标签名称是否已存在
-        existing_label = db.query(models.Label).filter(
+        existing_label = (await db.execute(select(models.Label).where(
             models.Label.name == name,
             models.Label.type == label_type
-        ).first()
+        ))).scalars().first()
         
         if existing_label:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"同类别下标签名称 '{name}' 已存在",
                 "data": {}
-            }
+            })
         
         # 创建新标签
         new_label = models.Label(
@@ -3162,61 +3163,66 @@ async def label_add(request: Request, db: Session = Depends(get_db)):
         )
         
         db.add(new_label)
-        db.commit()
-        db.refresh(new_label)
+        await db.commit()
+        cache.bump_version("labels", "label_companies")
+        await db.refresh(new_label)
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "添加成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("label_add 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"添加失败: {str(e)}",
             "data": {}
-        }
+        })
 
 @app.post("/ces/label/modify")
-async def label_modify(request: Request, db: Session = Depends(get_db)):
+async def label_modify(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 获取请求参数
-        request_data = await request.json()
-        label_id = request_data.get("id")
-        name = request_data.get("name")
-        label_type = request_data.get("type")
+        try:
+            body = await requestbody.parse(request, LabelModifyRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        label_id = body.id
+        name = body.name
+        label_type = body.type
         
         if not label_id:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "标签ID不能为空",
                 "data": {}
-            }
+            })
         
         # 查询标签是否存在
-        label = db.query(models.Label).filter(models.Label.id == label_id).first()
+        label = (await db.execute(select(models.Label).where(models.Label.id == label_id))).scalars().first()
         if not label:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"标签ID {label_id} 不存在",
                 "data": {}
-            }
+            })
         
         # 如果提供了新的名称和类型，检查是否与其他标签重名
         if name is not None and label_type is not None and (name != label.name or label_type != label.type):
-            existing_label = db.query(models.Label).filter(
+            existing_label = (await db.execute(select(models.Label).where(
                 models.Label.name == name,
                 models.Label.type == label_type,
                 models.Label.id != label_id
-            ).first()
+            ))).scalars().first()
             
             if existing_label:
-                return {
+                return JSONResponse(content={
                     "code": "A0001",
                     "msg": f"同类别下标签名称 '{name}' 已存在",
                     "data": {}
-                }
+                })
         
         # 更新名称
         if name is not None:
@@ -3229,92 +3235,97 @@ async def label_modify(request: Request, db: Session = Depends(get_db)):
         # 更新修改时间
         label.update_time = datetime.now()
         
-        db.commit()
+        await db.commit()
+        cache.bump_version("labels", "label_companies")
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "修改成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("label_modify 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"修改失败: {str(e)}",
             "data": {}
-        }
+        })
 
 @app.delete("/ces/label/delete")
-async def label_delete(id: int, db: Session = Depends(get_db)):
+async def label_delete(id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         # 查询标签是否存在
-        label = db.query(models.Label).filter(models.Label.id == id).first()
+        label = (await db.execute(select(models.Label).where(models.Label.id == id))).scalars().first()
         
         if not label:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"标签ID {id} 不存在",
                 "data": {}
-            }
+            })
         
         # 删除标签关联的局点
-        db.query(models.LabelCompany).filter(
+        await db.execute(delete(models.LabelCompany).where(
             models.LabelCompany.label_id == id
-        ).delete()
+        ))
         
         # 删除标签
-        db.delete(label)
-        db.commit()
+        await db.delete(label)
+        await db.commit()
+        cache.bump_version("labels", "label_companies")
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "删除成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("label_delete 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"删除失败: {str(e)}",
             "data": {}
-        }
+        })
 
 @app.post("/ces/label/configure/label_company")
-async def label_configure_company(request: Request, db: Session = Depends(get_db)):
+async def label_configure_company(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 获取请求参数
-        request_data = await request.json()
-        label_id = request_data.get("id")
-        company_list = request_data.get("companyList", [])
+        try:
+            body = await requestbody.parse(request, LabelConfigureRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        label_id = body.id
+        company_list = body.companyList
         
         if not label_id:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "标签ID不能为空",
                 "data": {}
-            }
+            })
         
         # 查询标签是否存在
-        label = db.query(models.Label).filter(models.Label.id == label_id).first()
+        label = (await db.execute(select(models.Label).where(models.Label.id == label_id))).scalars().first()
         if not label:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"标签ID {label_id} 不存在",
                 "data": {}
-            }
+            })
         
         # 删除标签之前的关联局点
-        db.query(models.LabelCompany).filter(
+        await db.execute(delete(models.LabelCompany).where(
             models.LabelCompany.label_id == label_id
-        ).delete()
+        ))
         
         # 添加新的关联局点
         if company_list:
             for company_id in company_list:
                 # 检查局点是否存在
-                company = db.query(models.Company).filter(
-                    models.Company.id == company_id
-                ).first()
+                company = await cache.companies.aget(db, company_id)
                 
                 if company:
                     # 创建新的关联关系
@@ -3325,20 +3336,22 @@ async def label_configure_company(request: Request, db: Session = Depends(get_db
                     
                     db.add(new_label_company)
         
-        db.commit()
+        await db.commit()
+        cache.bump_version("label_companies")
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "配置成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("label_configure_company 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"配置失败: {str(e)}",
             "data": {}
-        }
+        })
 
 # 账号管理相关模型
 class AccountItem(BaseModel):
@@ -3372,44 +3385,63 @@ class AccountPageResponse(BaseModel):
     msg: str
     data: AccountPageData
 
-class AccountPageRequest(BaseModel):
-    tenantId: Optional[int] = None
-    companyId: Optional[int] = None
-    marketingGroups: Optional[List[int]] = None
-    username: Optional[str] = ""
-    realName: Optional[str] = ""
-    enabled: Optional[int] = None
-    expired: Optional[int] = None
-    pageNo: Optional[int] = 1
-    pageSize: Optional[int] = 10
-
-class AccountAddRequest(BaseModel):
-    tenantId: int
-    companyId: int
-    username: str
-    realName: str
-    password: str
-    roleId: int
-    marketingGroups: List[int] = []
-    enabled: int = 1
-    expireDate: Optional[str] = None
+class AccountPageRequest(PageRequest):
+    tenantId: IdFilter = None
+    companyId: IdFilter = None
+    marketingGroups: RefIdList = Field(default_factory=list)
+    username: Text = ""
+    realName: Text = ""
+    # 布尔值或整数，由接口按原始类型处理
+    enabled: Any = None
+    expired: Any = None
+
+def _account_enabled_filter(enabled):
+    """是否启用筛选：true或1为启用(1)，其他值为禁用(0)，None不筛选"""
+    if enabled is None:
+        return None
+    if isinstance(enabled, bool):
+        return 1 if enabled else 0
+    return 1 if enabled == 1 else 0
+
+def _account_expired_filter(expired):
+    """是否到期筛选：true或1为已到期(1)，false或2为未到期(2)，其他值不筛选"""
+    if isinstance(expired, bool):
+        return 1 if expired else 2
+    if expired == 1 or expired == 2:
+        return int(expired)
+    return None
+
+class AccountAddRequest(RequestBody):
+    # 直接写入账号，不校验是否存在
+    tenantId: RefId = None
+    companyId: RefId = None
+    username: Text = ""
+    realName: Text = ""
+    password: Text = "123456"  # 默认密码
+    roleId: RefId = None
+    marketingGroups: IdList = Field(default_factory=list)
+    enabled: Any = 1
+    validityType: Text = "custom"
+    expireDate: Text = None
 
 class AccountAddResponse(BaseModel):
     code: str
     msg: str
     data: Optional[Dict] = {}
 
-class AccountModifyRequest(BaseModel):
-    id: int
-    tenantId: Optional[int] = None
-    companyId: Optional[int] = None
-    username: Optional[str] = None
-    realName: Optional[str] = None
-    password: Optional[str] = None
-    roleId: Optional[int] = None
-    marketingGroups: Optional[List[int]] = None
-    enabled: Optional[int] = None
-    expireDate: Optional[str] = None
+class AccountModifyRequest(RequestBody):
+    id: RefId = None
+    # 直接写入账号，不校验是否存在
+    tenantId: RefId = None
+    companyId: RefId = None
+    username: Text = None
+    realName: Text = None
+    password: Text = None
+    roleId: RefId = None
+    marketingGroups: IdList = None
+    enabled: Any = None
+    validityType: Text = None
+    expireDate: Text = None
 
 class AccountModifyResponse(BaseModel):
     code: str
@@ -3435,18 +3467,28 @@ EXPIRED_STATUS = {
 # 账号管理相关API
 @app.post("/ces/account/list/page")
 async def account_list_page(request: Request, db: Session = Depends(get_db)):
+    # 获取请求参数，没有请求体或请求体格式错误时使用默认值
     try:
-        # 获取请求参数
-        request_data = await request.json()
-        tenant_id = request_data.get("tenantId")
-        company_id = request_data.get("companyId")
-        marketing_groups = request_data.get("marketingGroups", [])
-        username = request_data.get("username", "")
-        real_name = request_data.get("realName", "")
-        enabled = request_data.get("enabled")
-        expired = request_data.get("expired")
-        page_no = request_data.get("pageNo", 1)
-        page_size = request_data.get("pageSize", 10)
+        body = await requestbody.parse(request, AccountPageRequest, lenient=True)
+    except requestbody.BodyError as e:
+        return body_error_response(e)
+    return await run_in_threadpool(_query_account_list_page, db, body)
+
+def _query_account_list_page(db, body):
+    """账号分页查询，在线程池中执行"""
+    try:
+        tenant_id = body.tenantId
+        company_id = body.companyId
+        marketing_groups = body.marketingGroups
+        username = body.username
+        real_name = body.realName
+        # 布尔值或整数先归一化为筛选值，查询条件和总数缓存key都使用归一化后的值
+        enabled = _account_enabled_filter(body.enabled)
+        expired = _account_expired_filter(body.expired)
+        page_no = body.pageNo
+        page_size = body.pageSize
+        cursor = body.cursor
+        with_total = body.withTotal
         
         # 查询条件
         query = db.query(models.UserAccount)
@@ -3459,41 +3501,27 @@ async def account_list_page(request: Request, db: Session = Depends(get_db)):
             query = query.filter(models.UserAccount.company_id == company_id)
         
         if username:
-            query = query.filter(models.UserAccount.account.like(f"%{username}%"))
+            query = query.filter(search.contains(models.UserAccount.account, username))
         
         if real_name:
-            query = query.filter(models.UserAccount.name.like(f"%{real_name}%"))
+            query = query.filter(search.contains(models.UserAccount.name, real_name))
         
-        # 处理是否启用参数 (处理布尔值或整数)
+        # 是否启用
         if enabled is not None:
-            if isinstance(enabled, bool):
-                query = query.filter(models.UserAccount.is_enabled == (1 if enabled else 0))
-            else:
-                query = query.filter(models.UserAccount.is_enabled == (1 if enabled == 1 else 0))
+            query = query.filter(models.UserAccount.is_enabled == enabled)
         
-        # 处理是否到期参数 (处理布尔值或整数)
+        # 是否到期
         if expired is not None:
             current_time = datetime.now()
-            if isinstance(expired, bool):
-                if expired:  # 已到期
-                    query = query.filter(models.UserAccount.expire_date < current_time)
-                else:  # 未到期
-                    query = query.filter(
-                        or_(
-                            models.UserAccount.expire_date >= current_time,
-                            models.UserAccount.expire_date == None
-                        )
-                    )
-            else:
-                if expired == 1:  # 已到期
-                    query = query.filter(models.UserAccount.expire_date < current_time)
-                elif expired == 2:  # 未到期
-                    query = query.filter(
-                        or_(
-                            models.UserAccount.expire_date >= current_time,
-                            models.UserAccount.expire_date == None
-                        )
+            if expired == 1:  # 已到期
+                query = query.filter(models.UserAccount.expire_date < current_time)
+            else:  # 未到期
+                query = query.filter(
+                    or_(
+                        models.UserAccount.expire_date >= current_time,
+                        models.UserAccount.expire_date == None
                     )
+                )
         
         # 如果提供了营销组ID，添加过滤条件 (使用关联表查询)
         if marketing_groups and len(marketing_groups) > 0:
@@ -3508,7 +3536,7 @@ async def account_list_page(request: Request, db: Session = Depends(get_db)):
                 query = query.filter(models.UserAccount.id.in_(account_ids))
             else:
                 # 没有找到相关账号，返回空结果
-                return {
+                return JSONResponse(content={
                     "code": "00000",
                     "msg": "成功",
                     "data": {
@@ -3516,51 +3544,65 @@ async def account_list_page(request: Request, db: Session = Depends(get_db)):
                         "total": 0,
                         "size": page_size,
                         "current": page_no,
-                        "pages": 0
+                        "pages": 0,
+                        "nextCursor": None
                     }
-                }
-        
-        # 计算总数
-        total = query.count()
+                })
+        
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("account", ("user_accounts", "account_groups"), {
+            "tenantId": tenant_id,
+            "companyId": company_id,
+            "marketingGroups": marketing_groups,
+            "username": username,
+            "realName": real_name,
+            "enabled": enabled,
+            "expired": expired
+        })
+        total = cache.counts.get(count_key)
         
         # 分页
-        accounts = query.offset((page_no - 1) * page_size).limit(page_size).all()
+        next_cursor = None
+        if cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET
+            page_size = pagination.cursor_page_size(page_size)
+            if total is None and with_total:
+                total = query.count()
+            accounts = pagination.apply_cursor(query, models.UserAccount.id, cursor, page_size).all()
+            accounts, next_cursor = pagination.split_page(accounts, page_size)
+            page_no = 0
+        else:
+            accounts, total = pagination.offset_page(query, models.UserAccount.id, page_no, page_size, total, with_total)
+        cache.counts.set(count_key, total)
+        
+        # 一次性查询本页所有账号的营销组id (按关联表顺序)
+        account_group_map = {account.id: [] for account in accounts}
+        if accounts:
+            account_group_rows = db.query(
+                models.AccountGroup.account_id,
+                models.AccountGroup.group_id
+            ).filter(
+                models.AccountGroup.account_id.in_(list(account_group_map))
+            ).order_by(models.AccountGroup.id).all()
+            
+            for account_id, group_id in account_group_rows:
+                account_group_map[account_id].append(group_id)
+        
+        # 租户、局点、角色、营销组名称从维度缓存批量获取
+        tenant_map = cache.tenants.get_many(db, [account.tenant_id for account in accounts])
+        company_map = cache.companies.get_many(db, [account.company_id for account in accounts])
+        role_map = cache.roles.get_many(db, [account.role_id for account in accounts])
+        group_map = cache.groups.get_many(db, [group_id for group_ids in account_group_map.values() for group_id in group_ids])
         
         # 构建结果
         records = []
         for account in accounts:
-            # 查询关联的租户
-            tenant = db.query(models.Tenant).filter(
-                models.Tenant.id == account.tenant_id
-            ).first()
-            
-            # 查询关联的局点
-            company = db.query(models.Company).filter(
-                models.Company.id == account.company_id
-            ).first()
-            
-            # 查询关联的角色
-            role = db.query(models.Role).filter(
-                models.Role.id == account.role_id
-            ).first()
-            
-            # 查询关联的营销组 (从关联表获取全部营销组)
-            group_ids = []
-            group_names = []
-            
-            # 从关联表获取全部营销组
-            account_groups = db.query(models.AccountGroup).filter(
-                models.AccountGroup.account_id == account.id
-            ).all()
-            
-            for account_group in account_groups:
-                group = db.query(models.Group).filter(
-                    models.Group.id == account_group.group_id
-                ).first()
-                
-                if group:
-                    group_ids.append(group.id)
-                    group_names.append(group.name)
+            tenant = tenant_map.get(account.tenant_id)
+            company = company_map.get(account.company_id)
+            role = role_map.get(account.role_id)
+            # 已删除的营销组不返回
+            group_ids = [group_id for group_id in account_group_map[account.id] if group_id in group_map]
+            group_names = [group_map[group_id].name for group_id in group_ids]
             
             # 判断是否过期
             expired_status = 0
@@ -3593,23 +3635,25 @@ async def account_list_page(request: Request, db: Session = Depends(get_db)):
             })
         
         # 计算总页数
-        pages = math.ceil(total / page_size) if page_size > 0 else 0
+        pages = pagination.page_count(total, page_size)
         
         response_data = {
             "records": records,
             "total": total,
             "size": page_size,
             "current": page_no,
-            "pages": pages
+            "pages": pages,
+            "nextCursor": next_cursor
         }
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "成功",
             "data": response_data
-        }
+        })
     except Exception as e:
-        return {
+        logger.exception("account_list_page 处理失败")
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"查询失败: {str(e)}",
             "data": {
@@ -3619,63 +3663,66 @@ async def account_list_page(request: Request, db: Session = Depends(get_db)):
                 "current": 0,
                 "pages": 0
             }
-        }
+        })
 
 @app.post("/ces/account/add")
-async def account_add(request: Request, db: Session = Depends(get_db)):
+async def account_add(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 获取请求参数
-        request_data = await request.json()
-        tenant_id = request_data.get("tenantId")
-        company_id = request_data.get("companyId")
-        username = request_data.get("username", "")
-        real_name = request_data.get("realName", "")
-        password = request_data.get("password", "123456")  # 使用默认密码123456
-        role_id = request_data.get("roleId")
-        marketing_groups = request_data.get("marketingGroups", [])
-        enabled = request_data.get("enabled", 1)
-        validity_type = request_data.get("validityType", "custom")
-        expire_date_str = request_data.get("expireDate")
+        try:
+            body = await requestbody.parse(request, AccountAddRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        tenant_id = body.tenantId
+        company_id = body.companyId
+        username = body.username
+        real_name = body.realName
+        password = body.password  # 使用默认密码123456
+        role_id = body.roleId
+        marketing_groups = body.marketingGroups
+        enabled = body.enabled
+        validity_type = body.validityType
+        expire_date_str = body.expireDate
         
         if not username:
-            return {
+            return JSONResponse(content={
                 "code": "A0001", 
                 "msg": "用户账号不能为空",
                 "data": {}
-            }
+            })
         
         if not real_name:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "用户名称不能为空",
                 "data": {}
-            }
+            })
         
         if not tenant_id:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "运营商ID不能为空",
                 "data": {}
-            }
+            })
         
         if not company_id:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "局点ID不能为空",
                 "data": {}
-            }
+            })
         
         # 检查用户账号是否已存在
-        existing_account = db.query(models.UserAccount).filter(
+        existing_account = (await db.execute(select(models.UserAccount).where(
             models.UserAccount.account == username
-        ).first()
+        ))).scalars().first()
         
         if existing_account:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"用户账号 '{username}' 已存在",
                 "data": {}
-            }
+            })
         
         # 处理过期日期
         expire_date = None
@@ -3686,11 +3733,11 @@ async def account_add(request: Request, db: Session = Depends(get_db)):
                 try:
                     expire_date = datetime.strptime(expire_date_str, "%Y-%m-%d")
                 except ValueError:
-                    return {
+                    return JSONResponse(content={
                         "code": "A0001",
                         "msg": "过期日期格式错误，请使用YYYY-MM-DD HH:MM:SS或YYYY-MM-DD格式",
                         "data": {}
-                    }
+                    })
         
         # 提取主营销组ID（如果有多个，取第一个用于兼容旧字段）
         group_id = None
@@ -3711,8 +3758,9 @@ async def account_add(request: Request, db: Session = Depends(get_db)):
         )
         
         db.add(new_account)
-        db.commit()
-        db.refresh(new_account)
+        await db.commit()
+        cache.bump_version("user_accounts", "account_groups")
+        await db.refresh(new_account)
         
         # 创建账号-营销组关联
         if isinstance(marketing_groups, list) and marketing_groups:
@@ -3723,67 +3771,72 @@ async def account_add(request: Request, db: Session = Depends(get_db)):
                 )
                 db.add(account_group)
             
-            db.commit()
+            await db.commit()
+            cache.bump_version("user_accounts", "account_groups")
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "添加成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("account_add 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"添加失败: {str(e)}",
             "data": {}
-        }
+        })
 
 @app.post("/ces/account/modify")
-async def account_modify(request: Request, db: Session = Depends(get_db)):
+async def account_modify(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # 获取请求参数
-        request_data = await request.json()
-        account_id = request_data.get("id")
-        tenant_id = request_data.get("tenantId")
-        company_id = request_data.get("companyId")
-        username = request_data.get("username")
-        real_name = request_data.get("realName")
-        password = request_data.get("password")
-        role_id = request_data.get("roleId")
-        marketing_groups = request_data.get("marketingGroups")
-        enabled = request_data.get("enabled")
-        validity_type = request_data.get("validityType")
-        expire_date_str = request_data.get("expireDate")
+        try:
+            body = await requestbody.parse(request, AccountModifyRequest)
+        except requestbody.BodyError as e:
+            return body_error_response(e)
+        account_id = body.id
+        tenant_id = body.tenantId
+        company_id = body.companyId
+        username = body.username
+        real_name = body.realName
+        password = body.password
+        role_id = body.roleId
+        marketing_groups = body.marketingGroups
+        enabled = body.enabled
+        validity_type = body.validityType
+        expire_date_str = body.expireDate
         
         if not account_id:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": "账号ID不能为空",
                 "data": {}
-            }
+            })
         
         # 查询账号是否存在
-        account = db.query(models.UserAccount).filter(models.UserAccount.id == account_id).first()
+        account = (await db.execute(select(models.UserAccount).where(models.UserAccount.id == account_id))).scalars().first()
         if not account:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"账号ID {account_id} 不存在",
                 "data": {}
-            }
+            })
         
         # 如果提供了新的用户账号，检查是否与其他账号重名
         if username is not None and username != account.account:
-            existing_account = db.query(models.UserAccount).filter(
+            existing_account = (await db.execute(select(models.UserAccount).where(
                 models.UserAccount.account == username,
                 models.UserAccount.id != account_id
-            ).first()
+            ))).scalars().first()
             
             if existing_account:
-                return {
+                return JSONResponse(content={
                     "code": "A0001",
                     "msg": f"用户账号 '{username}' 已存在",
                     "data": {}
-                }
+                })
         
         # 更新账号信息
         if username is not None:
@@ -3813,9 +3866,9 @@ async def account_modify(request: Request, db: Session = Depends(get_db)):
                 account.group_id = None  # 如果是空列表，则清空营销组
             
             # 清除旧的账号-营销组关联
-            db.query(models.AccountGroup).filter(
+            await db.execute(delete(models.AccountGroup).where(
                 models.AccountGroup.account_id == account_id
-            ).delete()
+            ))
             
             # 创建新的账号-营销组关联
             if isinstance(marketing_groups, list) and marketing_groups:
@@ -3840,64 +3893,68 @@ async def account_modify(request: Request, db: Session = Depends(get_db)):
                         expire_date = datetime.strptime(expire_date_str, "%Y-%m-%d")
                         account.expire_date = expire_date
                     except ValueError:
-                        return {
+                        return JSONResponse(content={
                             "code": "A0001",
                             "msg": "过期日期格式错误，请使用YYYY-MM-DD HH:MM:SS或YYYY-MM-DD格式",
                             "data": {}
-                        }
+                        })
             else:
                 account.expire_date = None
         
         # 更新修改时间
         account.update_time = datetime.now()
         
-        db.commit()
+        await db.commit()
+        cache.bump_version("user_accounts", "account_groups")
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "修改成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("account_modify 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"修改失败: {str(e)}",
             "data": {}
-        }
+        })
 
 @app.delete("/ces/account/delete")
-async def account_delete(id: int, db: Session = Depends(get_db)):
+async def account_delete(id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         # 查询账号是否存在
-        account = db.query(models.UserAccount).filter(models.UserAccount.id == id).first()
+        account = (await db.execute(select(models.UserAccount).where(models.UserAccount.id == id))).scalars().first()
         
         if not account:
-            return {
+            return JSONResponse(content={
                 "code": "A0001",
                 "msg": f"账号ID {id} 不存在",
                 "data": {}
-            }
+            })
         
         # 删除账号-营销组关联
-        db.query(models.AccountGroup).filter(models.AccountGroup.account_id == id).delete()
+        await db.execute(delete(models.AccountGroup).where(models.AccountGroup.account_id == id))
         
         # 删除账号
-        db.delete(account)
-        db.commit()
+        await db.delete(account)
+        await db.commit()
+        cache.bump_version("user_accounts", "account_groups")
         
-        return {
+        return JSONResponse(content={
             "code": "00000",
             "msg": "删除成功",
             "data": {}
-        }
+        })
     except Exception as e:
-        db.rollback()
-        return {
+        logger.exception("account_delete 处理失败")
+        await db.rollback()
+        return JSONResponse(content={
             "code": "A0002",
             "msg": f"删除失败: {str(e)}",
             "data": {}
-        }
+        })
 
 # 用户分页查询请求模型
 class UserPageRequest(BaseModel):
@@ -3910,6 +3967,8 @@ class UserPageRequest(BaseModel):
     status: Optional[int] = 0
     tenantId: Optional[int] = 0
     username: Optional[str] = ""
+    cursor: Optional[str] = None
+    withTotal: WithTotal = True
 
 # 用户详情项模型
 class UserDetailItem(BaseModel):
@@ -3933,10 +3992,11 @@ class UserDetailItem(BaseModel):
 # 用户分页数据模型
 class UserPageData(BaseModel):
     records: List[UserDetailItem]
-    total: int
+    total: Optional[int] = None
     size: int
     current: int
-    pages: int
+    pages: Optional[int] = None
+    nextCursor: Optional[str] = None
 
 # 用户分页查询响应模型
 class UserPageResponse(BaseModel):
@@ -3998,7 +4058,7 @@ class UserRoleRequest(BaseModel):
 
 # 用户相关接口
 @app.post("/ces/user/list/page", response_model=UserPageResponse)
-async def user_list_page(request: UserPageRequest, db: Session = Depends(get_db)):
+def user_list_page(request: UserPageRequest, db: Session = Depends(get_db)):
     try:
         # 构建查询条件
         query = db.query(models.User)
@@ -4012,20 +4072,44 @@ async def user_list_page(request: UserPageRequest, db: Session = Depends(get_db)
         if request.expire > 0:
             query = query.filter(models.User.expire == request.expire)
         if request.name:
-            query = query.filter(models.User.name.like(f"%{request.name}%"))
+            query = query.filter(search.contains(models.User.name, request.name))
         if request.username:
-            query = query.filter(models.User.username.like(f"%{request.username}%"))
+            query = query.filter(search.contains(models.User.username, request.username))
         if request.groupId > 0:
             query = query.join(models.user_groups).filter(models.user_groups.c.group_id == request.groupId)
 
-        # 计算总数和分页
-        total = query.count()
         page_size = request.pageSize if request.pageSize > 0 else 10
         page_no = request.pageNo if request.pageNo > 0 else 1
-        pages = math.ceil(total / page_size)
+        
+        # 预加载关联数据：多对一用JOIN，多对多集合各用一次IN查询
+        # 整页固定为 分页(含总数) + 班组 + 角色 共3条SQL
+        query = query.options(
+            joinedload(models.User.tenant),
+            joinedload(models.User.company),
+            selectinload(models.User.groups),
+            selectinload(models.User.roles)
+        )
+        
+        # 相同过滤条件的总数在依赖表没有写入之前直接复用缓存
+        count_key = cache.counts.key("user", ("users", "user_groups"), request.model_dump(
+            include={"companyId", "tenantId", "status", "expire", "name", "username", "groupId"}
+        ))
+        total = cache.counts.get(count_key)
+        with_total = request.withTotal is not False
         
         # 获取分页数据
-        users = query.offset((page_no - 1) * page_size).limit(page_size).all()
+        next_cursor = None
+        if request.cursor is not None:
+            # 游标模式：按主键seek，不再使用OFFSET，总数单独COUNT
+            if total is None and with_total:
+                total = query.count()
+            users = pagination.apply_cursor(query, models.User.id, request.cursor, page_size).all()
+            users, next_cursor = pagination.split_page(users, page_size)
+            page_no = 0
+        else:
+            users, total = pagination.offset_page(query, models.User.id, page_no, page_size, total, with_total)
+        cache.counts.set(count_key, total)
+        pages = pagination.page_count(total, page_size)
         
         # 构建返回数据
         records = []
@@ -4062,10 +4146,12 @@ async def user_list_page(request: UserPageRequest, db: Session = Depends(get_db)
                 total=total,
                 size=page_size,
                 current=page_no,
-                pages=pages
+                pages=pages,
+                nextCursor=next_cursor
             )
         )
     except Exception as e:
+        logger.exception("user_list_page 处理失败")
         return UserPageResponse(
             code="99999",
             msg=str(e),
@@ -4073,7 +4159,7 @@ async def user_list_page(request: UserPageRequest, db: Session = Depends(get_db)
         )
 
 @app.post("/ces/user/add", response_model=UserAddResponse)
-async def user_add(request: UserAddRequest, db: Session = Depends(get_db)):
+def user_add(request: UserAddRequest, db: Session = Depends(get_db)):
     try:
         # 检查用户名是否已存在
         if db.query(models.User).filter(models.User.username == request.username).first():
@@ -4093,15 +4179,17 @@ async def user_add(request: UserAddRequest, db: Session = Depends(get_db)):
         
         db.add(user)
         db.commit()
+        cache.bump_version("users", "user_groups", "user_roles")
         db.refresh(user)
         
         return UserAddResponse(code="00000", msg="success", data={})
     except Exception as e:
+        logger.exception("user_add 处理失败")
         db.rollback()
         return UserAddResponse(code="99999", msg=str(e), data={})
 
 @app.post("/ces/user/modify", response_model=UserModifyResponse)
-async def user_modify(request: UserModifyRequest, db: Session = Depends(get_db)):
+def user_modify(request: UserModifyRequest, db: Session = Depends(get_db)):
     try:
         user = db.query(models.User).filter(models.User.id == request.id).first()
         if not user:
@@ -4112,13 +4200,15 @@ async def user_modify(request: UserModifyRequest, db: Session = Depends(get_db))
         user.update_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         db.commit()
+        cache.bump_version("users")
         return UserModifyResponse(code="00000", msg="success", data={})
     except Exception as e:
+        logger.exception("user_modify 处理失败")
         db.rollback()
         return UserModifyResponse(code="99999", msg=str(e), data={})
 
 @app.post("/ces/user/modify/status", response_model=UserModifyResponse)
-async def user_modify_status(request: UserStatusRequest, db: Session = Depends(get_db)):
+def user_modify_status(request: UserStatusRequest, db: Session = Depends(get_db)):
     try:
         # 查询用户是否存在
         user = db.query(models.User).filter(models.User.id == request.id).first()
@@ -4133,6 +4223,7 @@ async def user_modify_status(request: UserStatusRequest, db: Session = Depends(g
         user.status = request.status
         user.update_time = datetime.now()
         db.commit()
+        cache.bump_version("users")
         
         return {
             "code": "00000",
@@ -4140,6 +4231,7 @@ async def user_modify_status(request: UserStatusRequest, db: Session = Depends(g
             "data": {}
         }
     except Exception as e:
+        logger.exception("user_modify_status 处理失败")
         db.rollback()
         return {
             "code": "A0002",
@@ -4148,7 +4240,7 @@ async def user_modify_status(request: UserStatusRequest, db: Session = Depends(g
         }
 
 @app.get("/ces/user/query/detail", response_model=UserDetailResponse)
-async def user_query_detail(userId: int, db: Session = Depends(get_db)):
+def user_query_detail(userId: int, db: Session = Depends(get_db)):
     try:
         user = db.query(models.User).filter(models.User.id == userId).first()
         if not user:
@@ -4164,10 +4256,11 @@ async def user_query_detail(userId: int, db: Session = Depends(get_db)):
         
         return UserDetailResponse(code="00000", msg="success", data=data)
     except Exception as e:
+        logger.exception("user_query_detail 处理失败")
         return UserDetailResponse(code="99999", msg=str(e), data={})
 
 @app.post("/ces/user/configure/user_effectiveDay", response_model=UserModifyResponse)
-async def user_configure_effective_day(request: UserEffectiveDayRequest, db: Session = Depends(get_db)):
+def user_configure_effective_day(request: UserEffectiveDayRequest, db: Session = Depends(get_db)):
     try:
         user = db.query(models.User).filter(models.User.id == request.id).first()
         if not user:
@@ -4177,224 +4270,62 @@ async def user_configure_effective_day(request: UserEffectiveDayRequest, db: Ses
         user.update_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         db.commit()
+        cache.bump_version("users")
         return UserModifyResponse(code="00000", msg="success", data={})
     except Exception as e:
+        logger.exception("user_configure_effective_day 处理失败")
         db.rollback()
         return UserModifyResponse(code="99999", msg=str(e), data={})
 
 @app.post("/ces/user/configure/user_group", response_model=UserModifyResponse)
-async def user_configure_group(request: UserGroupRequest, db: Session = Depends(get_db)):
+def user_configure_group(request: UserGroupRequest, db: Session = Depends(get_db)):
     try:
         user = db.query(models.User).filter(models.User.id == request.id).first()
         if not user:
             return UserModifyResponse(code="99999", msg="用户不存在", data={})
 
-        # 清除原有班组
-        user.groups = []
+        # 清除原有班组：直接删除关联行，并发请求已删除时不会因删除条数不符而失败
+        db.execute(delete(models.user_groups).where(models.user_groups.c.user_id == user.id))
         
         # 添加新班组
-        groups = db.query(models.Group).filter(models.Group.id.in_(request.groupIds)).all()
-        user.groups = groups
+        group_ids = db.scalars(select(models.Group.id).where(models.Group.id.in_(request.groupIds))).all()
+        if group_ids:
+            db.execute(models.user_groups.insert(), [{"user_id": user.id, "group_id": group_id} for group_id in group_ids])
         
         db.commit()
+        cache.bump_version("user_groups")
         return UserModifyResponse(code="00000", msg="success", data={})
     except Exception as e:
+        logger.exception("user_configure_group 处理失败")
         db.rollback()
         return UserModifyResponse(code="99999", msg=str(e), data={})
 
 @app.post("/ces/user/configure/user_role", response_model=UserModifyResponse)
-async def user_configure_role(request: UserRoleRequest, db: Session = Depends(get_db)):
+def user_configure_role(request: UserRoleRequest, db: Session = Depends(get_db)):
     try:
         user = db.query(models.User).filter(models.User.id == request.id).first()
         if not user:
             return UserModifyResponse(code="99999", msg="用户不存在", data={})
 
-        # 清除原有角色
-        user.roles = []
+        # 清除原有角色：直接删除关联行，并发请求已删除时不会因删除条数不符而失败
+        db.execute(delete(models.user_roles).where(models.user_roles.c.user_id == user.id))
         
         # 添加新角色
-        roles = db.query(models.Role).filter(models.Role.id.in_(request.roleIds)).all()
-        user.roles = roles
+        role_ids = db.scalars(select(models.Role.id).where(models.Role.id.in_(request.roleIds))).all()
+        if role_ids:
+            db.execute(models.user_roles.insert(), [{"user_id": user.id, "role_id": role_id} for role_id in role_ids])
         
         db.commit()
+        cache.bump_version("user_roles")
         return UserModifyResponse(code="00000", msg="success", data={})
     except Exception as e:
+        logger.exception("user_configure_role 处理失败")
         db.rollback()
         return UserModifyResponse(code="99999", msg=str(e), data={})
 
 if __name__ == "__main__":
-    import uvicorn
-    # 确保数据库中有测试用户
-    db = models.SessionLocal()
-    try:
-        # 检查是否已存在测试用户
-        test_user = db.query(models.User).filter(models.User.username == "aaa").first()
-        if not test_user:
-            # 创建测试用户
-            hashed_password = utils.get_password_hash("aaa")
-            test_user = models.User(username="aaa", hashed_password=hashed_password)
-            db.add(test_user)
-            db.commit()
-            
-        # 添加示例运营商数据 - 使用更明确的名称
-        tenants_data = [
-            {"id": 1, "name": "中国联通"},
-            {"id": 2, "name": "中国电信"},
-            {"id": 3, "name": "中国移动"}
-        ]
-        
-        # 更新或插入租户数据
-        for tenant_data in tenants_data:
-            tenant = db.query(models.Tenant).filter(models.Tenant.id == tenant_data["id"]).first()
-            if tenant:
-                # 更新租户名称
-                tenant.name = tenant_data["name"]
-            else:
-                # 创建新租户
-                tenant = models.Tenant(id=tenant_data["id"], name=tenant_data["name"])
-                db.add(tenant)
-        
-        # 删除id=7的测试租户（如果存在）
-        test_tenant = db.query(models.Tenant).filter(models.Tenant.id == 7).first()
-        if test_tenant:
-            db.delete(test_tenant)
-        
-        db.commit()
-        
-        # 删除现有公司数据
-        db.query(models.Company).delete()
-        db.commit()
-        
-        # 添加测试公司数据 - 名称更加明确区分
-        test_companies = [
-            # 联通公司
-            {"id": 1, "name": "联通-北京分公司", "tenant_id": 1},
-            {"id": 2, "name": "联通-上海分公司", "tenant_id": 1},
-            {"id": 3, "name": "联通-广州分公司", "tenant_id": 1},
-            
-            # 电信公司
-            {"id": 4, "name": "电信-北京分公司", "tenant_id": 2},
-            {"id": 5, "name": "电信-上海分公司", "tenant_id": 2},
-            {"id": 6, "name": "电信-广州分公司", "tenant_id": 2},
-            
-            # 移动公司
-            {"id": 7, "name": "移动-北京分公司", "tenant_id": 3},
-            {"id": 8, "name": "移动-上海分公司", "tenant_id": 3},
-            {"id": 9, "name": "移动-广州分公司", "tenant_id": 3}
-        ]
-        
-        for company_data in test_companies:
-            company = models.Company(
-                id=company_data["id"],
-                name=company_data["name"],
-                tenant_id=company_data["tenant_id"]
-            )
-            db.add(company)
-        
-        db.commit()
-        companies = db.query(models.Company).all()
-        
-        # 清空现有网格数据
-        db.query(models.Grid).delete()
-        db.commit()
-        
-        # 区域数据 - 为每个城市设置更多的区域
-        city_areas = {
-            "北京": ["朝阳区", "海淀区", "东城区", "西城区", "丰台区", "石景山区", "通州区", "昌平区", "大兴区", "顺义区"],
-            "上海": ["浦东新区", "静安区", "黄浦区", "徐汇区", "长宁区", "虹口区", "普陀区", "杨浦区", "闵行区", "宝山区"],
-            "广州": ["天河区", "越秀区", "海珠区", "白云区", "荔湾区", "番禺区", "花都区", "黄埔区", "南沙区", "增城区"]
-        }
-        
-        # 企业客户类型 - 为不同区域增加企业客户分类
-        business_types = ["政府", "金融", "教育", "医疗", "商业"]
-        
-        # 添加测试网格数据 - 使用更丰富的命名
-        grid_id = 1
-        all_grids = []
-        
-        for company in companies:
-            # 确定城市和运营商
-            if "北京" in company.name:
-                city = "北京"
-                areas = city_areas["北京"]
-            elif "上海" in company.name:
-                city = "上海"
-                areas = city_areas["上海"]
-            elif "广州" in company.name:
-                city = "广州"
-                areas = city_areas["广州"]
-                
-            if "联通" in company.name:
-                operator = "联通"
-            elif "电信" in company.name:
-                operator = "电信"
-            elif "移动" in company.name:
-                operator = "移动"
-            else:
-                operator = ""
-            
-            # 为每个区域创建普通网格
-            for area in areas:
-                grid_name = f"{operator}-{city}{area}网格"
-                all_grids.append(models.Grid(id=grid_id, name=grid_name, company_id=company.id))
-                grid_id += 1
-            
-            # 为前3个区域额外创建企业客户网格
-            for area in areas[:3]:
-                for business_type in business_types:
-                    grid_name = f"{operator}-{city}{area}{business_type}客户网格"
-                    all_grids.append(models.Grid(id=grid_id, name=grid_name, company_id=company.id))
-                    grid_id += 1
-        
-        # 一次性批量添加所有网格
-        db.add_all(all_grids)
-        db.commit()
-        
-        # 统计数据
-        total_grids = db.query(models.Grid).count()
-        print(f"已添加测试数据: {len(tenants_data)}个运营商, {len(test_companies)}个局点, {total_grids}个网格")
-        
-        # 添加小区测试数据
-        # 首先获取所有网格
-        grids = db.query(models.Grid).all()
-        
-        # 为每个网格添加3-5个小区
-        community_names = [
-            "和平小区", "幸福家园", "阳光花园", "翠竹苑", "金色家园", 
-            "未来城", "绿洲花园", "碧水云天", "紫荆苑", "蓝山小区",
-            "梦想家园", "康乐居", "汇景苑", "华府名邸", "锦绣园",
-            "御景华庭", "丽景花园", "凤凰城", "水岸新都", "江南新苑",
-            "星河湾", "帝景豪园", "珠江花园", "山水名苑", "玫瑰园",
-            "香榭丽舍", "半岛华府", "翡翠城", "龙湖花园", "万科城"
-        ]
-        
-        for grid in grids:
-            # 随机选择3-5个不重复的小区名
-            num_communities = random.randint(3, 5)
-            selected_names = random.sample(community_names, num_communities)
-            
-            # 为网格添加小区
-            for name in selected_names:
-                # 添加网格名称前缀，避免小区名称重复
-                grid_prefix = grid.name.split('-')[0]  # 获取运营商名称作为前缀
-                full_name = f"{grid_prefix}-{name}"
-                
-                # 创建小区
-                community = models.Community(
-                    name=full_name,
-                    grid_id=grid.id,
-                    create_time=datetime.now() - timedelta(days=random.randint(0, 365)),
-                    update_time=datetime.now() - timedelta(days=random.randint(0, 30)),
-                    operator_name=random.choice(["管理员", "操作员", "超级管理员", "系统"])
-                )
-                db.add(community)
-        
-        db.commit()
-        
-        print("数据初始化完成!")
-    finally:
-        db.close()
-    
-    # 确保使用8080端口
-    print("正在启动服务器，端口：8080...")
-    uvicorn.run(app, host="0.0.0.0", port=8080) 
\ No newline at end of file
+    # 本地开发启动：先升级数据库结构，再按serve.py的配置启动
+    # 生产环境请使用 python serve.py，演示数据使用 python seed_demo.py --yes
+    import serve
+    migrations.upgrade()
+    serve.main()
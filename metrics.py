@@ -0,0 +1,268 @@
+"""
+Prometheus文本格式的运行指标
+
+- 按路由统计请求数、延迟直方图，以及正在处理的请求数(抓取时按路由匹配结果汇总)
+- 按路由统计响应中的业务码(code字段)：业务错误目前都以HTTP 200返回，只能从响应体区分
+- 数据库连接池借出连接和新建连接的次数、已借出的连接数，以及依赖项获取连接的等待耗时
+- 维度缓存/总数缓存的命中率(抓取时从cache.stats()读取)
+- 事件循环调度延迟和按路由统计的事件循环阻塞次数(由loopmonitor记录)
+
+记录只做字典查找和整数累加，不加锁：请求指标在事件循环线程中记录，
+连接池事件可能在线程池中记录，偶发的计数竞争对监控可以接受。
+抓取只读取当前值，不修改任何状态。
+指标按进程统计，多worker部署时每个进程分别暴露。
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from sqlalchemy import event
+
+import cache
+
+# 延迟直方图的桶上限(秒)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# PlainTextResponse会追加charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+requests_total = defaultdict(int)            # (method, route, status) -> 次数
+response_codes = defaultdict(int)            # (route, code) -> 次数
+request_latency = {}                         # (method, route) -> Histogram
+pool_checkouts = defaultdict(int)            # engine名称 -> 借出连接次数
+pool_connects = defaultdict(int)             # engine名称 -> 新建连接次数
+pool_wait = {}                               # engine名称 -> Histogram
+_pools = {}                                  # engine名称 -> engine
+loop_lag = Histogram(LOOP_LAG_BUCKETS)       # 事件循环调度延迟
+loop_blocked = defaultdict(int)              # 路由 -> 事件循环阻塞次数
+active_scopes = {}                           # 正在处理的请求：asyncio任务 -> scope，供看门狗线程和抓取时取路由
+
+def observe_request(method, route, status, code, elapsed):
+    requests_total[(method, route, status)] += 1
+    if code is not None:
+        response_codes[(route, code)] += 1
+    histogram = request_latency.get((method, route))
+    if histogram is None:
+        histogram = request_latency[(method, route)] = Histogram(LATENCY_BUCKETS)
+    histogram.observe(elapsed)
+
+def _response_code(body):
+    """从JSON响应体开头提取业务码，响应体格式为 {"code":"00000",...}"""
+    if not body.startswith(b'{"code":"'):
+        return None
+    end = body.find(b'"', 9)
+    if end < 0:
+        return None
+    return body[9:end].decode("utf-8", "replace")
+
+def route_path(scope):
+    """路由匹配后starlette把匹配到的路由写入scope，未匹配的请求统一归类，避免路径数量无限增长"""
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+def observe_loop_lag(lag):
+    loop_lag.observe(lag)
+
+class MetricsMiddleware:
+    """ASGI中间件：记录每个HTTP请求的路由、状态码、业务码和耗时"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        result = {"status": 500, "code": None, "body_seen": False}
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                result["status"] = message["status"]
+            elif message["type"] == "http.response.body" and not result["body_seen"]:
+                result["body_seen"] = True
+                result["code"] = _response_code(message.get("body", b""))
+            await send(message)
+
+        task = asyncio.current_task()
+        active_scopes[task] = scope
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            active_scopes.pop(task, None)
+            observe_request(method, route_path(scope), result["status"], result["code"], time.perf_counter() - start)
+
+def install_pool_events(name, engine):
+    """通过连接池的checkout/connect事件统计借出连接和新建连接的次数"""
+    if name in _pools:
+        return
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_checkouts[name] += 1
+
+    def on_connect(dbapi_connection, connection_record):
+        pool_connects[name] += 1
+
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "connect", on_connect)
+    _pools[name] = engine
+
+def _observe_pool_wait(name, elapsed):
+    histogram = pool_wait.get(name)
+    if histogram is None:
+        histogram = pool_wait[name] = Histogram(POOL_WAIT_BUCKETS)
+    histogram.observe(elapsed)
+
+def checkout(name, session):
+    """
+    为会话借出连接并记录耗时(包括等待空闲连接和新建连接)
+
+    在依赖项中调用：会话原本在第一次查询时才借出连接，提前借出便于计时，
+    连接池公开的事件只在借出完成后触发，无法得到等待时间。
+    """
+    start = time.perf_counter()
+    session.connection()
+    _observe_pool_wait(name, time.perf_counter() - start)
+
+async def checkout_async(name, session):
+    """checkout的AsyncSession版本"""
+    start = time.perf_counter()
+    await session.connection()
+    _observe_pool_wait(name, time.perf_counter() - start)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _render_histogram(lines, name, histograms, label_names):
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=_format_number(bound))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+def render():
+    """按Prometheus文本格式输出所有指标"""
+    lines = [
+        "# HELP ces_http_requests_total HTTP请求数",
+        "# TYPE ces_http_requests_total counter",
+    ]
+    for (method, route, status), count in sorted(requests_total.items()):
+        lines.append(f"ces_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines += [
+        "# HELP ces_http_request_duration_seconds HTTP请求处理耗时",
+        "# TYPE ces_http_request_duration_seconds histogram",
+    ]
+    _render_histogram(lines, "ces_http_request_duration_seconds", request_latency, ("method", "route"))
+
+    lines += [
+        "# HELP ces_http_requests_in_progress 正在处理的HTTP请求数",
+        "# TYPE ces_http_requests_in_progress gauge",
+    ]
+    # 从正在处理的请求的scope汇总，此时路由已经匹配
+    in_progress = defaultdict(int)
+    for scope in list(active_scopes.values()):
+        in_progress[(scope["method"], route_path(scope))] += 1
+    for (method, route), count in sorted(in_progress.items()):
+        lines.append(f"ces_http_requests_in_progress{_labels(method=method, route=route)} {count}")
+
+    lines += [
+        "# HELP ces_response_code_total 响应体中的业务码(00000成功，A0001/A0002/A0500/99999等为错误)",
+        "# TYPE ces_response_code_total counter",
+    ]
+    for (route, code), count in sorted(response_codes.items()):
+        lines.append(f"ces_response_code_total{_labels(route=route, code=code)} {count}")
+
+    lines += [
+        "# HELP ces_db_pool_checkouts_total 从连接池借出连接的次数",
+        "# TYPE ces_db_pool_checkouts_total counter",
+    ]
+    for name, count in sorted(pool_checkouts.items()):
+        lines.append(f"ces_db_pool_checkouts_total{_labels(engine=name)} {count}")
+
+    lines += [
+        "# HELP ces_db_pool_connects_total 连接池新建数据库连接的次数",
+        "# TYPE ces_db_pool_connects_total counter",
+    ]
+    for name, count in sorted(pool_connects.items()):
+        lines.append(f"ces_db_pool_connects_total{_labels(engine=name)} {count}")
+
+    lines += [
+        "# HELP ces_db_pool_checked_out 已借出的连接数",
+        "# TYPE ces_db_pool_checked_out gauge",
+    ]
+    for name, engine in sorted(_pools.items()):
+        checkedout = getattr(engine.pool, "checkedout", None)
+        if checkedout is not None:
+            lines.append(f"ces_db_pool_checked_out{_labels(engine=name)} {checkedout()}")
+
+    lines += [
+        "# HELP ces_db_pool_checkout_wait_seconds 依赖项从连接池获取连接的耗时",
+        "# TYPE ces_db_pool_checkout_wait_seconds histogram",
+    ]
+    _render_histogram(lines, "ces_db_pool_checkout_wait_seconds", pool_wait, ("engine",))
+
+    lines += [
+        "# HELP ces_event_loop_lag_seconds 事件循环调度延迟",
+        "# TYPE ces_event_loop_lag_seconds histogram",
+    ]
+    if loop_lag.count:
+        _render_histogram(lines, "ces_event_loop_lag_seconds", {(): loop_lag}, ())
+    lines += [
+        "# HELP ces_event_loop_blocked_total 事件循环阻塞超过阈值的次数",
+        "# TYPE ces_event_loop_blocked_total counter",
+    ]
+    for route, count in sorted(loop_blocked.items()):
+        lines.append(f"ces_event_loop_blocked_total{_labels(route=route)} {count}")
+
+    cache_stats = cache.stats()
+    for metric, kind, help_text in (
+        ("ces_cache_hits_total", "counter", "缓存命中次数"),
+        ("ces_cache_misses_total", "counter", "缓存未命中次数"),
+        ("ces_cache_hit_ratio", "gauge", "缓存命中率"),
+        ("ces_cache_entries", "gauge", "缓存条目数"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for name, stats in sorted(cache_stats.items()):
+            lookups = stats["hits"] + stats["misses"]
+            value = {
+                "ces_cache_hits_total": stats["hits"],
+                "ces_cache_misses_total": stats["misses"],
+                "ces_cache_hit_ratio": stats["hits"] / lookups if lookups else 0.0,
+                "ces_cache_entries": stats["size"],
+            }[metric]
+            lines.append(f"{metric}{_labels(cache=name)} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,124 @@
+"""
+数据库结构迁移
+
+用法:
+    python migrations.py          执行所有未执行的迁移
+    python migrations.py status   查看已执行/待执行的迁移
+
+已执行的版本记录在 schema_version 表中，每个迁移只执行一次。
+新增迁移时在 MIGRATIONS 末尾追加，不要修改已发布的迁移。
+"""
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import Table, MetaData, Column, Integer, String, DateTime, inspect, select, func, insert
+
+import models
+import search
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime)
+)
+
+def create_tables(conn):
+    # 只创建不存在的表，已有数据库上为空操作
+    models.Base.metadata.create_all(bind=conn)
+
+def create_fulltext_indexes(conn):
+    search.create_fulltext_indexes(conn)
+
+def create_missing_indexes(conn):
+    """
+    为已存在的表补建models中声明的索引
+
+    create_all只创建不存在的表，已有表上新增的索引需要在这里补建。
+    每个索引单独提交：建索引期间只阻塞写入，单个索引完成后写入即可继续，
+    不会在整个迁移期间一直持有写锁。
+    有新索引时执行ANALYZE，让SQLite查询优化器根据统计信息选择索引。
+    返回本次新建的索引名称列表。
+    """
+    created = []
+    inspector = inspect(conn)
+    for table in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            start = time.perf_counter()
+            index.create(conn)
+            conn.commit()
+            created.append(index.name)
+            print(f"已创建索引: {index.name} ({time.perf_counter() - start:.1f}s)")
+    if created and conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("ANALYZE")
+    return created
+
+# (版本号, 名称, 迁移函数)，按版本号顺序执行
+MIGRATIONS = [
+    (1, "create_tables", create_tables),
+    (2, "fulltext_indexes", create_fulltext_indexes),
+    (3, "foreign_key_indexes", create_missing_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn):
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+def upgrade(engine=None):
+    """执行所有未执行的迁移，每个迁移执行完成后立即记录版本，返回执行的版本号列表"""
+    engine = engine or models.engine
+    applied = []
+    with engine.connect() as conn:
+        schema_version.create(conn, checkfirst=True)
+        conn.commit()
+        version = current_version(conn)
+        for migration_version, name, migrate in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            start = time.perf_counter()
+            print(f"正在执行迁移 {migration_version}: {name}...")
+            migrate(conn)
+            conn.execute(insert(schema_version).values(
+                version=migration_version,
+                name=name,
+                applied_at=datetime.now()
+            ))
+            conn.commit()
+            applied.append(migration_version)
+            print(f"迁移 {migration_version} 完成，耗时 {time.perf_counter() - start:.1f}s")
+    return applied
+
+def check_version(engine=None):
+    """服务启动时检查数据库结构是否为最新版本，未迁移时拒绝启动"""
+    engine = engine or models.engine
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"数据库结构版本为 {version}，最新版本为 {LATEST_VERSION}，请先执行: python migrations.py"
+        )
+
+def print_status(engine=None):
+    engine = engine or models.engine
+    with engine.connect() as conn:
+        version = current_version(conn)
+    for migration_version, name, _ in MIGRATIONS:
+        state = "已执行" if migration_version <= version else "待执行"
+        print(f"{migration_version:>4}  {name:<24}{state}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        print_status()
+    else:
+        applied = upgrade()
+        print(f"数据库迁移完成，执行了 {len(applied)} 个迁移，当前版本 {LATEST_VERSION}")
@@ -1,12 +1,53 @@
-from sqlalchemy import Column, Integer, String, create_engine, ForeignKey, Text, DateTime, Table
+from sqlalchemy import Column, Integer, String, create_engine, ForeignKey, Text, DateTime, Table, Index, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool, StaticPool
 import datetime
+import config
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+SQLALCHEMY_DATABASE_URL = config.SQLALCHEMY_DATABASE_URL
+# 异步引擎使用同一个数据库文件，只替换驱动为aiosqlite
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+def _engine_options(is_async=False):
+    """根据配置生成连接池参数，未配置时使用SQLAlchemy默认连接池"""
+    options = {}
+    if config.DB_POOL_CLASS == "queue":
+        options["poolclass"] = AsyncAdaptedQueuePool if is_async else QueuePool
+        if config.DB_POOL_SIZE is not None:
+            options["pool_size"] = config.DB_POOL_SIZE
+        if config.DB_MAX_OVERFLOW is not None:
+            options["max_overflow"] = config.DB_MAX_OVERFLOW
+    elif config.DB_POOL_CLASS == "null":
+        options["poolclass"] = NullPool
+    elif config.DB_POOL_CLASS == "static":
+        options["poolclass"] = StaticPool
+    elif config.DB_POOL_CLASS:
+        raise ValueError(f"未知的连接池类型 CES_DB_POOL_CLASS={config.DB_POOL_CLASS}")
+    return options
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # 每个新建连接都执行一次，PRAGMA只对当前连接生效(journal_mode除外)
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in config.sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, **_engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎 (aiosqlite)，供async def接口使用，避免阻塞事件循环
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **_engine_options(is_async=True))
+# expire_on_commit=False: 提交后仍可读取对象属性，无需再次触发IO
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
 Base = declarative_base()
 
 class User(Base):
@@ -31,12 +72,22 @@ class User(Base):
     groups = relationship("Group", secondary="user_groups", back_populates="users")
     roles = relationship("Role", secondary="user_roles", back_populates="users")
 
+    __table_args__ = (
+        # 用户分页：按运营商、局点过滤
+        Index("ix_users_tenant_id_company_id", "tenant_id", "company_id"),
+        Index("ix_users_company_id", "company_id"),
+    )
+
 # 用户-班组关联表
 user_groups = Table(
     "user_groups",
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id")),
-    Column("group_id", Integer, ForeignKey("groups.id"))
+    Column("group_id", Integer, ForeignKey("groups.id")),
+    # 按用户加载班组 / 按班组过滤用户
+    # 单列索引：同一用户的记录按rowid(插入顺序)排列，与关联关系的加载顺序一致
+    Index("ix_user_groups_user_id", "user_id"),
+    Index("ix_user_groups_group_id", "group_id")
 )
 
 # 用户-角色关联表
@@ -44,7 +95,8 @@ user_roles = Table(
     "user_roles",
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id")),
-    Column("role_id", Integer, ForeignKey("roles.id"))
+    Column("role_id", Integer, ForeignKey("roles.id")),
+    Index("ix_user_roles_user_id", "user_id")
 )
 
 class Tenant(Base):
@@ -68,6 +120,11 @@ class Company(Base):
     # 与Grid的关系
     grids = relationship("Grid", back_populates="company")
 
+    __table_args__ = (
+        # 按运营商过滤局点，同时覆盖tenant_id外键
+        Index("ix_companies_tenant_id_name", "tenant_id", "name"),
+    )
+
 class Grid(Base):
     __tablename__ = "grids"
     
@@ -80,6 +137,10 @@ class Grid(Base):
     # 与Community的关系
     communities = relationship("Community", back_populates="grid")
 
+    __table_args__ = (
+        Index("ix_grids_company_id_name", "company_id", "name"),
+    )
+
 class Community(Base):
     __tablename__ = "communities"
     
@@ -93,6 +154,10 @@ class Community(Base):
     # 与Grid的关系
     grid = relationship("Grid", back_populates="communities")
 
+    __table_args__ = (
+        Index("ix_communities_grid_id_name", "grid_id", "name"),
+    )
+
 class Group(Base):
     __tablename__ = "groups"
     
@@ -109,6 +174,10 @@ class Group(Base):
     # 与User的关系
     users = relationship("User", secondary="user_groups", back_populates="groups")
 
+    __table_args__ = (
+        Index("ix_groups_company_id_name", "company_id", "name"),
+    )
+
 class Role(Base):
     __tablename__ = "roles"
     
@@ -147,6 +216,12 @@ class LabelCompany(Base):
     # 与Company的关系
     company = relationship("Company")
 
+    __table_args__ = (
+        # 按标签加载局点 / 按局点过滤标签
+        Index("ix_label_companies_label_id_company_id", "label_id", "company_id"),
+        Index("ix_label_companies_company_id_label_id", "company_id", "label_id"),
+    )
+
 # 账号模型 - 扩展User模型，增加更多业务字段
 class UserAccount(Base):
     __tablename__ = "user_accounts"
@@ -173,6 +248,14 @@ class UserAccount(Base):
     # 与AccountGroup的关系
     groups = relationship("AccountGroup", back_populates="account")
 
+    __table_args__ = (
+        # 账号分页的过滤条件：运营商、局点、启用状态、有效期
+        Index("ix_user_accounts_tenant_company_enabled_expire", "tenant_id", "company_id", "is_enabled", "expire_date"),
+        Index("ix_user_accounts_company_id", "company_id"),
+        Index("ix_user_accounts_role_id", "role_id"),
+        Index("ix_user_accounts_expire_date", "expire_date"),
+    )
+
 # 账号与营销组的关联表
 class AccountGroup(Base):
     __tablename__ = "account_groups"
@@ -186,6 +269,8 @@ class AccountGroup(Base):
     # 与Group的关系
     group = relationship("Group")
 
-# 确保更新数据库表结构
-print("正在更新数据库表结构...")
-Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    __table_args__ = (
+        # 按账号加载营销组 / 按营销组过滤账号
+        Index("ix_account_groups_account_id_group_id", "account_id", "group_id"),
+        Index("ix_account_groups_group_id_account_id", "group_id", "account_id"),
+    )
@@ -0,0 +1,98 @@
+import base64
+import itertools
+import json
+import math
+
+from sqlalchemy import func
+
+# 游标模式未传pageSize时的默认每页条数
+DEFAULT_PAGE_SIZE = 10
+# 不分页(返回全部记录)时每批读取的条数
+STREAM_BATCH_SIZE = 1000
+
+def encode_cursor(last_id):
+    """将本页最后一条记录的主键编码为不透明游标"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """解析游标，空字符串表示从第一页开始，返回None"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+        return int(last_id)
+    except (ValueError, TypeError, KeyError):
+        raise ValueError(f"无效的分页游标: {cursor}")
+
+def parse_with_total(value):
+    """请求参数withTotal，只有明确传false/0时不统计总数"""
+    return value not in (False, 0, "false", "0")
+
+def page_count(total, page_size):
+    """总页数，未统计总数时为None"""
+    if total is None:
+        return None
+    return math.ceil(total / page_size) if page_size > 0 else 0
+
+def cursor_page_size(page_size):
+    return page_size if isinstance(page_size, int) and page_size > 0 else DEFAULT_PAGE_SIZE
+
+def apply_cursor(query, key_column, cursor, page_size):
+    """
+    游标(keyset)分页：按有索引的主键升序，从上一页最后一条之后开始取
+
+    多取一条用于判断是否还有下一页，配合split_page使用。
+    查询代价与页码无关，第5000页与第1页相同。
+    """
+    last_id = decode_cursor(cursor)
+    if last_id is not None:
+        query = query.filter(key_column > last_id)
+    return query.order_by(key_column).limit(page_size + 1)
+
+def split_page(rows, page_size):
+    """截取本页记录，并在还有下一页时生成nextCursor"""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
+
+def offset_page(query, key_column, page_no, page_size, total=None, with_total=True):
+    """
+    OFFSET分页：按主键排序，本页记录和总数在同一条SQL中查询 (COUNT(*) OVER ())
+
+    显式按主键排序，返回顺序不受查询优化器所选索引的影响，翻页结果稳定。
+
+    总数与本页记录来自同一次读取，两者一致，也不需要再单独执行一次COUNT。
+    页码超出范围时本页为空、拿不到窗口计数，只有这种情况才补一次COUNT。
+    已知总数(如来自缓存)或with_total为False时只查询本页，原样返回total。
+    返回 (rows, total)，查询单个实体时rows为实体列表，否则为带page_total列的Row列表。
+    """
+    query = query.order_by(key_column)
+    offset = (page_no - 1) * page_size
+    if total is not None or not with_total:
+        return query.offset(offset).limit(page_size).all(), total
+    descriptions = query.column_descriptions
+    single_entity = len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+    rows = query.add_columns(func.count().over().label("page_total")).offset(offset).limit(page_size).all()
+    if not rows:
+        # 从第一条开始取仍为空，说明没有任何记录
+        return [], (query.count() if offset > 0 or page_size <= 0 else 0)
+    total = rows[0].page_total
+    if single_entity:
+        rows = [row[0] for row in rows]
+    return rows, total
+
+def iter_all(query, key_column, batch_size=STREAM_BATCH_SIZE):
+    """
+    不分页时按主键顺序读取全部记录，每次返回一批(列表)
+
+    yield_per使用流式游标(stream_results)分批获取，内存中只保留当前一批，不会一次加载整张表。
+    """
+    rows = iter(query.order_by(key_column).yield_per(batch_size))
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,79 @@
+"""
+采样性能分析
+
+在运行中的进程里按固定间隔读取所有线程的调用栈(sys._current_frames)，统计每个调用栈出现的次数，
+输出collapsed stack格式(每行 "线程;外层函数;...;内层函数 次数")，可直接交给 flamegraph.pl / speedscope 生成火焰图。
+
+- 只在分析期间启动一个采样线程，不修改解释器的trace/profile钩子，对被分析代码没有额外开销
+- 同一时间只允许一个分析任务，时长不超过 CES_PROFILE_MAX_SECONDS
+- 默认跳过栈顶在等待IO/锁的空闲线程(事件循环等待、线程池空闲)，只保留实际占用CPU或阻塞在调用中的栈
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# 栈顶为这些函数时视为空闲线程：(文件名, 函数名)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+}
+
+_lock = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """已有分析任务在运行"""
+
+def _frame_label(code, labels):
+    label = labels.get(code)
+    if label is None:
+        # 使用函数定义所在行，同一函数内不同行的样本合并为一个节点
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+        labels[code] = label
+    return label
+
+def sample(seconds, interval, include_idle=False):
+    """
+    采样seconds秒，每interval秒采一次，返回 (Counter{collapsed栈: 次数}, 采样次数)
+
+    在调用线程中阻塞执行，接口中通过线程池调用，不阻塞事件循环。
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        own_ident = threading.get_ident()
+        labels = {}
+        stacks = Counter()
+        samples = 0
+        thread_names = {}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if frames.keys() - thread_names.keys():
+                thread_names = {thread.ident: thread.name.replace(";", ":") for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code, labels))
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, str(ident)))
+                stack.reverse()
+                stacks[";".join(stack)] += 1
+            # 释放对其他线程栈帧的引用
+            del frames
+            samples += 1
+            time.sleep(interval)
+        return stacks, samples
+    finally:
+        _lock.release()
+
+def collapsed(stacks):
+    """按次数从多到少输出collapsed stack文本"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
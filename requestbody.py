@@ -0,0 +1,112 @@
+"""
+请求体解析
+
+手动读取请求体的接口统一通过 parse() 解析为pydantic模型：
+- 使用orjson解码，再由模型的pydantic-core校验器一次完成所有字段的类型转换和默认值，
+  不再json.loads后逐个 body.get() 取值；
+  pydantic-core自带的JSON解析(model_validate_json)比orjson慢数倍，不使用
+- 模型字段的默认值与原来 body.get(字段, 默认值) 一致，未声明的字段忽略
+- 字段类型保持原来接口的宽松处理，只有原来就会报错的值才是参数格式错误：
+  - IdFilter(查询条件)：null / "" / "0" / 0 表示不筛选(None)，"1"与1等价，无法转换为整数时也不筛选
+  - RefId(新增/修改中需要校验存在的id)：能转换为整数时为整数，无法转换的字符串和小数保留为字符串，
+    由接口按"ID xxx 不存在"返回；数组和对象为参数格式错误
+  - Text：数字转为字符串，布尔值为"1"/"0"，空数组/对象与未传相同
+  - IdList：不是数组时按空数组处理
+- 语义依赖原始JSON类型的字段(如 enabled 可以是布尔或整数)声明为Any，原样交给接口处理
+
+列表接口(lenient=True)没有请求体或请求体不是JSON对象时使用默认值；
+新增/修改接口没有请求体时为"请求体不能为空"，不是JSON对象时为"请求体格式错误"；
+字段类型错误时为"参数格式错误: 字段名"。
+"""
+from typing import Annotated, List, Optional, Union
+
+import orjson
+from pydantic import BaseModel, BeforeValidator, ConfigDict, ValidationError
+
+import pagination
+
+class BodyError(ValueError):
+    """请求体无法解析，消息直接作为响应的msg返回"""
+
+def _id_filter(value):
+    if type(value) is int:
+        return value or None
+    if value is None or value == "" or value == "0" or value == 0:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        # 无法转换时不筛选，与原来的列表接口一致
+        return None
+
+def _ref_id(value):
+    if value is None or type(value) is int:
+        return value
+    if isinstance(value, (list, dict)):
+        raise ValueError("id不能是数组或对象")
+    if isinstance(value, float) and not value.is_integer():
+        return str(value)
+    try:
+        return int(value)
+    except ValueError:
+        # 保留原值，查询不到记录时返回"ID xxx 不存在"
+        return value
+
+def _text(value):
+    if isinstance(value, bool):
+        # 与原来写入数据库后读出的值一致
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (list, dict)) and not value:
+        return None
+    return value
+
+def _page_int(value):
+    return int(value) if isinstance(value, float) else value
+
+def _id_list(value):
+    return value if value is None or isinstance(value, list) else []
+
+# 按ID筛选的条件，None表示不筛选
+IdFilter = Annotated[Optional[int], BeforeValidator(_id_filter)]
+# 需要校验存在的ID，无法转换为整数时为原字符串
+RefId = Annotated[Union[int, str, None], BeforeValidator(_ref_id)]
+# 文本字段
+Text = Annotated[Optional[str], BeforeValidator(_text)]
+# ID数组，不是数组时为空数组
+IdList = Annotated[Optional[List[int]], BeforeValidator(_id_list)]
+RefIdList = Annotated[Optional[List[RefId]], BeforeValidator(_id_list)]
+# 是否统计总数，只有明确传false/0时为False
+WithTotal = Annotated[bool, BeforeValidator(pagination.parse_with_total)]
+
+class RequestBody(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+class PageRequest(RequestBody):
+    """分页参数：pageNo和pageSize都为0时返回全部记录，传cursor时使用游标分页"""
+    pageNo: Annotated[int, BeforeValidator(_page_int)] = 1
+    pageSize: Annotated[int, BeforeValidator(_page_int)] = 10
+    cursor: Text = None
+    withTotal: WithTotal = True
+
+async def parse(request, model, lenient=False):
+    """读取并解析请求体，返回model实例，失败时抛出BodyError"""
+    raw = await request.body()
+    if not raw:
+        if lenient:
+            return model()
+        raise BodyError("请求体不能为空")
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        if lenient:
+            return model()
+        raise BodyError("请求体格式错误")
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        fields = dict.fromkeys(".".join(str(part) for part in error["loc"]) for error in e.errors(include_url=False))
+        raise BodyError(f"参数格式错误: {', '.join(fields)}")
@@ -0,0 +1,126 @@
+from sqlalchemy import literal, literal_column, select, table
+
+# 需要支持 %关键字% 模糊搜索的列，按表名配置
+# 每张表对应一个FTS5 trigram外部内容表 <表名>_fts，由触发器与原表保持同步
+FULLTEXT_COLUMNS = {
+    "companies": ("name",),
+    "grids": ("name",),
+    "communities": ("name",),
+    "groups": ("name",),
+    "labels": ("name",),
+    "user_accounts": ("account", "name"),
+    "users": ("name", "username"),
+}
+
+# trigram索引只能匹配不少于3个字符的关键字，更短的关键字仍使用LIKE
+TRIGRAM_MIN_LENGTH = 3
+
+# 已启用全文搜索的表 (SQLite未编译FTS5、版本低于3.34或未执行迁移时为空)
+_enabled_tables = set()
+
+def _fts_name(table_name):
+    return f"{table_name}_fts"
+
+def _fulltext_ddl(table_name, columns):
+    fts = _fts_name(table_name)
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_list}, content='{table_name}', content_rowid='id', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table_name}" BEGIN '
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table_name}" BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON "{table_name}" BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+    ]
+
+def create_fulltext_indexes(conn):
+    """
+    迁移步骤：创建全文索引表和同步触发器，已存在时跳过
+
+    首次创建时用rebuild从原表导入已有数据。
+    数据库不支持FTS5 trigram时只打印提示，搜索自动退回LIKE。
+    返回已建立全文索引的表名列表。
+    """
+    if conn.dialect.name != "sqlite":
+        return []
+    indexed = []
+    for table_name, columns in FULLTEXT_COLUMNS.items():
+        fts = _fts_name(table_name)
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+        ).first()
+        try:
+            for statement in _fulltext_ddl(table_name, columns):
+                conn.exec_driver_sql(statement)
+            if not exists:
+                conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        except Exception as e:
+            print(f"全文索引 {fts} 不可用，{table_name} 的模糊搜索将使用LIKE: {e}")
+            break
+        indexed.append(table_name)
+    return indexed
+
+def drop_fulltext_triggers(conn):
+    """
+    批量导入前删除同步触发器，避免逐行维护全文索引
+
+    返回已有全文索引的表名列表，导入完成后传给rebuild_fulltext_indexes。
+    """
+    existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    tables = [table_name for table_name in FULLTEXT_COLUMNS if _fts_name(table_name) in existing]
+    for table_name in tables:
+        fts = _fts_name(table_name)
+        for suffix in ("ai", "ad", "au"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+    return tables
+
+def rebuild_fulltext_indexes(conn, tables):
+    """批量导入后从原表整体重建全文索引，并恢复同步触发器"""
+    for table_name in tables:
+        fts = _fts_name(table_name)
+        conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        for statement in _fulltext_ddl(table_name, FULLTEXT_COLUMNS[table_name])[1:]:
+            conn.exec_driver_sql(statement)
+
+def load_fulltext_indexes(engine):
+    """服务启动时检测数据库中已创建的全文索引，只对有索引的表启用全文搜索"""
+    _enabled_tables.clear()
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    _enabled_tables.update(table_name for table_name in FULLTEXT_COLUMNS if _fts_name(table_name) in existing)
+
+def _quote(keyword):
+    # FTS5字符串：双引号包裹，内部双引号写两次，整体作为一个短语做子串匹配
+    return '"' + keyword.replace('"', '""') + '"'
+
+def contains(column, keyword):
+    """
+    生成 column LIKE '%keyword%' 的等价过滤条件
+
+    关键字不少于3个字符时改为查询trigram全文索引，避免前导通配符导致的全表扫描；
+    关键字过短、包含LIKE通配符(% _)或该表没有全文索引时使用原来的LIKE。
+    """
+    keyword = str(keyword)
+    table_name = column.table.name
+    use_fulltext = (
+        table_name in _enabled_tables
+        and column.key in FULLTEXT_COLUMNS[table_name]
+        and len(keyword) >= TRIGRAM_MIN_LENGTH
+        and "%" not in keyword
+        and "_" not in keyword
+    )
+    if not use_fulltext:
+        return column.like(f"%{keyword}%")
+
+    fts = _fts_name(table_name)
+    matched_ids = select(literal_column("rowid")).select_from(table(fts)).where(
+        literal_column(fts).op("MATCH")(literal(f"{column.key} : {_quote(keyword)}"))
+    )
+    return column.table.c.id.in_(matched_ids)
@@ -0,0 +1,199 @@
+"""
+演示数据初始化 (会删除现有数据，仅用于本地开发/演示环境)
+
+用法: python seed_demo.py --yes
+
+- 创建测试用户 aaa/aaa
+- 重置运营商、局点、网格数据，并为每个网格生成3-5个小区
+"""
+import sys
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+import models
+import migrations
+import utils
+
+def seed_demo():
+    # 确保数据库中有测试用户
+    db = models.SessionLocal()
+    try:
+        # 检查是否已存在测试用户
+        test_user = db.query(models.User).filter(models.User.username == "aaa").first()
+        if not test_user:
+            # 创建测试用户
+            hashed_password = utils.get_password_hash("aaa")
+            test_user = models.User(username="aaa", hashed_password=hashed_password)
+            db.add(test_user)
+            db.commit()
+            
+        # 添加示例运营商数据 - 使用更明确的名称
+        tenants_data = [
+            {"id": 1, "name": "中国联通"},
+            {"id": 2, "name": "中国电信"},
+            {"id": 3, "name": "中国移动"}
+        ]
+        
+        # 更新或插入租户数据
+        for tenant_data in tenants_data:
+            tenant = db.query(models.Tenant).filter(models.Tenant.id == tenant_data["id"]).first()
+            if tenant:
+                # 更新租户名称
+                tenant.name = tenant_data["name"]
+            else:
+                # 创建新租户
+                tenant = models.Tenant(id=tenant_data["id"], name=tenant_data["name"])
+                db.add(tenant)
+        
+        # 删除id=7的测试租户（如果存在）
+        test_tenant = db.query(models.Tenant).filter(models.Tenant.id == 7).first()
+        if test_tenant:
+            db.delete(test_tenant)
+        
+        db.commit()
+        
+        # 删除现有公司数据
+        db.query(models.Company).delete()
+        db.commit()
+        
+        # 添加测试公司数据 - 名称更加明确区分
+        test_companies = [
+            # 联通公司
+            {"id": 1, "name": "联通-北京分公司", "tenant_id": 1},
+            {"id": 2, "name": "联通-上海分公司", "tenant_id": 1},
+            {"id": 3, "name": "联通-广州分公司", "tenant_id": 1},
+            
+            # 电信公司
+            {"id": 4, "name": "电信-北京分公司", "tenant_id": 2},
+            {"id": 5, "name": "电信-上海分公司", "tenant_id": 2},
+            {"id": 6, "name": "电信-广州分公司", "tenant_id": 2},
+            
+            # 移动公司
+            {"id": 7, "name": "移动-北京分公司", "tenant_id": 3},
+            {"id": 8, "name": "移动-上海分公司", "tenant_id": 3},
+            {"id": 9, "name": "移动-广州分公司", "tenant_id": 3}
+        ]
+        
+        for company_data in test_companies:
+            company = models.Company(
+                id=company_data["id"],
+                name=company_data["name"],
+                tenant_id=company_data["tenant_id"]
+            )
+            db.add(company)
+        
+        db.commit()
+        companies = db.query(models.Company).all()
+        
+        # 清空现有网格数据
+        db.query(models.Grid).delete()
+        db.commit()
+        
+        # 区域数据 - 为每个城市设置更多的区域
+        city_areas = {
+            "北京": ["朝阳区", "海淀区", "东城区", "西城区", "丰台区", "石景山区", "通州区", "昌平区", "大兴区", "顺义区"],
+            "上海": ["浦东新区", "静安区", "黄浦区", "徐汇区", "长宁区", "虹口区", "普陀区", "杨浦区", "闵行区", "宝山区"],
+            "广州": ["天河区", "越秀区", "海珠区", "白云区", "荔湾区", "番禺区", "花都区", "黄埔区", "南沙区", "增城区"]
+        }
+        
+        # 企业客户类型 - 为不同区域增加企业客户分类
+        business_types = ["政府", "金融", "教育", "医疗", "商业"]
+        
+        # 添加测试网格数据 - 使用更丰富的命名
+        grid_id = 1
+        all_grids = []
+        
+        for company in companies:
+            # 确定城市和运营商
+            if "北京" in company.name:
+                city = "北京"
+                areas = city_areas["北京"]
+            elif "上海" in company.name:
+                city = "上海"
+                areas = city_areas["上海"]
+            elif "广州" in company.name:
+                city = "广州"
+                areas = city_areas["广州"]
+                
+            if "联通" in company.name:
+                operator = "联通"
+            elif "电信" in company.name:
+                operator = "电信"
+            elif "移动" in company.name:
+                operator = "移动"
+            else:
+                operator = ""
+            
+            # 为每个区域创建普通网格
+            for area in areas:
+                grid_name = f"{operator}-{city}{area}网格"
+                all_grids.append(models.Grid(id=grid_id, name=grid_name, company_id=company.id))
+                grid_id += 1
+            
+            # 为前3个区域额外创建企业客户网格
+            for area in areas[:3]:
+                for business_type in business_types:
+                    grid_name = f"{operator}-{city}{area}{business_type}客户网格"
+                    all_grids.append(models.Grid(id=grid_id, name=grid_name, company_id=company.id))
+                    grid_id += 1
+        
+        # 一次性批量添加所有网格
+        db.add_all(all_grids)
+        db.commit()
+        
+        # 统计数据
+        total_grids = db.query(models.Grid).count()
+        print(f"已添加测试数据: {len(tenants_data)}个运营商, {len(test_companies)}个局点, {total_grids}个网格")
+        
+        # 添加小区测试数据
+        # 首先获取所有网格
+        grids = db.query(models.Grid).all()
+        
+        # 为每个网格添加3-5个小区
+        community_names = [
+            "和平小区", "幸福家园", "阳光花园", "翠竹苑", "金色家园", 
+            "未来城", "绿洲花园", "碧水云天", "紫荆苑", "蓝山小区",
+            "梦想家园", "康乐居", "汇景苑", "华府名邸", "锦绣园",
+            "御景华庭", "丽景花园", "凤凰城", "水岸新都", "江南新苑",
+            "星河湾", "帝景豪园", "珠江花园", "山水名苑", "玫瑰园",
+            "香榭丽舍", "半岛华府", "翡翠城", "龙湖花园", "万科城"
+        ]
+        
+        now = datetime.now()
+        community_rows = []
+        for grid in grids:
+            # 随机选择3-5个不重复的小区名
+            num_communities = random.randint(3, 5)
+            selected_names = random.sample(community_names, num_communities)
+            
+            # 为网格添加小区
+            for name in selected_names:
+                # 添加网格名称前缀，避免小区名称重复
+                grid_prefix = grid.name.split('-')[0]  # 获取运营商名称作为前缀
+                full_name = f"{grid_prefix}-{name}"
+                
+                community_rows.append({
+                    "name": full_name,
+                    "grid_id": grid.id,
+                    "create_time": now - timedelta(days=random.randint(0, 365)),
+                    "update_time": now - timedelta(days=random.randint(0, 30)),
+                    "operator_name": random.choice(["管理员", "操作员", "超级管理员", "系统"])
+                })
+        
+        # 一次性批量插入所有小区 (executemany)，不逐行构造ORM对象
+        db.execute(insert(models.Community), community_rows)
+        db.commit()
+        
+        print("数据初始化完成!")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if "--yes" not in sys.argv[1:]:
+        print("警告: 此操作会删除所有局点和网格数据并重新生成演示数据")
+        print("确认执行请使用: python seed_demo.py --yes")
+        sys.exit(1)
+    migrations.upgrade()
+    seed_demo()
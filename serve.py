@@ -0,0 +1,45 @@
+"""
+生产环境启动入口
+
+用法: python serve.py [--workers N] [--port PORT] ...
+
+只启动服务，不修改任何数据。数据库结构需要先通过 python migrations.py 升级，
+未升级时服务启动检查会失败。命令行参数未指定时使用 config.py 中的 CES_* 环境变量配置。
+"""
+import argparse
+
+import uvicorn
+
+import config
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="启动CES服务")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS, help="worker进程数")
+    parser.add_argument("--loop", default=config.SERVER_LOOP, choices=["auto", "uvloop", "asyncio"])
+    parser.add_argument("--http", default=config.SERVER_HTTP, choices=["auto", "httptools", "h11"])
+    parser.add_argument("--backlog", type=int, default=config.SERVER_BACKLOG, help="监听队列长度")
+    parser.add_argument("--keep-alive", type=int, default=config.SERVER_KEEP_ALIVE, help="keep-alive空闲超时(秒)")
+    parser.add_argument("--no-access-log", action="store_true", default=not config.SERVER_ACCESS_LOG,
+                        help="关闭访问日志")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"正在启动服务器: {args.host}:{args.port}, workers={args.workers}, loop={args.loop}, http={args.http}")
+    # 多worker时uvicorn需要通过导入字符串在每个子进程中加载应用
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=args.loop,
+        http=args.http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        access_log=not args.no_access_log
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+慢查询日志
+
+执行时间超过 CES_SLOW_QUERY_MS 的SQL记录到本地滚动日志文件(CES_SLOW_QUERY_LOG)，包括：
+归一化后的SQL、绑定参数的类型(不记录参数值)、耗时、发起请求的路由，以及SQLite的 EXPLAIN QUERY PLAN。
+
+EXPLAIN在原连接上立即执行(同一连接才能看到相同的临时对象和统计信息)，慢查询本身已超过阈值，
+额外的EXPLAIN开销可以忽略；日志通过QueueHandler交给后台线程写文件，不阻塞请求。
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+
+import config
+
+logger = logging.getLogger("ces.slow_query")
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def _ensure_listener():
+    """第一次记录慢查询时创建日志文件和后台写入线程"""
+    with _listener_lock:
+        if _listener is None:
+            _start_listener()
+
+def _start_listener():
+    global _listener
+    file_handler = logging.handlers.RotatingFileHandler(
+        config.SLOW_QUERY_LOG,
+        maxBytes=config.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=config.SLOW_QUERY_LOG_BACKUP_COUNT,
+        encoding="utf-8",
+        delay=True
+    )
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    records = queue.SimpleQueue()
+    # stop()之后再次启动时替换掉原来的QueueHandler
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(logging.WARNING)
+    # 慢查询只写入独立的文件，不输出到控制台
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(records, file_handler)
+    _listener.start()
+
+def stop():
+    """停止后台线程，等待队列中的日志写完"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+atexit.register(stop)
+
+def parameter_shape(parameters, executemany=False):
+    """绑定参数的类型，executemany时为 条数 x 单行类型"""
+    if executemany:
+        if not parameters:
+            return "[]"
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+def query_plan(conn, statement, parameters, executemany=False):
+    """在同一连接上执行EXPLAIN QUERY PLAN，按层级缩进返回每一步"""
+    if conn.dialect.name != "sqlite":
+        return []
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    try:
+        # 直接使用DBAPI游标，不触发SQLAlchemy事件
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f"EXPLAIN失败: {e}"]
+    depth = {0: -1}
+    plan = []
+    for step_id, parent, _, detail in rows:
+        depth[step_id] = depth.get(parent, -1) + 1
+        plan.append("  " * depth[step_id] + detail)
+    return plan
+
+def record(conn, statement, parameters, executemany, duration, route, normalized):
+    _ensure_listener()
+    plan = query_plan(conn, statement, parameters, executemany)
+    lines = [
+        f"慢查询 {duration * 1000:.1f}ms route={route or '-'}",
+        f"sql: {normalized}",
+        f"params: {parameter_shape(parameters, executemany)}",
+        "plan:",
+        *(f"  {step}" for step in plan or ["(无)"]),
+    ]
+    logger.warning("\n".join(lines))
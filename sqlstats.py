@@ -0,0 +1,144 @@
+"""
+请求级SQL统计
+
+通过SQLAlchemy引擎事件统计每个请求执行的SQL条数和数据库耗时：
+- SQLStatsMiddleware 在响应头 X-SQL-Count / X-SQL-Time-Ms 中返回统计结果，并记录到 ces.sql 日志
+- 同一条归一化后的SQL在一个请求中执行超过 CES_SQL_REPEAT_THRESHOLD 次时记录警告(疑似N+1查询)
+- 测试中使用 track() 统计一段代码执行的SQL，断言没有重复执行的语句
+- 执行时间超过 CES_SLOW_QUERY_MS 的SQL(包括请求之外执行的)交给slowlog记录慢查询日志
+"""
+import contextvars
+import functools
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+import config
+import slowlog
+
+logger = logging.getLogger("ces.sql")
+
+_current = contextvars.ContextVar("ces_sql_stats", default=None)
+
+# 连接上正在执行的语句的开始时间
+_START_KEY = "ces_sql_start"
+
+class RequestStats:
+    """一个请求(或track代码块)内执行的SQL统计"""
+
+    __slots__ = ("count", "duration", "statements", "scope")
+
+    def __init__(self, scope=None):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.scope = scope
+
+    def route(self):
+        """发起请求的方法和路由模板，路由匹配前或未匹配时为请求路径"""
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {route.path if route is not None else self.scope['path']}"
+
+    def repeated(self, threshold=None):
+        """返回执行次数超过阈值的 (归一化SQL, 次数) 列表，按次数降序"""
+        if threshold is None:
+            threshold = config.SQL_REPEAT_THRESHOLD
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+@functools.lru_cache(maxsize=1024)
+def normalize(statement):
+    """去掉字面量和IN列表长度的差异，同一查询模板归一化为同一条语句"""
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("(?, ...)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.duration += duration
+        stats.count += 1
+        stats.statements[normalize(statement)] += 1
+    if 0 < config.SLOW_QUERY_SECONDS <= duration:
+        slowlog.record(
+            conn, statement, parameters, executemany, duration,
+            stats.route() if stats is not None else None, normalize(statement)
+        )
+
+def _handle_error(exception_context):
+    # 执行失败时不会触发after_cursor_execute，丢弃对应的开始时间
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_START_KEY):
+        conn.info[_START_KEY].pop()
+
+def install(*engines):
+    """在同步引擎上注册统计事件，异步引擎传入 async_engine.sync_engine"""
+    for engine in engines:
+        if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            continue
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+@contextmanager
+def track(scope=None):
+    """统计代码块内执行的SQL，返回RequestStats"""
+    stats = RequestStats(scope)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+def report(method, path, stats, elapsed):
+    logger.info(
+        "%s %s sql_count=%d sql_time_ms=%.2f elapsed_ms=%.2f",
+        method, path, stats.count, stats.duration * 1000, elapsed * 1000
+    )
+    for statement, count in stats.repeated():
+        logger.warning("疑似N+1查询: %s %s 同一SQL执行了 %d 次: %.300s", method, path, count, statement)
+
+class SQLStatsMiddleware:
+    """ASGI中间件：为每个HTTP请求统计SQL，写入响应头并记录日志"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with track(scope) as stats:
+            async def send_with_stats(message):
+                # 流式响应在开始发送时还未执行完全部SQL，响应头中为已执行的部分，日志中为完整统计
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-SQL-Count", str(stats.count))
+                    headers.append("X-SQL-Time-Ms", f"{stats.duration * 1000:.2f}")
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                report(scope["method"], scope["path"], stats, time.perf_counter() - start)
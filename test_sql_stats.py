@@ -0,0 +1,150 @@
+import os
+import logging
+import tempfile
+from contextlib import contextmanager
+
+# pytest运行时临时数据库由conftest.py设置；直接运行本文件时在导入models之前设置
+if __name__ == "__main__":
+    os.environ["CES_DB_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+import config
+import models
+import cache
+import migrations
+import generate_dataset
+import sqlstats
+import main
+
+# 分页接口及请求参数，每页条数不同时执行的SQL条数应该相同
+PAGE_ENDPOINTS = [
+    ("/ces/company/list/page", {}),
+    ("/ces/grid/list/page", {}),
+    ("/ces/community/list/page", {}),
+    ("/ces/community/list/page", {"tenantId": 1}),
+    ("/ces/group/list/page", {}),
+    ("/ces/role/list/page", {}),
+    ("/ces/label/list/page", {}),
+    ("/ces/label/list/page", {"companyId": 1}),
+    ("/ces/account/list/page", {}),
+    ("/ces/account/list/page", {"tenantId": 1, "enabled": 1}),
+]
+
+def create_dataset():
+    """生成小规模数据集，不生成用户数据(test_user_page.py使用同一个数据库时按用户数断言)"""
+    migrations.upgrade()
+    args = generate_dataset.parse_args([
+        "--tenants", "3", "--companies", "20", "--grids-per-company", "5", "--communities", "2000",
+        "--labels", "100", "--accounts", "500", "--users", "0"
+    ])
+    generate_dataset.DatasetGenerator(args).generate(models.engine)
+
+def reset_caches():
+    """清空维度缓存和总数缓存，每次请求的SQL条数只取决于接口本身"""
+    for dimension in (cache.tenants, cache.companies, cache.roles, cache.groups):
+        dimension.invalidate()
+    cache.bump_version(*models.Base.metadata.tables)
+
+@contextmanager
+def capture_sql_warnings(caplog):
+    """
+    收集ces.sql的警告：applog.setup()把ces logger设为不传递给root logger，
+    caplog的handler挂在root上收不到，这里直接挂到ces logger上(同时不传递，避免重复收集)
+    """
+    logger = logging.getLogger("ces")
+    propagate = logger.propagate
+    logger.addHandler(caplog.handler)
+    logger.propagate = False
+    try:
+        with caplog.at_level(logging.WARNING, logger=sqlstats.logger.name):
+            yield
+    finally:
+        logger.removeHandler(caplog.handler)
+        logger.propagate = propagate
+
+def sql_warnings(caplog):
+    return [
+        record.getMessage() for record in caplog.records
+        if record.name == sqlstats.logger.name and record.levelno >= logging.WARNING
+    ]
+
+def test_normalize_statement():
+    """字面量和IN列表长度不同的同一查询归一化为同一条语句"""
+    first = sqlstats.normalize("SELECT * FROM grids WHERE grids.id IN (?, ?, ?) AND name = 'a'  LIMIT 10")
+    second = sqlstats.normalize("SELECT * FROM grids\n WHERE grids.id IN (?, ?) AND name = 'b' LIMIT 20")
+    assert first == second == "SELECT * FROM grids WHERE grids.id IN (?, ...) AND name = ? LIMIT ?"
+
+def test_repeated_statements():
+    stats = sqlstats.RequestStats()
+    stats.statements.update({"SELECT a": 12, "SELECT b": 3})
+    assert stats.repeated(10) == [("SELECT a", 12)]
+
+def test_page_endpoints_have_no_n_plus_one(caplog):
+    """分页接口执行的SQL条数不随每页条数增长，且没有触发N+1警告"""
+    create_dataset()
+    client = TestClient(main.app)
+
+    with capture_sql_warnings(caplog):
+        for path, filters in PAGE_ENDPOINTS:
+            counts = []
+            for page_size in (5, 50):
+                reset_caches()
+                response = client.post(path, json={"pageNo": 1, "pageSize": page_size, **filters})
+                assert response.status_code == 200
+                assert response.json()["code"] == "00000", response.json()["msg"]
+                counts.append(int(response.headers["X-SQL-Count"]))
+                assert float(response.headers["X-SQL-Time-Ms"]) >= 0
+            assert counts[0] == counts[1], f"{path} {filters} 执行的SQL条数随每页条数增长: {counts}"
+
+    warnings = sql_warnings(caplog)
+    assert not warnings, warnings
+
+def test_per_row_queries_trigger_n_plus_one_warning(caplog):
+    """逐个局点查询网格的循环超过阈值时记录N+1警告"""
+    create_dataset()
+    db = models.SessionLocal()
+    try:
+        with capture_sql_warnings(caplog), sqlstats.track() as stats:
+            companies = db.query(models.Company).limit(config.SQL_REPEAT_THRESHOLD + 5).all()
+            for company in companies:
+                db.query(models.Grid).filter(models.Grid.company_id == company.id).all()
+            sqlstats.report("POST", "/test", stats, 0.0)
+    finally:
+        db.close()
+
+    assert len(companies) > config.SQL_REPEAT_THRESHOLD
+    assert stats.count == len(companies) + 1
+    [(statement, count)] = stats.repeated()
+    assert count == len(companies) and "FROM grids" in statement
+    warnings = sql_warnings(caplog)
+    assert len(warnings) == 1, warnings
+    assert f"同一SQL执行了 {count} 次" in warnings[0]
+
+def test_sql_count_header_matches_executed_statements(caplog, monkeypatch):
+    """阈值为0时每条执行过的SQL都记录警告，响应头中的SQL条数与实际执行的条数一致"""
+    monkeypatch.setattr(config, "SQL_REPEAT_THRESHOLD", 0)
+    executed = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        executed.append(sqlstats.normalize(statement))
+
+    engines = (models.engine, models.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        reset_caches()
+        with capture_sql_warnings(caplog):
+            response = TestClient(main.app).post("/ces/grid/list/page", json={"pageNo": 1, "pageSize": 5})
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert response.json()["code"] == "00000", response.json()["msg"]
+    assert executed
+    assert int(response.headers["X-SQL-Count"]) == len(executed)
+    warnings = sql_warnings(caplog)
+    assert len(warnings) == len(set(executed)), warnings
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+# pytest运行时临时数据库由conftest.py设置；直接运行本文件时在导入models之前设置
+if __name__ == "__main__":
+    os.environ["CES_DB_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+from sqlalchemy import event
+import models
+import migrations
+import main
+
+def create_test_users(count=30):
+    """创建测试用户，每个用户关联局点、运营商、2个班组和2个角色"""
+    migrations.upgrade()
+    db = models.SessionLocal()
+    try:
+        tenant = models.Tenant(name="测试运营商")
+        company = models.Company(name="测试局点", tenant=tenant)
+        groups = [models.Group(name=f"测试班组{i}", company=company) for i in range(4)]
+        roles = [models.Role(name=f"测试角色{i}") for i in range(3)]
+        for i in range(count):
+            db.add(models.User(
+                username=f"test_user_{i}",
+                name=f"测试用户{i}",
+                effective_day="2030-01-01",
+                tenant=tenant,
+                company=company,
+                groups=[groups[i % 4], groups[(i + 1) % 4]],
+                roles=[roles[i % 3], roles[(i + 1) % 3]]
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+def query_user_page(page_no, page_size):
+    """调用用户分页接口，返回响应和执行的SQL条数"""
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db = models.SessionLocal()
+    event.listen(models.engine, "before_cursor_execute", count_statement)
+    try:
+        request = main.UserPageRequest(pageNo=page_no, pageSize=page_size)
+        response = main.user_list_page(request, db)
+    finally:
+        event.remove(models.engine, "before_cursor_execute", count_statement)
+        db.close()
+    return response, len(statements)
+
+def test_user_list_page_statement_count():
+    """测试用户分页查询的SQL条数固定，不随每页条数增长"""
+    create_test_users(30)
+
+    for page_size in (5, 10, 30):
+        response, statement_count = query_user_page(1, page_size)
+
+        assert response.code == "00000", response.msg
+        assert len(response.data.records) == page_size
+        assert response.data.total == 30
+        # 分页查询(JOIN运营商/局点，窗口函数计算总数) + 班组IN查询 + 角色IN查询
+        assert statement_count == 3, f"pageSize={page_size} 执行了 {statement_count} 条SQL"
+
+        record = response.data.records[0]
+        assert record.tenantName == "测试运营商"
+        assert record.companyName == "测试局点"
+        assert len(record.groupNames) == 2
+        assert len(record.roleNames) == 2
+
+if __name__ == "__main__":
+    test_user_list_page_statement_count()
+    print("✅ 测试成功: 用户分页查询SQL条数固定为3条")